@@ -135,7 +135,7 @@ public class CleaningTaskService {
 
         prepareTask(task, request.getInstance(), executorType);
         scanDataset(taskId, request.getSrcDatasetId());
-        taskScheduler.executeTask(taskId);
+        taskScheduler.executeTask(taskId, false);
         return task;
     }
 
@@ -208,7 +208,7 @@ public class CleaningTaskService {
         CleaningTaskDto task = cleaningTaskRepo.findTaskById(taskId);
         scanDataset(taskId, task.getSrcDatasetId(), succeedSet);
         cleaningResultRepo.deleteByInstanceId(taskId, "FAILED");
-        taskScheduler.executeTask(taskId);
+        taskScheduler.executeTask(taskId, true);
     }
 
     private void prepareTask(CleaningTaskDto task, List<OperatorInstanceDto> instances, ExecutorType executorType) {
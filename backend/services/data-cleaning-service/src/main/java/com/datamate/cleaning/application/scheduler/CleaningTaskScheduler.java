@@ -20,17 +20,17 @@ public class CleaningTaskScheduler {
 
     private final ExecutorService taskExecutor = Executors.newFixedThreadPool(5);
 
-    public void executeTask(String taskId) {
-        taskExecutor.submit(() -> submitTask(taskId));
+    public void executeTask(String taskId, boolean resume) {
+        taskExecutor.submit(() -> submitTask(taskId, resume));
     }
 
-    private void submitTask(String taskId) {
+    private void submitTask(String taskId, boolean resume) {
         CleaningTaskDto task = new CleaningTaskDto();
         task.setId(taskId);
         task.setStatus(CleaningTaskStatusEnum.RUNNING);
         task.setStartedAt(LocalDateTime.now());
         cleaningTaskRepo.updateTask(task);
-        runtimeClient.submitTask(taskId);
+        runtimeClient.submitTask(taskId, resume);
     }
 
     public void stopTask(String taskId) {
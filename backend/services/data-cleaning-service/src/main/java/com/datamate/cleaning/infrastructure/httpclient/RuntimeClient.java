@@ -32,8 +32,8 @@ public class RuntimeClient {
 
     private final HttpClient CLIENT = HttpClient.newBuilder().connectTimeout(Duration.ofSeconds(10)).build();
 
-    public void submitTask(String taskId) {
-        send(MessageFormat.format(getRequestUrl(CREATE_TASK_URL), taskId));
+    public void submitTask(String taskId, boolean resume) {
+        send(MessageFormat.format(getRequestUrl(CREATE_TASK_URL), taskId) + "?resume=" + resume);
     }
 
     public void stopTask(String taskId) {
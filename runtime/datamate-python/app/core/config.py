@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import model_validator
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     """应用程序配置"""
@@ -58,6 +58,25 @@ class Settings(BaseSettings):
     label_studio_file_path_prefix: str = "/data/local-files/?d="  # Label Studio local file serving URL prefix
 
     ls_task_page_size: int = 1000
+    ls_sync_concurrency: int = 16  # 同步标注时并发请求Label Studio的最大数量
+    ls_http_max_connections: int = 32  # Label Studio HTTP客户端连接池的最大连接数
+    ls_http_max_keepalive_connections: int = 16  # 连接池中保持的空闲长连接数
+    ls_http_keepalive_expiry: float = 60.0  # 空闲长连接的保持时间（秒）
+    ls_http2: bool = True  # 安装了h2时使用HTTP/2
+
+    # 数据合成
+    synthesis_file_concurrency: int = 8  # 单个合成任务同时切片并投递 chunk 的源文件数
+    synthesis_chunk_concurrency: int = 32  # 共享队列的 chunk 处理协程数，模型调用另受问题/答案信号量限制
+
+    # 大模型调用（OpenAI 兼容接口）
+    llm_http_max_connections: int = 200  # 每个 (base_url, api_key) 客户端连接池的最大连接数
+    llm_http_max_keepalive_connections: int = 50  # 连接池中保持的空闲长连接数
+    llm_timeout: float = 600.0  # 单次请求超时（秒）
+    llm_max_retries: int = 3  # 限流、超时、连接错误和 5xx 的最大重试次数
+    llm_retry_backoff: float = 1.0  # 重试等待的基础秒数，按 2 的指数增长
+    llm_default_rpm: int = 0  # 每个模型每分钟最大请求数，0 表示不限制
+    llm_default_tpm: int = 0  # 每个模型每分钟最大 token 数，0 表示不限制
+    llm_rate_limits: Dict[str, Dict[str, int]] = {}  # 按模型名单独配置，如 {"qwen2": {"rpm": 60, "tpm": 100000}}
 
     # DataMate
     dm_file_path_prefix: str = "/dataset"  # DM存储文件夹前缀
@@ -45,6 +45,7 @@ class LabelingProject(Base):
     template_id = Column(String(36), ForeignKey('t_dm_annotation_templates.id', ondelete='SET NULL'), nullable=True, comment="使用的模板ID")
     configuration = Column(JSON, nullable=True, comment="项目配置（可能包含对模板的自定义修改）")
     progress = Column(JSON, nullable=True, comment="项目进度信息")
+    sync_watermarks = Column(JSON, nullable=True, comment="增量同步水位线（各同步方向上次同步到的时间点）")
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), comment="创建时间")
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp(), comment="更新时间")
     deleted_at = Column(TIMESTAMP, nullable=True, comment="删除时间（软删除）")
@@ -76,6 +77,8 @@ class AutoAnnotationTask(Base):
     detected_objects = Column(Integer, default=0, comment="检测到的对象总数")
     output_path = Column(String(500), nullable=True, comment="输出路径")
     error_message = Column(Text, nullable=True, comment="错误信息")
+    worker_id = Column(String(128), nullable=True, comment="持有任务租约的 worker 标识")
+    heartbeat_at = Column(TIMESTAMP, nullable=True, comment="租约心跳时间，超时未续约的 running 任务可被其他 worker 接管")
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), comment="创建时间")
     updated_at = Column(
         TIMESTAMP,
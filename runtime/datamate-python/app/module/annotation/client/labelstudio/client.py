@@ -1,6 +1,8 @@
+import asyncio
 import httpx
+import json
 import re
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple
 
 from app.core.config import settings
 from app.core.logging import get_logger
@@ -13,6 +15,21 @@ from .schema import (
 
 logger = get_logger(__name__)
 
+# 按 (base_url, token, timeout) 在进程内共享的 HTTP 客户端，多次请求复用同一连接池
+_shared_http_clients: Dict[Tuple[str, str, float], httpx.AsyncClient] = {}
+
+
+def _http2_enabled() -> bool:
+    """配置开启且安装了 h2 时使用 HTTP/2"""
+    if not settings.ls_http2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
 class Client:
     """Label Studio服务客户端
 
@@ -79,15 +96,26 @@ class Client:
         if not self.token:
             raise ValueError("Label Studio API token is required")
 
-        # 初始化 HTTP 客户端
-        self.client = httpx.AsyncClient(
-            base_url=self.base_url,
-            timeout=self.timeout,
-            headers={
-                "Authorization": f"Token {self.token}",
-                "Content-Type": "application/json"
-            }
-        )
+        # 获取共享的 HTTP 客户端，不存在或已关闭时新建
+        self._client_key = (self.base_url, self.token, self.timeout)
+        client = _shared_http_clients.get(self._client_key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                headers={
+                    "Authorization": f"Token {self.token}",
+                    "Content-Type": "application/json"
+                },
+                limits=httpx.Limits(
+                    max_connections=settings.ls_http_max_connections,
+                    max_keepalive_connections=settings.ls_http_max_keepalive_connections,
+                    keepalive_expiry=settings.ls_http_keepalive_expiry
+                ),
+                http2=_http2_enabled()
+            )
+            _shared_http_clients[self._client_key] = client
+        self.client = client
 
         logger.debug(f"Label Studio client initialized: {self.base_url}")
 
@@ -255,18 +283,127 @@ class Client:
             logger.error(f"Error while creating single task: {e}")
             return None
 
+    @staticmethod
+    def _updated_after_query(updated_after: str) -> str:
+        """构造Data Manager过滤条件，只返回updated_at晚于指定时间的任务"""
+        return json.dumps({
+            "filters": {
+                "conjunction": "and",
+                "items": [{
+                    "filter": "filter:tasks:updated_at",
+                    "operator": "greater",
+                    "type": "Datetime",
+                    "value": updated_after
+                }]
+            }
+        })
+
+    @staticmethod
+    def _file_ids_query(file_ids: List[str]) -> str:
+        """构造Data Manager过滤条件，只返回data.file_id为指定DM文件ID之一的任务"""
+        return json.dumps({
+            "filters": {
+                "conjunction": "or",
+                "items": [{
+                    "filter": "filter:tasks:data.file_id",
+                    "operator": "equal",
+                    "type": "String",
+                    "value": str(file_id)
+                } for file_id in file_ids]
+            }
+        })
+
+    async def _fetch_task_page(
+        self,
+        project_id: int,
+        page: int,
+        page_size: int,
+        updated_after: Optional[str] = None,
+        file_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """请求单页任务，失败时抛出 httpx 异常"""
+        params: Dict[str, Any] = {
+            "project": project_id,
+            "page": page,
+            "page_size": page_size
+        }
+        if file_ids:
+            params["query"] = self._file_ids_query(file_ids)
+        elif updated_after:
+            params["query"] = self._updated_after_query(updated_after)
+
+        response = await self.client.get("/api/tasks", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def iter_project_task_pages(
+        self,
+        project_id: str,
+        page_size: int = 1000,
+        updated_after: Optional[str] = None,
+        file_ids: Optional[List[str]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """逐页获取项目任务的异步生成器
+
+        每次产出一页任务列表，调用方处理当前页时后台预取下一页，内存中最多保留两页任务。
+
+        Args:
+            project_id: 项目ID
+            page_size: 每页大小
+            updated_after: 只获取updated_at晚于该时间（ISO格式）的任务，用于增量同步
+            file_ids: 只获取对应这些DM文件ID的任务，指定时忽略updated_after
+
+        Raises:
+            httpx.HTTPError: 请求任务失败
+        """
+        pid = int(project_id)
+        page = 1
+        next_page: Optional[asyncio.Task] = asyncio.ensure_future(
+            self._fetch_task_page(pid, page, page_size, updated_after, file_ids)
+        )
+        try:
+            while next_page is not None:
+                try:
+                    result = await next_page
+                except httpx.HTTPStatusError as e:
+                    logger.error(f"获取项目任务失败 HTTP {e.response.status_code}: {e.response.text}")
+                    raise
+                next_page = None
+
+                tasks = result.get("tasks", [])
+                total = result.get("total")
+                has_more = page * page_size < total if total is not None else len(tasks) >= page_size
+                logger.debug(f"Fetched {len(tasks)} tasks for project {pid}, page {page} (total={total})")
+
+                # 先发出下一页请求，再把当前页交给调用方处理
+                if tasks and has_more:
+                    page += 1
+                    next_page = asyncio.ensure_future(
+                        self._fetch_task_page(pid, page, page_size, updated_after, file_ids)
+                    )
+                if tasks:
+                    yield tasks
+        finally:
+            # 调用方提前结束遍历时取消尚未使用的预取请求，已完成的请求取出其异常避免告警
+            if next_page is not None and not next_page.cancel() and not next_page.cancelled():
+                next_page.exception()
+
     async def get_project_tasks(
         self,
         project_id: str,
         page: Optional[int] = None,
-        page_size: int = 1000
+        page_size: int = 1000,
+        updated_after: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """获取项目任务信息
 
+        需要遍历全部任务时优先使用 iter_project_task_pages，避免一次性在内存中保存整个项目的任务。
+
         Args:
             project_id: 项目ID
             page: 页码（从1开始）。如果为None，则获取所有任务
             page_size: 每页大小
+            updated_after: 只获取updated_at晚于该时间（ISO格式）的任务，用于增量同步
 
         Returns:
             如果指定了page参数，返回包含分页信息的字典：
@@ -292,17 +429,7 @@ class Client:
             if page is not None:
                 logger.debug(f"Fetching tasks for project {pid}, page {page} (page_size={page_size})")
 
-                response = await self.client.get(
-                    f"/api/tasks",
-                    params={
-                        "project": pid,
-                        "page": page,
-                        "page_size": page_size
-                    }
-                )
-                response.raise_for_status()
-
-                result = response.json()
+                result = await self._fetch_task_page(pid, page, page_size, updated_after)
 
                 # 返回单页结果，包含分页信息
                 return {
@@ -313,27 +440,15 @@ class Client:
                     "tasks": result.get("tasks", [])
                 }
 
-            # 如果未指定page，获取所有任务
+            # 如果未指定page，逐页获取所有任务
             logger.debug(f"(page) not specified, fetching all tasks.")
             all_tasks = []
+            async for tasks in self.iter_project_task_pages(pid, page_size, updated_after):
+                all_tasks.extend(tasks)
 
-            response = await self.client.get(
-                f"/api/tasks",
-                params={
-                    "project": pid
-                }
-            )
-            response.raise_for_status()
-
-            result = response.json()
-            tasks = result.get("tasks", [])
-
-            if not tasks:
+            if not all_tasks:
                 logger.debug(f"No tasks found for this project.")
-
-
-            all_tasks.extend(tasks)
-            logger.debug(f"Fetched {len(tasks)} tasks.")
+            logger.debug(f"Fetched {len(all_tasks)} tasks.")
 
             # 返回所有任务，不包含分页信息
             return {
@@ -637,8 +752,10 @@ class Client:
             return None
 
     async def close(self):
-        """关闭客户端连接"""
+        """关闭客户端连接（共享的连接池随之关闭，后续新建的客户端会重新创建连接池）"""
         try:
+            if _shared_http_clients.get(self._client_key) is self.client:
+                del _shared_http_clients[self._client_key]
             await self.client.aclose()
             logger.debug("Label Studio client closed")
         except Exception as e:
@@ -61,7 +61,7 @@ async def sync_dataset_content(
             )
         
         # Sync dataset files
-        result = await sync_service.sync_dataset_files(request.id, request.batch_size)
+        result = await sync_service.sync_dataset_files(request.id, request.batch_size, request.full_sync)
         
         # Sync annotations if requested
         if request.sync_annotations:
@@ -72,20 +72,23 @@ async def sync_dataset_content(
                 await sync_service.sync_annotations_from_ls_to_dm(
                     mapping,
                     request.batch_size,
-                    request.overwrite
+                    request.overwrite,
+                    request.full_sync
                 )
             elif request.annotation_direction == "dm_to_ls":
                 await sync_service.sync_annotations_from_dm_to_ls(
                     mapping,
                     request.batch_size,
-                    request.overwrite_labeling_project
+                    request.overwrite_labeling_project,
+                    request.full_sync
                 )
             elif request.annotation_direction == "bidirectional":
                 await sync_service.sync_annotations_bidirectional(
                     mapping,
                     request.batch_size,
                     request.overwrite,
-                    request.overwrite_labeling_project
+                    request.overwrite_labeling_project,
+                    request.full_sync
                 )
         
         logger.info(f"Sync completed: {result.synced_files}/{result.total_files} files")
@@ -142,20 +145,23 @@ async def sync_annotations(
             result = await sync_service.sync_annotations_from_ls_to_dm(
                 mapping,
                 request.batch_size,
-                request.overwrite
+                request.overwrite,
+                request.full_sync
             )
         elif request.direction == "dm_to_ls":
             result = await sync_service.sync_annotations_from_dm_to_ls(
                 mapping,
                 request.batch_size,
-                request.overwrite_labeling_project
+                request.overwrite_labeling_project,
+                request.full_sync
             )
         elif request.direction == "bidirectional":
             result = await sync_service.sync_annotations_bidirectional(
                 mapping,
                 request.batch_size,
                 request.overwrite,
-                request.overwrite_labeling_project
+                request.overwrite_labeling_project,
+                request.full_sync
             )
         else:
             raise HTTPException(
@@ -30,6 +30,11 @@ class SyncDatasetRequest(BaseResponseModel):
         description="是否覆盖Label Studio中的标注（基于时间戳比较）",
         alias="overwriteLabelingProject"
     )
+    full_sync: bool = Field(
+        False,
+        description="是否忽略增量同步水位线执行全量同步（全量同步时会清理DM中已删除文件对应的任务）",
+        alias="fullSync"
+    )
 
 class SyncDatasetResponse(BaseResponseModel):
     """同步数据集响应模型"""
@@ -66,6 +71,11 @@ class SyncAnnotationsRequest(BaseResponseModel):
         description="是否覆盖Label Studio中的标注（基于时间戳比较）。True时，如果DataMate的标注更新时间更新，则覆盖Label Studio的标注",
         alias="overwriteLabelingProject"
     )
+    full_sync: bool = Field(
+        False,
+        description="是否忽略增量同步水位线执行全量同步（全量同步时会清理DM中已删除文件对应的任务）",
+        alias="fullSync"
+    )
 
 
 class TagInfo(BaseResponseModel):
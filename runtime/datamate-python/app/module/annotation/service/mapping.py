@@ -2,7 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update, func
 from sqlalchemy.orm import aliased
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 from datetime import datetime
 import uuid
 
@@ -267,6 +267,26 @@ class DatasetMappingService:
             return await self.get_mapping_by_uuid(mapping_id)
         return None
     
+    async def get_sync_watermarks(self, mapping_id: str) -> Dict[str, str]:
+        """获取映射的增量同步水位线"""
+        result = await self.db.execute(
+            select(LabelingProject.sync_watermarks).where(LabelingProject.id == mapping_id)
+        )
+        return dict(result.scalar_one_or_none() or {})
+
+    async def update_sync_watermarks(self, mapping_id: str, watermarks: Dict[str, str]) -> None:
+        """合并更新映射的增量同步水位线"""
+        merged = await self.get_sync_watermarks(mapping_id)
+        merged.update(watermarks)
+
+        await self.db.execute(
+            update(LabelingProject)
+            .where(LabelingProject.id == mapping_id)
+            .values(sync_watermarks=merged)
+        )
+        await self.db.commit()
+        logger.debug(f"Updated sync watermarks for mapping {mapping_id}: {merged}")
+
     async def soft_delete_mapping(self, mapping_id: str) -> bool:
         """软删除映射"""
         logger.info(f"Soft delete mapping: {mapping_id}")
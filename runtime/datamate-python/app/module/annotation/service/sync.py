@@ -1,6 +1,9 @@
+import asyncio
+import httpx
+from datetime import datetime
 from typing import Optional, List, Dict, Any, Tuple, Set
 from app.module.dataset import DatasetManagementService
-from sqlalchemy import update, select
+from sqlalchemy import update, select, func
 from app.db.models import DatasetFiles
 
 from app.core.logging import get_logger
@@ -18,7 +21,17 @@ from ..service.mapping import DatasetMappingService
 logger = get_logger(__name__)
 
 class SyncService:
-    """数据同步服务"""
+    """数据同步服务
+
+    各同步方向在映射上记录增量同步水位线，非全量同步时只拉取水位线之后新增或变化的任务/文件：
+    LS侧水位线为已处理任务中最新的updated_at（LS时钟），DM侧水位线为同步开始时的数据库时间。
+    """
+    
+    # 增量同步水位线名称
+    WATERMARK_FILES_DM = "files_dm_created_at"
+    WATERMARK_FILES_LS = "files_ls_updated_at"
+    WATERMARK_LS_TO_DM = "ls_to_dm_updated_at"
+    WATERMARK_DM_TO_LS = "dm_to_ls_tags_updated_at"
     
     def __init__(
         self, 
@@ -99,37 +112,93 @@ class SyncService:
         logger.debug(f"Successfully created {created_count}/{len(tasks)} tasks individually")
         return created_count
     
-    async def get_existing_dm_file_mapping(self, project_id: str) -> Dict[str, int]:
+    async def _fetch_annotations_concurrently(
+        self,
+        task_ids: List[int]
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        并发获取多个任务的标注结果，并发数由ls_sync_concurrency限制
+
+        Returns:
+            与task_ids顺序一致的标注结果列表，获取失败的任务对应None
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.ls_sync_concurrency))
+
+        async def fetch(task_id: int) -> Optional[List[Dict[str, Any]]]:
+            async with semaphore:
+                return await self.ls_client.get_task_annotations(task_id)
+
+        return await asyncio.gather(*(fetch(task_id) for task_id in task_ids))
+
+    async def _dm_now(self) -> datetime:
+        """获取数据库当前时间，DM侧水位线统一使用数据库时钟"""
+        result = await self.dm_client.db.execute(select(func.now()))
+        return result.scalar_one()
+    
+    async def _get_watermarks(self, mapping_id: str, full_sync: bool) -> Dict[str, str]:
+        """获取映射的增量同步水位线，全量同步时返回空字典"""
+        if full_sync:
+            return {}
+        return await self.mapping_service.get_sync_watermarks(mapping_id)
+    
+    def _latest_updated_at(self, tasks: List[Dict[str, Any]], current: Optional[str]) -> Optional[str]:
+        """返回任务中最新的updated_at与当前水位线中较晚的一个"""
+        # LS返回的时间戳格式一致，可直接按字符串比较
+        latest = max((task.get("updated_at") for task in tasks if task.get("updated_at")), default=None)
+        if not latest:
+            return current
+        if current and self._compare_timestamps(latest, current) <= 0:
+            return current
+        return latest
+    
+    async def _scan_ls_tasks(
+        self,
+        project_id: str,
+        updated_after: Optional[str] = None
+    ) -> Tuple[Dict[str, int], Optional[str]]:
+        """
+        逐页遍历Label Studio项目中的任务，updated_after不为空时只遍历该时间之后变化的任务
+        
+        Returns:
+            (DM文件ID到任务ID的映射, 遍历到的最新updated_at与updated_after中较晚的一个)
+        """
+        dm_file_to_task_mapping: Dict[str, int] = {}
+        latest_updated_at = updated_after
+        async for tasks in self.ls_client.iter_project_task_pages(
+            project_id,
+            page_size=settings.ls_task_page_size,
+            updated_after=updated_after
+        ):
+            dm_file_to_task_mapping.update(self._build_file_task_mapping(tasks))
+            latest_updated_at = self._latest_updated_at(tasks, latest_updated_at)
+        return dm_file_to_task_mapping, latest_updated_at
+    
+    @staticmethod
+    def _build_file_task_mapping(tasks: List[Dict[str, Any]]) -> Dict[str, int]:
+        """构建DM文件ID到任务ID的映射"""
+        return {
+            str(task.get('data', {}).get('file_id')): task.get('id')
+            for task in tasks
+            if task.get('data', {}).get('file_id') is not None
+        }
+    
+    async def get_existing_dm_file_mapping(
+        self,
+        project_id: str,
+        updated_after: Optional[str] = None
+    ) -> Dict[str, int]:
         """
         获取Label Studio项目中已存在的DM文件ID到任务ID的映射
         
         Args:
             project_id: Label Studio项目ID
+            updated_after: 只包含该时间之后变化的任务（ISO格式），为空时包含全部任务
             
         Returns:
             file_id到task_id的映射字典
         """
         try:
-            page_size = getattr(settings, 'ls_task_page_size', 1000)
-            result = await self.ls_client.get_project_tasks(
-                project_id=project_id,
-                page=None,
-                page_size=page_size
-            )
-
-            if not result:
-                logger.warning(f"Failed to fetch tasks for project {project_id}")
-                return {}
-            
-            all_tasks = result.get("tasks", [])
-            logger.debug(f"Successfully fetched {len(all_tasks)} tasks")
-
-            # 使用字典推导式构建映射
-            dm_file_to_task_mapping = {
-                str(task.get('data', {}).get('file_id')): task.get('id')
-                for task in all_tasks
-                if task.get('data', {}).get('file_id') is not None
-            }
+            dm_file_to_task_mapping, _ = await self._scan_ls_tasks(project_id, updated_after)
             
             logger.debug(f"Found {len(dm_file_to_task_mapping)} existing task mappings")
             return dm_file_to_task_mapping
@@ -138,21 +207,52 @@ class SyncService:
             logger.error(f"Error while fetching existing tasks: {e}")
             return {}
     
+    async def get_dm_file_mapping_for_files(
+        self,
+        project_id: str,
+        file_ids: List[str]
+    ) -> Dict[str, int]:
+        """
+        只查询指定DM文件在Label Studio中对应的任务，增量同步时查询量与变化的文件数成正比
+        
+        Args:
+            project_id: Label Studio项目ID
+            file_ids: DM文件ID列表
+            
+        Returns:
+            file_id到task_id的映射字典
+            
+        Raises:
+            httpx.HTTPError: 请求任务失败
+        """
+        dm_file_to_task_mapping: Dict[str, int] = {}
+        if not file_ids:
+            return dm_file_to_task_mapping
+        async for tasks in self.ls_client.iter_project_task_pages(
+            project_id,
+            page_size=settings.ls_task_page_size,
+            file_ids=file_ids
+        ):
+            dm_file_to_task_mapping.update(self._build_file_task_mapping(tasks))
+        return dm_file_to_task_mapping
+    
     async def _fetch_dm_files_paginated(
         self, 
         dataset_id: str, 
         batch_size: int,
         existing_file_ids: Set[str],
-        project_id: str
-    ) -> Tuple[Set[str], int]:
+        project_id: str,
+        created_since: Optional[datetime] = None
+    ) -> Tuple[Set[str], int, int]:
         """
-        分页获取DM文件并创建新任务
+        分页获取DM文件并创建新任务，created_since不为空时只获取该时间及之后创建的文件
         
         Returns:
-            (当前文件ID集合, 创建的任务数)
+            (当前文件ID集合, 创建的任务数, 创建失败的任务数)
         """
         current_file_ids = set()
         total_created = 0
+        total_failed = 0
         page = 0
         
         while True:
@@ -160,6 +260,7 @@ class SyncService:
                 dataset_id, 
                 page=page, 
                 size=batch_size,
+                created_since=created_since,
             )
             
             if not files_response or not files_response.content:
@@ -184,13 +285,14 @@ class SyncService:
             if new_tasks:
                 created = await self._create_tasks_with_fallback(project_id, new_tasks)
                 total_created += created
+                total_failed += len(new_tasks) - created
             
             # 检查是否还有更多页面
             if page >= files_response.totalPages - 1:
                 break
             page += 1
         
-        return current_file_ids, total_created
+        return current_file_ids, total_created, total_failed
     
     async def _delete_orphaned_tasks(
         self,
@@ -217,7 +319,8 @@ class SyncService:
     async def sync_dataset_files(
         self, 
         mapping_id: str, 
-        batch_size: int = 50
+        batch_size: int = 50,
+        full_sync: bool = False
     ) -> SyncDatasetResponse:
         """
         同步数据集文件到Label Studio (Legacy endpoint - 委托给sync_files)
@@ -225,6 +328,7 @@ class SyncService:
         Args:
             mapping_id: 映射ID
             batch_size: 批处理大小
+            full_sync: 是否忽略增量水位线执行全量同步
             
         Returns:
             同步结果响应
@@ -245,16 +349,16 @@ class SyncService:
         
         try:
             # 委托给sync_files执行实际同步
-            result = await self.sync_files(mapping, batch_size)
+            result = await self.sync_files(mapping, batch_size, full_sync)
             
             logger.info(f"Sync files completed: created={result['created']}, deleted={result['deleted']}, total={result['total']}")
             
             return SyncDatasetResponse(
                 id=mapping.id,
-                status="success",
+                status="success" if result["failed"] == 0 else "partial",
                 synced_files=result["created"],
                 total_files=result["total"],
-                message=f"Sync completed: created {result['created']} files, deleted {result['deleted']} tasks"
+                message=f"Sync completed: created {result['created']} files, failed {result['failed']} files, deleted {result['deleted']} tasks"
             )
             
         except Exception as e:
@@ -272,7 +376,8 @@ class SyncService:
         mapping_id: str, 
         batch_size: int = 50, 
         file_priority: int = 0, 
-        annotation_priority: int = 0
+        annotation_priority: int = 0,
+        full_sync: bool = False
     ) -> SyncDatasetResponse:
         """
         同步数据集文件和标注
@@ -282,6 +387,7 @@ class SyncService:
             batch_size: 批处理大小
             file_priority: 文件同步优先级 (0: dataset优先, 1: annotation优先)
             annotation_priority: 标注同步优先级 (0: dataset优先, 1: annotation优先)
+            full_sync: 是否忽略增量水位线执行全量同步
             
         Returns:
             同步结果响应
@@ -302,7 +408,7 @@ class SyncService:
         
         try:
             # 同步文件
-            file_result = await self.sync_files(mapping, batch_size)
+            file_result = await self.sync_files(mapping, batch_size, full_sync)
             
             # TODO: 同步标注
             # annotation_result = await self.sync_annotations(mapping, batch_size, annotation_priority)
@@ -311,10 +417,10 @@ class SyncService:
             
             return SyncDatasetResponse(
                 id=mapping.id,
-                status="success",
+                status="success" if file_result["failed"] == 0 else "partial",
                 synced_files=file_result["created"],
                 total_files=file_result["total"],
-                message=f"Sync completed: created {file_result['created']} files, deleted {file_result['deleted']} tasks"
+                message=f"Sync completed: created {file_result['created']} files, failed {file_result['failed']} files, deleted {file_result['deleted']} tasks"
             )
             
         except Exception as e:
@@ -330,17 +436,24 @@ class SyncService:
     async def sync_files(
         self, 
         mapping: DatasetMappingResponse, 
-        batch_size: int
+        batch_size: int,
+        full_sync: bool = False
     ) -> Dict[str, int]:
         """
         同步DM和Label Studio之间的文件
         
+        增量同步时只获取上次同步后新建的DM文件，并与上次同步后变化的LS任务去重；
+        上次同步创建的任务必然晚于LS水位线，因此不会重复创建。
+        DM中已删除文件对应的孤立任务只在全量同步（或首次同步）时清理。
+        存在创建失败的任务时不推进水位线，下次同步重新获取这些文件。
+        
         Args:
             mapping: 数据集映射信息
             batch_size: 批处理大小
+            full_sync: 是否忽略增量水位线执行全量同步
             
         Returns:
-            同步统计信息: {"created": int, "deleted": int, "total": int}
+            同步统计信息: {"created": int, "failed": int, "deleted": int, "total": int}
         """
         logger.debug(f"Syncing files for dataset {mapping.dataset_id} to project {mapping.labeling_project_id}")
         
@@ -351,30 +464,51 @@ class SyncService:
         
         total_files = dataset_info.fileCount
         logger.debug(f"Total files in DM dataset: {total_files}")
+        
+        watermarks = await self._get_watermarks(mapping.id, full_sync)
+        dm_watermark = watermarks.get(self.WATERMARK_FILES_DM)
+        ls_watermark = watermarks.get(self.WATERMARK_FILES_LS)
+        incremental = bool(dm_watermark)
+        sync_started_at = await self._dm_now()
 
-        # 获取Label Studio中已存在的文件映射
-        existing_dm_file_mapping = await self.get_existing_dm_file_mapping(mapping.labeling_project_id)
+        # 获取Label Studio中已存在（增量时为水位线之后变化）的任务；获取失败时直接报错，避免重复创建任务
+        existing_dm_file_mapping, latest_ls_updated_at = await self._scan_ls_tasks(
+            mapping.labeling_project_id,
+            ls_watermark if incremental else None
+        )
         existing_file_ids = set(existing_dm_file_mapping.keys())
-        logger.debug(f"{len(existing_file_ids)} tasks already exist in Label Studio")
+        logger.debug(f"{len(existing_file_ids)} tasks already exist in Label Studio (incremental={incremental})")
         
         # 分页获取DM文件并创建新任务
-        current_file_ids, created_count = await self._fetch_dm_files_paginated(
+        current_file_ids, created_count, failed_count = await self._fetch_dm_files_paginated(
             mapping.dataset_id,
             batch_size,
             existing_file_ids,
-            mapping.labeling_project_id
+            mapping.labeling_project_id,
+            datetime.fromisoformat(dm_watermark) if incremental else None
         )
         
-        # 删除孤立任务
-        deleted_count = await self._delete_orphaned_tasks(
-            existing_dm_file_mapping,
-            current_file_ids
-        )
+        # 删除孤立任务，增量同步只看到部分文件，无法判断孤立任务
+        deleted_count = 0
+        if not incremental:
+            deleted_count = await self._delete_orphaned_tasks(
+                existing_dm_file_mapping,
+                current_file_ids
+            )
+        
+        if failed_count == 0:
+            await self.mapping_service.update_sync_watermarks(mapping.id, {
+                self.WATERMARK_FILES_DM: sync_started_at.isoformat(),
+                self.WATERMARK_FILES_LS: latest_ls_updated_at or "",
+            })
+        else:
+            logger.warning(f"Failed to create {failed_count} tasks, keep file sync watermarks for retry")
         
-        logger.debug(f"File sync completed: total={total_files}, created={created_count}, deleted={deleted_count}")
+        logger.debug(f"File sync completed: total={total_files}, created={created_count}, failed={failed_count}, deleted={deleted_count}")
         
         return {
             "created": created_count,
+            "failed": failed_count,
             "deleted": deleted_count,
             "total": total_files
         }
@@ -529,15 +663,19 @@ class SyncService:
         self,
         mapping: DatasetMappingResponse,
         batch_size: int = 50,
-        overwrite: bool = True
+        overwrite: bool = True,
+        full_sync: bool = False
     ) -> SyncAnnotationsResponse:
         """
         从Label Studio同步标注到数据集
         
+        增量同步时只处理上次同步后updated_at变化的任务；存在获取或写入失败时不推进水位线，下次同步重试。
+        
         Args:
             mapping: 数据集映射信息
             batch_size: 批处理大小
             overwrite: 是否允许覆盖DataMate中的标注（基于时间戳比较）
+            full_sync: 是否忽略增量水位线执行全量同步
             
         Returns:
             同步结果响应
@@ -550,130 +688,150 @@ class SyncService:
         conflicts_resolved = 0
         
         try:
-            # 获取Label Studio中的所有任务
-            ls_tasks_result = await self.ls_client.get_project_tasks(
-                mapping.labeling_project_id,
-                page=None
-            )
+            # 逐页获取Label Studio中的任务（增量时只获取水位线之后变化的任务），处理当前页时预取下一页
+            watermarks = await self._get_watermarks(mapping.id, full_sync)
+            ls_watermark = watermarks.get(self.WATERMARK_LS_TO_DM) or None
+            latest_updated_at = ls_watermark
+            total_tasks = 0
+            batch_index = 0
             
-            if not ls_tasks_result:
-                token_display = settings.label_studio_user_token[:10] + "..." if settings.label_studio_user_token else "None"
-                error_msg = f"Failed to fetch tasks from Label Studio project {mapping.labeling_project_id}. Please check:\n" \
-                           f"1. Label Studio is running at {settings.label_studio_base_url}\n" \
-                           f"2. Project ID {mapping.labeling_project_id} exists\n" \
-                           f"3. API token is valid: {token_display}"
-                logger.error(error_msg)
-                return SyncAnnotationsResponse(
-                    id=mapping.id,
-                    status="error",
-                    synced_to_dm=0,
-                    synced_to_ls=0,
-                    skipped=0,
-                    failed=0,
-                    conflicts_resolved=0,
-                    message=f"Failed to connect to Label Studio at {settings.label_studio_base_url}"
-                )
-            
-            all_tasks = ls_tasks_result.get("tasks", [])
-            logger.info(f"Found {len(all_tasks)} tasks in Label Studio project")
-            
-            if len(all_tasks) == 0:
-                logger.warning(f"No tasks found in Label Studio project {mapping.labeling_project_id}")
-                return SyncAnnotationsResponse(
-                    id=mapping.id,
-                    status="success",
-                    synced_to_dm=0,
-                    synced_to_ls=0,
-                    skipped=0,
-                    failed=0,
-                    conflicts_resolved=0,
-                    message="No tasks found in Label Studio project"
-                )
-            
-            # 批量处理任务
-            for i in range(0, len(all_tasks), batch_size):
-                batch_tasks = all_tasks[i:i + batch_size]
-                logger.info(f"Processing batch {i // batch_size + 1}, {len(batch_tasks)} tasks")
+            async for page_tasks in self.ls_client.iter_project_task_pages(
+                mapping.labeling_project_id,
+                page_size=settings.ls_task_page_size,
+                updated_after=ls_watermark
+            ):
+                total_tasks += len(page_tasks)
+                latest_updated_at = self._latest_updated_at(page_tasks, latest_updated_at)
                 
-                for task in batch_tasks:
-                    task_id = task.get("id")
-                    file_id = task.get("data", {}).get("file_id")
+                # 批量处理任务：并发获取整批任务的标注，一次查询文件记录，一次批量更新并提交
+                for i in range(0, len(page_tasks), batch_size):
+                    batch_tasks = page_tasks[i:i + batch_size]
+                    batch_index += 1
+                    logger.info(f"Processing batch {batch_index}, {len(batch_tasks)} tasks")
+                
+                    task_files: List[Tuple[int, str]] = []
+                    for task in batch_tasks:
+                        task_id = task.get("id")
+                        file_id = task.get("data", {}).get("file_id")
                     
-                    if not file_id:
-                        logger.warning(f"Task {task_id} has no file_id, skipping")
-                        skipped_count += 1
+                        if not file_id:
+                            logger.warning(f"Task {task_id} has no file_id, skipping")
+                            skipped_count += 1
+                            continue
+                        task_files.append((task_id, str(file_id)))
+                
+                    if not task_files:
                         continue
-                    
+                
                     # 获取任务的标注结果
-                    annotations = await self.ls_client.get_task_annotations(task_id)
-                    
-                    if not annotations:
-                        logger.debug(f"No annotations for task {task_id}, skipping")
-                        skipped_count += 1
-                        continue
+                    batch_annotations = await self._fetch_annotations_concurrently(
+                        [task_id for task_id, _ in task_files]
+                    )
+                
+                    ls_results: Dict[str, Tuple[List[Dict[str, Any]], str]] = {}
+                    for (task_id, file_id), annotations in zip(task_files, batch_annotations):
+                        if annotations is None:
+                            logger.warning(f"Failed to fetch annotations for task {task_id}")
+                            failed_count += 1
+                            continue
+                        if not annotations:
+                            logger.debug(f"No annotations for task {task_id}, skipping")
+                            skipped_count += 1
+                            continue
                     
-                    # 简化标注结果（取最新的标注）
-                    latest_annotation = max(annotations, key=lambda a: a.get("updated_at") or a.get("created_at", ""))
-                    simplified_annotations, ls_updated_at = self._simplify_annotation_result(latest_annotation)
+                        # 简化标注结果（取最新的标注）
+                        latest_annotation = max(annotations, key=lambda a: a.get("updated_at") or a.get("created_at", ""))
+                        simplified_annotations, ls_updated_at = self._simplify_annotation_result(latest_annotation)
                     
-                    if not simplified_annotations:
-                        logger.debug(f"Task {task_id} has no valid annotation results")
-                        skipped_count += 1
+                        if not simplified_annotations:
+                            logger.debug(f"Task {task_id} has no valid annotation results")
+                            skipped_count += 1
+                            continue
+                        ls_results[file_id] = (simplified_annotations, ls_updated_at)
+                
+                    if not ls_results:
                         continue
-                    
+                
                     # 更新数据库中的tags字段
                     try:
-                        # 检查文件是否存在以及是否已有标注
+                        # 一次查询整批文件是否存在以及是否已有标注
                         result = await self.dm_client.db.execute(
-                            select(DatasetFiles).where(
-                                DatasetFiles.id == file_id,
+                            select(DatasetFiles.id, DatasetFiles.tags, DatasetFiles.tags_updated_at).where(
+                                DatasetFiles.id.in_(list(ls_results)),
                                 DatasetFiles.dataset_id == mapping.dataset_id
                             )
                         )
-                        file_record = result.scalar_one_or_none()
-                        
-                        if not file_record:
-                            logger.warning(f"File {file_id} not found in dataset {mapping.dataset_id}")
-                            failed_count += 1
-                            continue
-                        
-                        # 检查是否应该覆盖DataMate的标注（使用文件级别的tags_updated_at）
-                        dm_tags_updated_at: Optional[str] = None
-                        if file_record.tags_updated_at:  # type: ignore
-                            dm_tags_updated_at = file_record.tags_updated_at.isoformat()  # type: ignore
-                        
-                        if not self._should_overwrite_dm(ls_updated_at, dm_tags_updated_at, overwrite):
-                            logger.debug(f"File {file_id}: DataMate has newer or equal annotations, skipping (overwrite={overwrite})")
-                            skipped_count += 1
-                            continue
-                        
-                        # 如果存在冲突（两边都有标注且时间戳不同），记录为冲突解决
-                        if file_record.tags and ls_updated_at:  # type: ignore
-                            conflicts_resolved += 1
-                            logger.debug(f"File {file_id}: Resolved conflict, Label Studio annotation is newer")
+                        file_records = {str(row.id): row for row in result}
+                    
+                        file_updates: List[Dict[str, Any]] = []
+                        batch_skipped = 0
+                        batch_failed = 0
+                        batch_conflicts = 0
+                        for file_id, (simplified_annotations, ls_updated_at) in ls_results.items():
+                            file_record = file_records.get(file_id)
+                            if not file_record:
+                                logger.warning(f"File {file_id} not found in dataset {mapping.dataset_id}")
+                                batch_failed += 1
+                                continue
                         
-                        # 更新tags字段和tags_updated_at
-                        from datetime import datetime
-                        tags_updated_datetime = datetime.fromisoformat(ls_updated_at.replace('Z', '+00:00'))
+                            # 检查是否应该覆盖DataMate的标注（使用文件级别的tags_updated_at）
+                            dm_tags_updated_at: Optional[str] = None
+                            if file_record.tags_updated_at:
+                                dm_tags_updated_at = file_record.tags_updated_at.isoformat()
                         
-                        await self.dm_client.db.execute(
-                            update(DatasetFiles)
-                            .where(DatasetFiles.id == file_id)
-                            .values(
-                                tags=simplified_annotations,
-                                tags_updated_at=tags_updated_datetime
-                            )
-                        )
-                        await self.dm_client.db.commit()
+                            if not self._should_overwrite_dm(ls_updated_at, dm_tags_updated_at, overwrite):
+                                logger.debug(f"File {file_id}: DataMate has newer or equal annotations, skipping (overwrite={overwrite})")
+                                batch_skipped += 1
+                                continue
                         
-                        synced_count += 1
-                        logger.debug(f"Synced annotations for file {file_id}: {len(simplified_annotations)} results")
+                            # 如果存在冲突（两边都有标注且时间戳不同），记录为冲突解决
+                            if file_record.tags and ls_updated_at:
+                                batch_conflicts += 1
+                                logger.debug(f"File {file_id}: Resolved conflict, Label Studio annotation is newer")
                         
+                            file_updates.append({
+                                "id": file_id,
+                                "tags": simplified_annotations,
+                                "tags_updated_at": datetime.fromisoformat(ls_updated_at.replace('Z', '+00:00'))
+                            })
+                    
+                        if file_updates:
+                            # 按主键批量更新tags字段和tags_updated_at，整批一次提交
+                            await self.dm_client.db.execute(update(DatasetFiles), file_updates)
+                            await self.dm_client.db.commit()
+                            logger.debug(f"Synced annotations for {len(file_updates)} files in batch {batch_index}")
+                    
+                        synced_count += len(file_updates)
+                        skipped_count += batch_skipped
+                        failed_count += batch_failed
+                        conflicts_resolved += batch_conflicts
+                    
                     except Exception as e:
-                        logger.error(f"Failed to update annotations for file {file_id}: {e}")
-                        failed_count += 1
+                        logger.error(f"Failed to update annotations for batch {batch_index}: {e}")
+                        failed_count += len(ls_results)
                         await self.dm_client.db.rollback()
             
+            logger.info(f"Found {total_tasks} tasks in Label Studio project (updated_after={ls_watermark})")
+            
+            if total_tasks == 0:
+                message = "No changed tasks since last sync" if ls_watermark else "No tasks found in Label Studio project"
+                logger.info(f"{message}: project {mapping.labeling_project_id}")
+                return SyncAnnotationsResponse(
+                    id=mapping.id,
+                    status="success",
+                    synced_to_dm=0,
+                    synced_to_ls=0,
+                    skipped=0,
+                    failed=0,
+                    conflicts_resolved=0,
+                    message=message
+                )
+            
+            if failed_count == 0:
+                await self.mapping_service.update_sync_watermarks(mapping.id, {
+                    self.WATERMARK_LS_TO_DM: latest_updated_at or ""
+                })
+            
             logger.info(f"Annotation sync completed: synced={synced_count}, skipped={skipped_count}, failed={failed_count}, conflicts_resolved={conflicts_resolved}")
             
             status = "success" if failed_count == 0 else ("partial" if synced_count > 0 else "error")
@@ -689,6 +847,24 @@ class SyncService:
                 message=f"Synced {synced_count} annotations from Label Studio to dataset. Skipped: {skipped_count}, Failed: {failed_count}, Conflicts resolved: {conflicts_resolved}"
             )
             
+        except httpx.HTTPError as e:
+            token_display = settings.label_studio_user_token[:10] + "..." if settings.label_studio_user_token else "None"
+            error_msg = f"Failed to fetch tasks from Label Studio project {mapping.labeling_project_id}: {e}. Please check:\n" \
+                       f"1. Label Studio is running at {settings.label_studio_base_url}\n" \
+                       f"2. Project ID {mapping.labeling_project_id} exists\n" \
+                       f"3. API token is valid: {token_display}"
+            logger.error(error_msg)
+            return SyncAnnotationsResponse(
+                id=mapping.id,
+                status="error",
+                synced_to_dm=synced_count,
+                synced_to_ls=0,
+                skipped=skipped_count,
+                failed=failed_count,
+                conflicts_resolved=conflicts_resolved,
+                message=f"Failed to connect to Label Studio at {settings.label_studio_base_url}"
+            )
+            
         except Exception as e:
             logger.error(f"Error while syncing annotations from LS to DM: {e}")
             return SyncAnnotationsResponse(
@@ -706,15 +882,21 @@ class SyncService:
         self,
         mapping: DatasetMappingResponse,
         batch_size: int = 50,
-        overwrite_ls: bool = True
+        overwrite_ls: bool = True,
+        full_sync: bool = False
     ) -> SyncAnnotationsResponse:
         """
         从DataMate数据集同步标注到Label Studio
         
+        增量同步时只处理上次同步后tags_updated_at变化的文件，并只查询这些文件对应的Label Studio任务，
+        没有变化时不再拉取Label Studio任务；
+        存在失败时不推进水位线，下次同步重试。
+        
         Args:
             mapping: 数据集映射信息
             batch_size: 批处理大小
             overwrite_ls: 是否允许覆盖Label Studio中的标注（基于时间戳比较）
+            full_sync: 是否忽略增量水位线执行全量同步
             
         Returns:
             同步结果响应
@@ -727,23 +909,53 @@ class SyncService:
         conflicts_resolved = 0
         
         try:
-            # 获取Label Studio中的文件ID到任务ID的映射
-            dm_file_to_task_mapping = await self.get_existing_dm_file_mapping(mapping.labeling_project_id)
+            watermarks = await self._get_watermarks(mapping.id, full_sync)
+            dm_watermark = watermarks.get(self.WATERMARK_DM_TO_LS)
+            tags_updated_since = datetime.fromisoformat(dm_watermark) if dm_watermark else None
+            sync_started_at = await self._dm_now()
             
-            if not dm_file_to_task_mapping:
-                logger.warning(f"No task mapping found for project {mapping.labeling_project_id}")
-                return SyncAnnotationsResponse(
-                    id=mapping.id,
-                    status="error",
-                    synced_to_dm=0,
-                    synced_to_ls=0,
-                    skipped=0,
-                    failed=0,
-                    conflicts_resolved=0,
-                    message="No tasks found in Label Studio project"
+            if tags_updated_since:
+                changed_files = await self.dm_client.get_dataset_files(
+                    mapping.dataset_id,
+                    page=0,
+                    size=1,
+                    tags_updated_since=tags_updated_since,
                 )
+                if changed_files is not None and changed_files.totalElements == 0:
+                    logger.info(f"No annotation changes in dataset {mapping.dataset_id} since {dm_watermark}")
+                    await self.mapping_service.update_sync_watermarks(mapping.id, {
+                        self.WATERMARK_DM_TO_LS: sync_started_at.isoformat()
+                    })
+                    return SyncAnnotationsResponse(
+                        id=mapping.id,
+                        status="success",
+                        synced_to_dm=0,
+                        synced_to_ls=0,
+                        skipped=0,
+                        failed=0,
+                        conflicts_resolved=0,
+                        message="No changed annotations since last sync"
+                    )
             
-            logger.info(f"Found {len(dm_file_to_task_mapping)} task mappings")
+            # 全量同步时获取项目全部的文件ID到任务ID的映射；增量同步时逐页只查询变化文件对应的任务
+            dm_file_to_task_mapping: Dict[str, int] = {}
+            if not tags_updated_since:
+                dm_file_to_task_mapping = await self.get_existing_dm_file_mapping(mapping.labeling_project_id)
+                
+                if not dm_file_to_task_mapping:
+                    logger.warning(f"No task mapping found for project {mapping.labeling_project_id}")
+                    return SyncAnnotationsResponse(
+                        id=mapping.id,
+                        status="error",
+                        synced_to_dm=0,
+                        synced_to_ls=0,
+                        skipped=0,
+                        failed=0,
+                        conflicts_resolved=0,
+                        message="No tasks found in Label Studio project"
+                    )
+                
+                logger.info(f"Found {len(dm_file_to_task_mapping)} task mappings")
             
             # 分页获取DataMate中的文件
             page = 0
@@ -754,6 +966,7 @@ class SyncService:
                     mapping.dataset_id,
                     page=page,
                     size=batch_size,
+                    tags_updated_since=tags_updated_since,
                 )
                 
                 if not files_response or not files_response.content:
@@ -762,7 +975,21 @@ class SyncService:
                 
                 logger.info(f"Processing page {page + 1}, {len(files_response.content)} files")
                 
-                for file_info in files_response.content:
+                page_files = files_response.content
+                if tags_updated_since:
+                    try:
+                        dm_file_to_task_mapping = await self.get_dm_file_mapping_for_files(
+                            mapping.labeling_project_id,
+                            [str(file_info.id) for file_info in page_files]
+                        )
+                    except Exception as e:
+                        # 查询失败的文件计为失败，不推进水位线，下次同步重试
+                        logger.error(f"Failed to fetch tasks of changed files on page {page + 1}: {e}")
+                        failed_count += len(page_files)
+                        processed_count += len(page_files)
+                        page_files = []
+                
+                for file_info in page_files:
                     file_id = str(file_info.id)
                     processed_count += 1
                     
@@ -789,6 +1016,11 @@ class SyncService:
                     try:
                         # 获取Label Studio中该任务的现有标注
                         ls_annotations = await self.ls_client.get_task_annotations(task_id)
+                        if ls_annotations is None:
+                            # 获取失败时不能视为没有标注，否则会重复创建
+                            logger.error(f"Failed to fetch annotations for task {task_id}")
+                            failed_count += 1
+                            continue
                         
                         # 获取Label Studio标注的更新时间
                         ls_updated_at = ""
@@ -862,6 +1094,11 @@ class SyncService:
                     break
                 page += 1
             
+            if failed_count == 0:
+                await self.mapping_service.update_sync_watermarks(mapping.id, {
+                    self.WATERMARK_DM_TO_LS: sync_started_at.isoformat()
+                })
+            
             logger.info(f"Annotation sync completed: synced={synced_count}, skipped={skipped_count}, failed={failed_count}, conflicts_resolved={conflicts_resolved}")
             
             status = "success" if failed_count == 0 else ("partial" if synced_count > 0 else "error")
@@ -895,7 +1132,8 @@ class SyncService:
         mapping: DatasetMappingResponse,
         batch_size: int = 50,
         overwrite: bool = True,
-        overwrite_ls: bool = True
+        overwrite_ls: bool = True,
+        full_sync: bool = False
     ) -> SyncAnnotationsResponse:
         """
         双向同步标注结果
@@ -905,6 +1143,7 @@ class SyncService:
             batch_size: 批处理大小
             overwrite: 是否允许覆盖DataMate中的标注
             overwrite_ls: 是否允许覆盖Label Studio中的标注
+            full_sync: 是否忽略增量水位线执行全量同步
             
         Returns:
             同步结果响应
@@ -916,14 +1155,16 @@ class SyncService:
             ls_to_dm_result = await self.sync_annotations_from_ls_to_dm(
                 mapping,
                 batch_size,
-                overwrite
+                overwrite,
+                full_sync
             )
             
             # 再从DataMate同步到Label Studio
             dm_to_ls_result = await self.sync_annotations_from_dm_to_ls(
                 mapping,
                 batch_size,
-                overwrite_ls
+                overwrite_ls,
+                full_sync
             )
             
             # 合并结果
@@ -979,8 +1220,8 @@ class SyncService:
         # 获取DM数据集信息
         dataset_info = await self.dm_client.get_dataset(dataset_id)
         
-        # 获取Label Studio项目任务数量
-        tasks_info = await self.ls_client.get_project_tasks(mapping.labeling_project_id)
+        # 获取Label Studio项目任务数量，只需请求一条任务即可得到总数
+        tasks_info = await self.ls_client.get_project_tasks(mapping.labeling_project_id, page=1, page_size=1)
         
         return {
             "id": mapping.id,
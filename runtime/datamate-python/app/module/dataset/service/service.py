@@ -68,29 +68,32 @@ class Service:
         page: int = 0,
         size: int = 100,
         file_type: Optional[str] = None,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        created_since: Optional[datetime] = None,
+        tags_updated_since: Optional[datetime] = None
     ) -> Optional[PagedDatasetFileResponse]:
-        """获取数据集文件列表"""
+        """获取数据集文件列表
+
+        created_since / tags_updated_since 用于增量同步，只返回在该时间点及之后创建 / 更新过标签的文件
+        """
         try:
             logger.debug(f"Get dataset files: dataset={dataset_id}, page={page}, size={size}")
 
-            # 构建查询
-            query = select(DatasetFiles).where(DatasetFiles.dataset_id == dataset_id)
-
-            # 添加可选过滤条件
+            # 构建过滤条件
+            conditions = [DatasetFiles.dataset_id == dataset_id]
             if file_type:
-                query = query.where(DatasetFiles.file_type == file_type)
+                conditions.append(DatasetFiles.file_type == file_type)
             if status:
-                query = query.where(DatasetFiles.status == status)
+                conditions.append(DatasetFiles.status == status)
+            if created_since:
+                conditions.append(DatasetFiles.created_at >= created_since)
+            if tags_updated_since:
+                conditions.append(DatasetFiles.tags_updated_at >= tags_updated_since)
+
+            query = select(DatasetFiles).where(*conditions)
 
             # 获取总数
-            count_query = select(func.count()).select_from(DatasetFiles).where(
-                DatasetFiles.dataset_id == dataset_id
-            )
-            if file_type:
-                count_query = count_query.where(DatasetFiles.file_type == file_type)
-            if status:
-                count_query = count_query.where(DatasetFiles.status == status)
+            count_query = select(func.count()).select_from(DatasetFiles).where(*conditions)
 
             count_result = await self.db.execute(count_query)
             total = count_result.scalar_one()
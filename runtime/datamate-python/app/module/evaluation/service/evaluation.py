@@ -69,9 +69,8 @@ class EvaluationExecutor:
             max_try = 3
             while max_try > 0:
                 prompt_text = self.get_eval_prompt(item)
-                resp_text = await asyncio.to_thread(
-                    call_openai_style_model, model_config.base_url, model_config.api_key, model_config.model_name,
-                    prompt_text,
+                resp_text = await call_openai_style_model(
+                    model_config.base_url, model_config.api_key, model_config.model_name, prompt_text,
                 )
                 resp_text = extract_json_substring(resp_text)
                 try:
@@ -4,8 +4,7 @@ import random
 import re
 import uuid
 
-from langchain_core.language_models import BaseChatModel
-from sqlalchemy import select
+from sqlalchemy import case, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.data_synthesis import (
@@ -14,8 +13,10 @@ from app.db.models.data_synthesis import (
     DataSynthesisChunkInstance,
     SynthesisData,
 )
+from app.core.config import settings
 from app.db.models.dataset_management import DatasetFiles
-from app.db.session import logger
+from app.db.models.model_config import ModelConfig
+from app.db.session import AsyncSessionLocal, logger
 from app.module.generation.schema.generation import Config, SyntheConfig
 from app.module.generation.service.prompt import (
     QUESTION_GENERATOR_PROMPT,
@@ -23,8 +24,8 @@ from app.module.generation.service.prompt import (
 )
 from app.module.shared.common.document_loaders import load_documents
 from app.module.shared.common.text_split import DocumentSplitter
-from app.module.shared.util.model_chat import extract_json_substring
-from app.module.system.service.common_service import chat, get_model_by_id, get_chat_client
+from app.module.shared.util.model_chat import call_openai_style_model, extract_json_substring
+from app.module.system.service.common_service import get_model_by_id
 
 
 def _filter_docs(split_docs, chunk_size):
@@ -45,15 +46,55 @@ def extract_img_urls(doc):
     img_urls = re.findall(pattern, doc)
     return img_urls
 
+class _FileProgress:
+    """单个源文件投入共享队列后尚未处理完的 chunk 计数，全部完成后唤醒等待的文件协程。"""
+
+    def __init__(self, file_task: DataSynthesisFileInstance):
+        self.file_task = file_task
+        self.pending = 0
+        self.sealed = False
+        self.done = asyncio.Event()
+
+    def add(self) -> None:
+        self.pending += 1
+
+    def finish_one(self) -> None:
+        self.pending -= 1
+        self._check_done()
+
+    def seal(self) -> None:
+        """标记该文件的 chunk 已全部入队。"""
+        self.sealed = True
+        self._check_done()
+
+    def _check_done(self) -> None:
+        if self.sealed and self.pending <= 0:
+            self.done.set()
+
+
 class GenerationService:
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        question_semaphore: asyncio.Semaphore | None = None,
+        answer_semaphore: asyncio.Semaphore | None = None,
+    ):
         self.db = db
-        # 全局并发信号量：保证任意时刻最多 10 次模型调用
-        self.question_semaphore = asyncio.Semaphore(20)
-        self.answer_semaphore = asyncio.Semaphore(100)
+        # 全局并发信号量：限制同时进行的问题/答案模型调用数，同一任务的所有工作协程共享
+        self.question_semaphore = question_semaphore or asyncio.Semaphore(20)
+        self.answer_semaphore = answer_semaphore or asyncio.Semaphore(100)
+
+    def _with_session(self, db: AsyncSession) -> "GenerationService":
+        """返回绑定独立会话、共享信号量的服务实例（AsyncSession 不能在并发协程间共用）。"""
+        return GenerationService(db, self.question_semaphore, self.answer_semaphore)
 
     async def process_task(self, task_id: str):
-        """处理数据合成任务入口：根据任务ID加载任务并逐个处理源文件。"""
+        """处理数据合成任务入口。
+
+        多个源文件并发切片（synthesis_file_concurrency），各文件的 chunk 投入同一个有界队列，
+        由 synthesis_chunk_concurrency 个工作协程生成 QA，模型调用仍受问题/答案信号量限制。
+        每个文件协程和 chunk 协程使用各自的数据库会话。
+        """
         synth_task: DataSynthInstance | None = await self.db.get(DataSynthInstance, task_id)
         if not synth_task:
             logger.error(f"Synthesis task {task_id} not found, abort processing")
@@ -61,12 +102,14 @@ class GenerationService:
 
         logger.info(f"Start processing synthe task {task_id}")
 
-        # 从 synth_config 中读取 max_qa_pairs，全局控制 QA 总量上限；<=0 或异常则视为不限制
         try:
-            cfg = Config(**(synth_task.synth_config or {}))
-            max_qa_pairs = cfg.max_qa_pairs if (cfg and cfg.max_qa_pairs and cfg.max_qa_pairs > 0) else None
-        except Exception:
-            max_qa_pairs = None
+            config: Config | None = Config(**(synth_task.synth_config or {}))
+        except Exception as e:
+            logger.error(f"Invalid synth_config for task={task_id}: {e}")
+            config = None
+
+        # 从 synth_config 中读取 max_qa_pairs，全局控制 QA 总量上限；<=0 或异常则视为不限制
+        max_qa_pairs = config.max_qa_pairs if (config and config.max_qa_pairs and config.max_qa_pairs > 0) else None
 
         # 获取任务关联的文件原始ID列表
         file_ids = await self._get_file_ids_for_task(task_id)
@@ -74,107 +117,200 @@ class GenerationService:
             logger.warning(f"No files associated with task {task_id}, abort processing")
             return
 
-        # 逐个文件处理
-        for file_id in file_ids:
+        question_cfg: SyntheConfig | None = config.question_synth_config if config else None
+        answer_cfg: SyntheConfig | None = config.answer_synth_config if config else None
+        if not question_cfg or not answer_cfg:
+            reason = "invalid_synth_config" if config is None else "qa_config_missing"
+            logger.error(f"Question/Answer synth config missing for task={task_id}")
+            for file_id in file_ids:
+                await self._mark_file_failed(task_id, file_id, reason)
+            return
+
+        # 模型配置按任务读取一次，所有文件共享
+        question_model = await get_model_by_id(self.db, question_cfg.model_id)
+        answer_model = await get_model_by_id(self.db, answer_cfg.model_id)
+        if not question_model or not answer_model:
+            logger.error(f"Question/Answer model not found for task={task_id}")
+            for file_id in file_ids:
+                await self._mark_file_failed(task_id, file_id, "model_not_found")
+            return
+        # 后续数据库操作均在工作协程各自的会话中进行，释放任务会话占用的连接
+        await self.db.close()
+
+        # 队列有界：chunk 处理不过来时文件协程等待，避免切片结果大量堆积
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.synthesis_chunk_concurrency * 2)
+        chunk_workers = [
+            asyncio.create_task(
+                self._chunk_worker(
+                    chunk_queue=chunk_queue,
+                    synth_task_id=task_id,
+                    question_cfg=question_cfg,
+                    answer_cfg=answer_cfg,
+                    question_model=question_model,
+                    answer_model=answer_model,
+                    max_qa_pairs=max_qa_pairs,
+                )
+            )
+            for _ in range(max(settings.synthesis_chunk_concurrency, 1))
+        ]
+
+        # 文件协程共享同一个迭代器，依次领取待处理的文件
+        pending_files = iter(file_ids)
+
+        async def file_worker():
+            for file_id in pending_files:
+                await self._run_file(
+                    synth_task_id=task_id,
+                    file_id=file_id,
+                    config=config,
+                    chunk_queue=chunk_queue,
+                )
+
+        file_concurrency = max(min(settings.synthesis_file_concurrency, len(file_ids)), 1)
+        file_workers = [asyncio.create_task(file_worker()) for _ in range(file_concurrency)]
+        try:
+            await asyncio.gather(*file_workers)
+        finally:
+            # 任一文件协程异常退出时先取消其余文件协程，否则 chunk 协程退出后它们会阻塞在已满的队列上
+            for task in file_workers:
+                task.cancel()
+            await asyncio.gather(*file_workers, return_exceptions=True)
+            for _ in chunk_workers:
+                await chunk_queue.put(None)
+            await asyncio.gather(*chunk_workers, return_exceptions=True)
+
+        logger.info(f"Finished processing synthesis task {task_id}")
+
+    async def _run_file(
+        self,
+        synth_task_id: str,
+        file_id: str,
+        config: Config,
+        chunk_queue: asyncio.Queue,
+    ) -> None:
+        """在独立会话中处理单个源文件，成功后累加任务的 processed_files。"""
+        async with AsyncSessionLocal() as db:
+            worker = self._with_session(db)
             try:
-                success = await self._process_single_file(synth_task, file_id, max_qa_pairs=max_qa_pairs)
+                success = await worker._process_single_file(synth_task_id, file_id, config, chunk_queue)
             except Exception as e:
-                logger.exception(f"Unexpected error when processing file {file_id} for task {task_id}: {e}")
+                logger.exception(f"Unexpected error when processing file {file_id} for task {synth_task_id}: {e}")
+                await db.rollback()
                 # 确保对应文件任务状态标记为失败
-                await self._mark_file_failed(str(synth_task.id), file_id, str(e))
+                await worker._mark_file_failed(synth_task_id, file_id, str(e))
                 success = False
 
             if success:
-                # 每处理完一个文件，简单增加 processed_files 计数
-                synth_task.processed_files = (synth_task.processed_files or 0) + 1
-                await self.db.commit()
-                await self.db.refresh(synth_task)
+                # 多个文件并发完成，使用原子自增避免互相覆盖计数
+                await db.execute(
+                    update(DataSynthInstance)
+                    .where(DataSynthInstance.id == synth_task_id)
+                    .values(processed_files=func.coalesce(DataSynthInstance.processed_files, 0) + 1)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
 
-        logger.info(f"Finished processing synthesis task {synth_task.id}")
+    async def _chunk_worker(
+        self,
+        chunk_queue: asyncio.Queue,
+        synth_task_id: str,
+        question_cfg: SyntheConfig,
+        answer_cfg: SyntheConfig,
+        question_model: ModelConfig,
+        answer_model: ModelConfig,
+        max_qa_pairs: int | None = None,
+    ) -> None:
+        """从共享队列中取出各文件的 chunk 并生成 QA，取到 None 时退出。"""
+        async with AsyncSessionLocal() as db:
+            worker = self._with_session(db)
+            while True:
+                item = await chunk_queue.get()
+                if item is None:
+                    return
+                progress, chunk = item
+                try:
+                    await worker._process_single_chunk_qa(
+                        file_task=progress.file_task,
+                        chunk=chunk,
+                        question_cfg=question_cfg,
+                        answer_cfg=answer_cfg,
+                        question_model=question_model,
+                        answer_model=answer_model,
+                        synth_task_id=synth_task_id,
+                        max_qa_pairs=max_qa_pairs,
+                    )
+                except Exception as e:
+                    logger.exception(
+                        f"Unexpected error when processing chunk_index={chunk.chunk_index} "
+                        f"in file_task={progress.file_task.id}: {e}"
+                    )
+                    await db.rollback()
+                finally:
+                    progress.finish_one()
 
     # ==================== 高层文件处理流程 ====================
     async def _process_single_file(
         self,
-        synth_task: DataSynthInstance,
+        synth_task_id: str,
         file_id: str,
-        max_qa_pairs: int | None = None,
+        config: Config,
+        chunk_queue: asyncio.Queue,
     ) -> bool:
-        """按 chunk 批量流式处理单个源文件。
+        """切片单个源文件并将其 chunk 投入共享队列，等待全部处理完成。
 
         流程：
         1. 切片并将所有 chunk 持久化到 DB 后释放内存；
-        2. 从 DB 按 chunk_index 升序批量读取 chunk；
-        3. 对批次中的每个 chunk：先生成指定数量的问题，再基于这些问题生成答案；
-        4. 每成功处理完一个 chunk（即该 chunk 至少生成一条 QA）就更新一次 processed_chunks；
-        5. 全部完成后将文件实例标记为 completed。
+        2. 从 DB 按 chunk_index 升序批量读取 chunk，逐个投入共享队列（队列满时等待）；
+        3. chunk 工作协程对每个 chunk 先生成指定数量的问题，再基于这些问题生成答案，
+           每处理完一个 chunk 就更新一次 processed_chunks；
+        4. 本文件的 chunk 全部完成后将文件实例标记为 completed。
         """
-        # 解析文件路径与配置
+        # 解析文件路径
         file_path = await self._resolve_file_path(file_id)
         if not file_path:
             logger.warning(f"File path not found for file_id={file_id}, skip")
-            await self._mark_file_failed(str(synth_task.id), file_id, "file_path_not_found")
+            await self._mark_file_failed(synth_task_id, file_id, "file_path_not_found")
             return False
 
         logger.info(f"Processing file_id={file_id}, path={file_path}")
 
-        try:
-            config = Config(**(synth_task.synth_config or {}))
-        except Exception as e:
-            logger.error(f"Invalid synth_config for task={synth_task.id}: {e}")
-            await self._mark_file_failed(str(synth_task.id), file_id, "invalid_synth_config")
-            return False
-
-        # 1. 加载并切片（仅在此处占用内存）
-        chunks = self._load_and_split(
+        # 1. 加载并切片（仅在此处占用内存）；文档解析是阻塞操作，放到线程中执行以免阻塞其它文件和模型调用
+        chunks = await asyncio.to_thread(
+            self._load_and_split,
             file_path,
             config.text_split_config.chunk_size,
             config.text_split_config.chunk_overlap,
         )
         if not chunks:
             logger.warning(f"No chunks generated for file_id={file_id}")
-            await self._mark_file_failed(str(synth_task.id), file_id, "no_chunks_generated")
+            await self._mark_file_failed(synth_task_id, file_id, "no_chunks_generated")
             return False
 
         logger.info(f"File {file_id} split into {len(chunks)} chunks by LangChain")
 
         # 2. 获取文件实例并持久化 chunk 记录
         file_task = await self._get_or_create_file_instance(
-            synthesis_task_id=str(synth_task.id),
+            synthesis_task_id=synth_task_id,
             source_file_id=file_id,
         )
         if not file_task:
             logger.error(
-                f"DataSynthesisFileInstance not found for task={synth_task.id}, file_id={file_id}"
+                f"DataSynthesisFileInstance not found for task={synth_task_id}, file_id={file_id}"
             )
-            await self._mark_file_failed(str(synth_task.id), file_id, "file_instance_not_found")
+            await self._mark_file_failed(synth_task_id, file_id, "file_instance_not_found")
             return False
 
-        await self._persist_chunks(synth_task, file_task, file_id, chunks)
+        await self._persist_chunks(synth_task_id, file_task, file_id, chunks)
         total_chunks = len(chunks)
         # 释放内存中的切片
         del chunks
 
-        # 3. 读取问答配置
-        question_cfg: SyntheConfig | None = config.question_synth_config
-        answer_cfg: SyntheConfig | None = config.answer_synth_config
-        if not question_cfg or not answer_cfg:
-            logger.error(
-                f"Question/Answer synth config missing for task={synth_task.id}, file={file_id}"
-            )
-            await self._mark_file_failed(str(synth_task.id), file_id, "qa_config_missing")
-            return False
-
         logger.info(
-            f"Start QA generation for task={synth_task.id}, file={file_id}, total_chunks={total_chunks}"
+            f"Start QA generation for task={synth_task_id}, file={file_id}, total_chunks={total_chunks}"
         )
 
-        # 为本文件构建模型 client
-        question_model = await get_model_by_id(self.db, question_cfg.model_id)
-        answer_model = await get_model_by_id(self.db, answer_cfg.model_id)
-        question_chat = get_chat_client(question_model)
-        answer_chat = get_chat_client(answer_model)
-
-        # 分批次从 DB 读取并处理 chunk
+        # 分批次从 DB 读取 chunk 并投入共享队列
+        progress = _FileProgress(file_task)
         batch_size = 100
         current_index = 1
 
@@ -185,6 +321,8 @@ class GenerationService:
                 start_index=current_index,
                 end_index=end_index,
             )
+            # 结束读事务，入队等待期间不占用数据库连接
+            await self.db.commit()
             if not chunk_batch:
                 logger.warning(
                     f"Empty chunk batch loaded for file={file_id}, range=[{current_index}, {end_index}]"
@@ -192,24 +330,15 @@ class GenerationService:
                 current_index = end_index + 1
                 continue
 
-            # 对本批中的每个 chunk 并发处理（内部受 semaphore 限流）
-            async def process_one(chunk: DataSynthesisChunkInstance) -> bool:
-                return await self._process_single_chunk_qa(
-                    file_task=file_task,
-                    chunk=chunk,
-                    question_cfg=question_cfg,
-                    answer_cfg=answer_cfg,
-                    question_chat=question_chat,
-                    answer_chat=answer_chat,
-                    synth_task_id=str(synth_task.id),
-                    max_qa_pairs=max_qa_pairs,
-                )
-
-            tasks = [process_one(chunk) for chunk in chunk_batch]
-            await asyncio.gather(*tasks, return_exceptions=True)
+            for chunk in chunk_batch:
+                progress.add()
+                await chunk_queue.put((progress, chunk))
 
             current_index = end_index + 1
 
+        progress.seal()
+        await progress.done.wait()
+
         # 全部完成
         file_task.status = "completed"
         await self.db.commit()
@@ -222,8 +351,8 @@ class GenerationService:
         chunk: DataSynthesisChunkInstance,
         question_cfg: SyntheConfig,
         answer_cfg: SyntheConfig,
-        question_chat: BaseChatModel,
-        answer_chat: BaseChatModel,
+        question_model: ModelConfig,
+        answer_model: ModelConfig,
         synth_task_id: str,
         max_qa_pairs: int | None = None,
     ) -> bool:
@@ -246,8 +375,6 @@ class GenerationService:
 
         # 如果没有全局上限配置，维持原有行为
         if max_qa_pairs is not None and max_qa_pairs > 0:
-            from sqlalchemy import func
-
             # 统计当前整个任务下已生成的 QA 总数
             result = await self.db.execute(
                 select(func.count(SynthesisData.id)).where(
@@ -268,14 +395,26 @@ class GenerationService:
                     synth_task_id,
                     file_task.id,
                 )
-                # 将文件任务标记为已完成，并认为所有 chunk 均已处理
-                file_task.status = "completed"
-                if file_task.total_chunks is not None:
-                    file_task.processed_chunks = file_task.total_chunks
+                # 将文件任务标记为已完成，并认为所有 chunk 均已处理；
+                # file_task 属于文件协程的会话，这里直接执行 UPDATE，不修改其 ORM 对象
+                await self.db.execute(
+                    update(DataSynthesisFileInstance)
+                    .where(DataSynthesisFileInstance.id == file_task.id)
+                    .values(
+                        status="completed",
+                        processed_chunks=func.coalesce(
+                            DataSynthesisFileInstance.total_chunks,
+                            DataSynthesisFileInstance.processed_chunks,
+                        ),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
                 await self.db.commit()
-                await self.db.refresh(file_task)
                 return False
 
+            # 结束只读事务，调用模型期间不占用数据库连接
+            await self.db.commit()
+
         # ---- 下面保持原有逻辑不变 ----
         chunk_index = chunk.chunk_index
         chunk_text = chunk.chunk_content or ""
@@ -299,7 +438,7 @@ class GenerationService:
             questions = await self._generate_questions_for_one_chunk(
                 chunk_text=chunk_text,
                 question_cfg=question_cfg,
-                question_chat=question_chat,
+                question_model=question_model,
             )
         except Exception as e:
             logger.error(
@@ -318,7 +457,7 @@ class GenerationService:
                 chunk=chunk,
                 questions=questions,
                 answer_cfg=answer_cfg,
-                answer_chat=answer_chat,
+                answer_model=answer_model,
             )
             success_any = bool(qa_success)
 
@@ -336,9 +475,9 @@ class GenerationService:
         self,
         chunk_text: str,
         question_cfg: SyntheConfig,
-        question_chat: BaseChatModel,
+        question_model: ModelConfig,
     ) -> list[str]:
-        """针对单个 chunk 文本，调用 question_chat 生成问题列表。"""
+        """针对单个 chunk 文本，调用问题生成模型得到问题列表。"""
         number = question_cfg.number or 5
         number = number if number is not None else 5
         number = max(int(len(chunk_text) / 1000 * number), 1)
@@ -353,11 +492,10 @@ class GenerationService:
         )
 
         async with self.question_semaphore:
-            loop = asyncio.get_running_loop()
-            raw_answer = await loop.run_in_executor(
-                None,
-                chat,
-                question_chat,
+            raw_answer = await call_openai_style_model(
+                question_model.base_url,
+                question_model.api_key,
+                question_model.model_name,
                 prompt,
             )
 
@@ -373,7 +511,7 @@ class GenerationService:
         chunk: DataSynthesisChunkInstance,
         questions: list[str],
         answer_cfg: SyntheConfig,
-        answer_chat: BaseChatModel,
+        answer_model: ModelConfig,
     ) -> bool:
         """为一个 chunk 的所有问题生成答案并写入 SynthesisData。
 
@@ -397,11 +535,10 @@ class GenerationService:
                 prompt_local = prompt
 
             async with self.answer_semaphore:
-                loop = asyncio.get_running_loop()
-                answer = await loop.run_in_executor(
-                    None,
-                    chat,
-                    answer_chat,
+                answer = await call_openai_style_model(
+                    answer_model.base_url,
+                    answer_model.api_key,
+                    answer_model.model_name,
                     prompt_local,
                 )
 
@@ -505,7 +642,7 @@ class GenerationService:
 
     async def _persist_chunks(
         self,
-        synthesis_task: DataSynthInstance,
+        synthesis_task_id: str,
         file_task: DataSynthesisFileInstance,
         file_id: str,
         chunks,
@@ -516,7 +653,7 @@ class GenerationService:
             base_metadata = dict(getattr(doc, "metadata", {}) or {})
             base_metadata.update(
                 {
-                    "task_id": str(synthesis_task.id),
+                    "task_id": synthesis_task_id,
                     "file_id": file_id
                 }
             )
@@ -631,24 +768,22 @@ class GenerationService:
         return list(result.scalars().all())
 
     async def _increment_processed_chunks(self, file_task_id: str, delta: int) -> None:
+        """原子累加文件任务的 processed_chunks，存在 total_chunks 时不超过该值。
+
+        同一文件的 chunk 由多个工作协程在各自会话中并发处理，读-改-写会丢失计数，因此使用单条 UPDATE。
+        """
+        new_value = func.coalesce(DataSynthesisFileInstance.processed_chunks, 0) + int(delta)
         result = await self.db.execute(
-            select(DataSynthesisFileInstance).where(
-                DataSynthesisFileInstance.id == file_task_id,
+            update(DataSynthesisFileInstance)
+            .where(DataSynthesisFileInstance.id == file_task_id)
+            .values(
+                processed_chunks=case(
+                    (DataSynthesisFileInstance.total_chunks.is_(None), new_value),
+                    else_=func.least(new_value, DataSynthesisFileInstance.total_chunks),
+                )
             )
+            .execution_options(synchronize_session=False)
         )
-        file_task = result.scalar_one_or_none()
-        if not file_task:
-            logger.error(f"Failed to increment processed_chunks: file_task {file_task_id} not found")
-            return
-
-        # 原始自增
-        new_value = (file_task.processed_chunks or 0) + int(delta)
-
-        # 如果存在 total_chunks，上限为 total_chunks，避免超过
-        total = file_task.total_chunks
-        if isinstance(total, int) and total >= 0:
-            new_value = min(new_value, total)
-
-        file_task.processed_chunks = new_value
         await self.db.commit()
-        await self.db.refresh(file_task)
+        if not result.rowcount:
+            logger.error(f"Failed to increment processed_chunks: file_task {file_task_id} not found")
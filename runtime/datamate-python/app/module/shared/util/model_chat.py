@@ -1,18 +1,147 @@
-from openai import OpenAI
+import asyncio
+import random
+import time
 
+import httpx
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, DefaultAsyncHttpxClient
 
-def call_openai_style_model(base_url, api_key, model_name, prompt, **kwargs):
-    client = OpenAI(
-        base_url=base_url,
-        api_key=api_key
-    )
+from app.core.config import settings
+from app.core.logging import get_logger
 
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[{"role": "user", "content": prompt}],
-        **kwargs
-    )
-    return response.choices[0].message.content
+logger = get_logger(__name__)
+
+# 按 (base_url, api_key) 复用的异步客户端，同一服务的请求共享连接池，避免每次调用重新建连和 TLS 握手
+_async_clients: dict[tuple[str, str], AsyncOpenAI] = {}
+# 按 (base_url, model_name) 共享的限流器
+_rate_limiters: dict[tuple[str, str], "_RateLimiter"] = {}
+
+# 可重试的 HTTP 状态码：请求超时、冲突、限流，以及 5xx
+_RETRYABLE_STATUS = {408, 409, 429}
+
+
+class _RateLimiter:
+    """每分钟请求数（rpm）和 token 数（tpm）的令牌桶，0 表示不限制；等待者按先后顺序获得配额。"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int) -> None:
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.rpm and self._requests < 1:
+                    wait = (1 - self._requests) * 60 / self.rpm
+                if self.tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+                if wait <= 0:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep(wait)
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """调用完成后按实际用量校正预估的 token 数。"""
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + min(estimated, self.tpm) - actual)
+
+
+def get_async_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """获取（不存在时创建）指定服务的共享异步客户端，重试由 call_openai_style_model 负责。"""
+    key = (base_url, api_key)
+    client = _async_clients.get(key)
+    if client is None:
+        client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=settings.llm_timeout,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.llm_http_max_connections,
+                    max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+                ),
+            ),
+        )
+        _async_clients[key] = client
+    return client
+
+
+def _get_rate_limiter(base_url: str, model_name: str) -> _RateLimiter | None:
+    key = (base_url, model_name)
+    if key not in _rate_limiters:
+        limits = settings.llm_rate_limits.get(model_name, {})
+        rpm = int(limits.get("rpm", settings.llm_default_rpm))
+        tpm = int(limits.get("tpm", settings.llm_default_tpm))
+        _rate_limiters[key] = _RateLimiter(rpm, tpm) if (rpm > 0 or tpm > 0) else None
+    return _rate_limiters[key]
+
+
+def _retry_delay(error: Exception, attempt: int) -> float | None:
+    """返回可重试错误的等待秒数（优先使用 Retry-After），不可重试时返回 None。"""
+    if isinstance(error, APIStatusError):
+        if error.status_code not in _RETRYABLE_STATUS and error.status_code < 500:
+            return None
+        try:
+            return float(error.response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    elif not isinstance(error, APIConnectionError):
+        return None
+    backoff = settings.llm_retry_backoff * (2 ** attempt)
+    return backoff + random.uniform(0, backoff)
+
+
+async def call_openai_style_model(base_url, api_key, model_name, prompt, **kwargs):
+    """调用 OpenAI 兼容的对话接口并返回回答文本。
+
+    使用共享的异步客户端，按模型限流（rpm/tpm），限流、超时、连接错误和 5xx 时指数退避重试。
+    token 数先按 prompt 字符数预估，调用完成后按返回的 usage 校正。
+    """
+    client = get_async_client(base_url, api_key)
+    limiter = _get_rate_limiter(base_url, model_name)
+    estimated = len(prompt) + int(kwargs.get("max_tokens") or 0)
+
+    attempt = 0
+    while True:
+        if limiter:
+            await limiter.acquire(estimated)
+        try:
+            response = await client.chat.completions.create(
+                model=model_name,
+                messages=[{"role": "user", "content": prompt}],
+                **kwargs
+            )
+        except Exception as e:
+            delay = _retry_delay(e, attempt) if attempt < settings.llm_max_retries else None
+            if delay is None:
+                raise
+            attempt += 1
+            logger.warning(
+                f"Model call to {model_name} failed ({e.__class__.__name__}: {e}), "
+                f"retry {attempt}/{settings.llm_max_retries} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+            continue
+
+        if limiter and response.usage:
+            limiter.settle(estimated, response.usage.total_tokens)
+        return response.choices[0].message.content
 
 
 def extract_json_substring(raw: str) -> str:
@@ -8,7 +8,7 @@ Create: 2025/12/17
 import os
 import json
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import cv2
 import numpy as np
 from loguru import logger
@@ -49,6 +49,8 @@ COCO_CLASS_MAP = {
 class ImageObjectDetectionBoundingBox(Mapper):
     """图像目标检测算子"""
 
+    writes_files = True
+
     # 模型映射
     MODEL_MAP = {
         "n": "yolov8n.pt",
@@ -74,24 +76,32 @@ class ImageObjectDetectionBoundingBox(Mapper):
             # 确保是整数列表
             self._target_classes = [int(cls_id) for cls_id in self._target_classes]
         
+        # 调用方可传入已加载的模型（如自动标注worker的模型池），避免每次创建算子都重新加载权重
+        self.model = kwargs.get("model") or self.load_model(self._model_size)
+
+        logger.info(f"Init YOLOv8 detector: model_size: {self._model_size}, "
+                   f"conf_threshold: {self._conf_threshold}, "
+                   f"target_classes: {self._target_classes}")
+
+    @classmethod
+    def load_model(cls, model_size: str):
+        """加载指定尺寸的YOLOv8模型"""
         # 获取模型路径
-        model_filename = self.MODEL_MAP.get(self._model_size, "yolov8l.pt")
+        model_filename = cls.MODEL_MAP.get(model_size, "yolov8l.pt")
         current_dir = os.path.dirname(os.path.abspath(__file__))
         model_path = os.path.join(current_dir, model_filename)
-        
+
         # 初始化模型
         if YOLO is None:
             raise ImportError("ultralytics is not installed. Please install it.")
-        
+
         if not os.path.exists(model_path):
             logger.warning(f"Model file {model_path} not found. Downloading from ultralytics...")
-            self.model = YOLO(model_filename)  # 自动下载
+            model = YOLO(model_filename)  # 自动下载
         else:
-            self.model = YOLO(model_path)
-        
-        logger.info(f"Loaded YOLOv8 model: {model_filename}, "
-                   f"conf_threshold: {self._conf_threshold}, "
-                   f"target_classes: {self._target_classes}")
+            model = YOLO(model_path)
+        logger.info(f"Loaded YOLOv8 model: {model_filename}")
+        return model
 
     @staticmethod
     def _get_color_by_class_id(class_id: int):
@@ -102,24 +112,43 @@ class ImageObjectDetectionBoundingBox(Mapper):
 
     def execute(self, sample: Dict[str, Any]) -> Dict[str, Any]:
         """执行目标检测"""
-        start = time.time()
-        
-        # 读取图像文件
+        return self.execute_batch([sample])[0]
+
+    def execute_batch(self, samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量执行目标检测，多张图像一次送入模型推理"""
+        return self.detect_images(samples, [self.read_image(sample) for sample in samples])
+
+    def read_image(self, sample: Dict[str, Any]) -> Optional[np.ndarray]:
+        """读取样本对应的图像，文件不存在或读取失败时返回None"""
         image_path = sample.get(self.image_key)
         if not image_path or not os.path.exists(image_path):
             logger.warning(f"Image file not found: {image_path}")
-            return sample
-        
-        # 读取图像
+            return None
+
         img = cv2.imread(image_path)
         if img is None:
             logger.warning(f"Failed to read image: {image_path}")
-            return sample
-        
+        return img
+
+    def detect_images(self, samples: List[Dict[str, Any]], images: List[Optional[np.ndarray]]) -> List[Dict[str, Any]]:
+        """对已读取的图像批量推理并保存标注结果，图像为None的样本原样返回"""
+        start = time.time()
+        valid = [(sample, img) for sample, img in zip(samples, images) if img is not None]
+        if not valid:
+            return samples
+
         # 执行目标检测
-        results = self.model(img, conf=self._conf_threshold)
-        r = results[0]
-        
+        results = self.model([img for _, img in valid], conf=self._conf_threshold)
+        cost = (time.time() - start) / len(valid)
+        for (sample, img), r in zip(valid, results):
+            self._save_annotations(sample, img, r, cost)
+        return samples
+
+    def _save_annotations(self, sample: Dict[str, Any], img: np.ndarray, r, cost: float):
+        """根据检测结果绘制标注框，保存标注图像和标注JSON"""
+        start = time.time()
+        image_path = sample.get(self.image_key)
+
         # 准备标注数据
         h, w = img.shape[:2]
         annotations = {
@@ -209,6 +238,6 @@ class ImageObjectDetectionBoundingBox(Mapper):
         
         logger.info(f"Image: {os.path.basename(image_path)}, "
                    f"Detections: {len(annotations['detections'])}, "
-                   f"Time: {(time.time() - start):.4f}s")
+                   f"Time: {(time.time() - start + cost):.4f}s")
         
         return sample
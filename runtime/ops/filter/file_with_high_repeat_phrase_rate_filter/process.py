@@ -13,7 +13,7 @@ from pathlib import Path
 from typing import Dict, Any
 from loguru import logger
 
-import jieba
+from datamate.common.utils.tokenizer import get_sample_tokens, preload_jieba
 from datamate.core.base_op import Filter
 
 
@@ -26,37 +26,38 @@ class FileWithHighRepeatPhraseRateFilter(Filter):
         self._min_threshold = kwargs.get("repeatPhraseRatio", 0.5)  # 重复词符占全文的比例阈值，默认值为0.5
         self._hit_stopword_trigger = kwargs.get("hitStopwords", False)  # 计算重复词率时是否去除停用词，默认为False不去除，True为去除
         self._file_path = Path(__file__).parent / 'resources' / 'hit_stopwords.txt'
-        self._hit_stopwords = []
+        self._hit_stopwords = set()
         if self._hit_stopword_trigger:
             with open(self._file_path, 'r', encoding='utf-8') as f:
-                self._hit_stopwords = f.read().splitlines()
+                self._hit_stopwords = set(f.read().splitlines())
+        preload_jieba()
 
     def execute(self, sample: Dict[str, Any]) -> Dict[str, Any]:
         start = time.time()
         self.read_file_first(sample)
-        sample[self.text_key] = self._file_with_high_repeat_phrase_rate_filter(sample[self.text_key],
-                                                                               sample[self.filename_key])
+        sample[self.text_key] = self._file_with_high_repeat_phrase_rate_filter(sample, sample[self.filename_key])
         logger.info(f"fileName: {sample[self.filename_key]}, "
                     f"method: FileWithHighRepeatPhraseRateFilter costs {(time.time() - start):6f} s")
         return sample
 
-    def _tokenize_by_jieba(self, text: str):
-        """基于jieba对输入文本进行切分
+    def _tokenize_by_jieba(self, sample: Dict[str, Any]):
+        """基于jieba对输入文本进行切分，文本未变化时复用进程内缓存的分词结果
 
         Args:
-            text: 输入文档内容
+            sample: 输入样本
         Returns:
             words_list: 切割后的词列表
         """
 
-        for word in jieba.lcut(text):
+        for word in get_sample_tokens(sample, self.text_key):
             if not self.PUNCTUATION_PATTERN.match(word) and word not in self._hit_stopwords:
                 yield word
 
-    def _file_with_high_repeat_phrase_rate_filter(self, input_data: str, file_name):
+    def _file_with_high_repeat_phrase_rate_filter(self, sample: Dict[str, Any], file_name):
+        input_data = sample[self.text_key]
         if len(input_data) < 2:  # 词语长度至少2个字符
             return input_data
-        words_list = self._tokenize_by_jieba(input_data)
+        words_list = self._tokenize_by_jieba(sample)
         words_count = dict(Counter(words_list))
         words_count_max, words_total_count = 0, 0
         for words in words_count:
@@ -12,7 +12,6 @@ import cv2
 import numpy as np
 from loguru import logger
 
-from datamate.common.utils import bytes_transform
 from datamate.core.base_op import Filter
 
 from .wechat_qrcode_model import WechatQRCodeModel
@@ -21,6 +20,8 @@ from .wechat_qrcode_model import WechatQRCodeModel
 class ImgAdvertisementImagesCleaner(Filter):
     """去除广告图片的插件，当前仅支持去除二维码"""
 
+    use_image_array = True
+
     def __init__(self, *args, **kwargs):
         super(ImgAdvertisementImagesCleaner, self).__init__(*args, **kwargs)
         self.img_resize = 1000  # 大图片的最长边压缩为1000
@@ -107,12 +108,10 @@ class ImgAdvertisementImagesCleaner(Filter):
         start = time.time()
         self.read_file_first(sample)
         file_name = sample[self.filename_key]
-        file_type = "." + sample[self.filetype_key]
-        img_bytes = sample[self.data_key]
-        if img_bytes:
-            data = bytes_transform.bytes_to_numpy(img_bytes)
+        if self.has_image(sample):
+            data = self.load_image(sample)
             image = self._detect_advertisement_img(data, file_name, self.model)
-            sample[self.data_key] = bytes_transform.numpy_to_bytes(image, file_type)
+            self.store_image(sample, image)
             logger.info(f"fileName: {file_name}, "
                         f"method: ImgAdvertisementImagesCleaner costs {(time.time() - start):6f} s")
         return sample
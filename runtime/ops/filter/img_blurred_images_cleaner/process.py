@@ -13,13 +13,14 @@ import numpy as np
 from loguru import logger
 
 
-from datamate.common.utils import bytes_transform
 from datamate.core.base_op import Filter
 
 
 class ImgBlurredImagesCleaner(Filter):
     """过滤模糊度低于阈值的图片插件"""
 
+    use_image_array = True
+
     def __init__(self, *args, **kwargs):
         super(ImgBlurredImagesCleaner, self).__init__(*args, **kwargs)
         # 设置模糊度阈值
@@ -28,13 +29,11 @@ class ImgBlurredImagesCleaner(Filter):
     def execute(self, sample: Dict[str, Any]):
         start = time.time()
         self.read_file_first(sample)
-        img_bytes = sample[self.data_key]
         file_name = sample[self.filename_key]
-        file_type = "." + sample[self.filetype_key]
-        if img_bytes:
-            data = bytes_transform.bytes_to_numpy(img_bytes)
+        if self.has_image(sample):
+            data = self.load_image(sample)
             blurred_images = self._blurred_images_filter(data, file_name)
-            sample[self.data_key] = bytes_transform.numpy_to_bytes(blurred_images, file_type)
+            self.store_image(sample, blurred_images)
         logger.info(f"fileName: ｛file_name｝, method: ImagesBlurredCleaner costs {(time.time() - start):6f} s")
         return sample
 
@@ -10,7 +10,7 @@ Create: 2025/1/7
 import json
 import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 import cv2
 from Crypto.Hash import MD5
@@ -28,6 +28,10 @@ class ImgDuplicatedImagesCleaner(Filter):
     基于MD5值计算当前图片与数据集中其它图片是否相同。相同该图片过滤，保留原数据集图片。
     """
 
+    use_result_cache = False
+    # 支持全局两阶段去重，此时按MD5分组，不再逐条访问数据库
+    use_global_dedup = True
+
     def __init__(self, *args, **kwargs):
         # task_uuid为标识该数据集的唯一标志
         super().__init__(*args, **kwargs)
@@ -58,6 +62,18 @@ class ImgDuplicatedImagesCleaner(Filter):
         hash_md5.update(img_bytes)
         return hash_md5.hexdigest()
 
+    def dedup_signature(self, sample: Dict[str, Any]) -> Optional[bytes]:
+        img_bytes = sample[self.data_key]
+        if not img_bytes:
+            return None
+        return self.compute_md5(img_bytes).encode("utf-8")
+
+    def dedup_buckets(self, signature: bytes) -> List[bytes]:
+        return [signature]
+
+    def is_duplicate(self, signature: bytes, signature_history: bytes) -> bool:
+        return signature == signature_history
+
     def execute(self, sample: Dict[str, Any]) -> Dict[str, Any]:
         """重复图片去重算子执行入口"""
         start = time.time()
@@ -6,14 +6,16 @@ Description:
     2.感知哈希算法则是从图像的整体结构和特征维度来计算图片的相似度。
     3.ORB算法可以用来对图像中的关键点快速创建特征向量，这些特征向量可以用来识别图像中的对象。通过比较两张图片的特征向量计算相似度。
     4.感知哈希算法和ORB算法计算相似度高于0.75，则选择二者较大值；若低于0.75，则选择二者最小值作为相似度
-    5.将文件特征数据存到数据库。根据任务uuid获取历史文件特征，遍历特征并进行去重比较
+    5.将文件特征数据存到数据库。根据任务uuid增量加载历史文件特征到内存索引，先按pHash汉明距离筛选候选图片，再进行去重比较
 Create: 2025/1/7
 """
+import ast
 import json
 import time
 import zlib
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Dict, Any
 
 import cv2
 import numpy as np
@@ -23,6 +25,7 @@ from loguru import logger
 from datamate.sql_manager.sql_manager import SQLManager
 from datamate.common.utils import get_now_time
 from datamate.common.utils import bytes_to_numpy
+from datamate.common.utils.phash_index import PHashIndex
 from datamate.core.base_op import Filter
 
 MAX_RETRIES = 5
@@ -53,7 +56,12 @@ class ImgSimilarImagesCleaner(Filter):
     DEFAULT_ORB_RATIO = 0.8  # 默认特征点距离比率
     DEFAULT_MIX_SIMILARITY = 0.75  # 默认相似度算法阈值
     DEFAULT_IMG_RESIZE = 200  # 默认图片压缩尺寸
-    DEFAULT_PAGE_SIZE = 500  # 默认每页数据量
+    DEFAULT_MAX_CANDIDATE_DISTANCE = 32  # 默认候选图片的最大pHash汉明距离
+    DEFAULT_FEATURE_GAP_TIMEOUT = 60  # 默认等待id空洞被补齐的时长（秒）
+
+    use_result_cache = False
+    # 不参与全局两阶段去重：ORB相似度可使pHash汉明距离较大的图片被判为相似，
+    # 按pHash分段分桶无法覆盖max_candidate_distance内的全部候选
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -65,7 +73,16 @@ class ImgSimilarImagesCleaner(Filter):
         self.img_resize = self.DEFAULT_IMG_RESIZE  # 图片压缩尺寸
         self.conn = None  # 数据库连接
         self.trans = None  # 数据库事务
-        self.page_size = self.DEFAULT_PAGE_SIZE  # 每页数据量
+        # pHash汉明距离超过该值的图片视为不相似，不再进行ORB匹配
+        self.max_candidate_distance = int(kwargs.get("maxCandidateDistance", self.DEFAULT_MAX_CANDIDATE_DISTANCE))
+        self.feature_index = PHashIndex()  # 已加载的文件特征
+        self.last_feature_id = 0  # 已加载的最大特征id
+        # 自增id按分配顺序而非提交顺序可见，小于last_feature_id的空洞可能随后提交。
+        # 记录各空洞的起始id和发现时间，超时前从最早的空洞处重新扫描，已加载的id去重
+        self.feature_gaps = deque()
+        self.loaded_feature_ids = set()
+        self.feature_gap_timeout = float(kwargs.get("featureGapTimeout", self.DEFAULT_FEATURE_GAP_TIMEOUT))
+        self.table_created = False
         # 获取数据库sql
         self.sql_dict = self.load_sql_dict()
 
@@ -148,7 +165,6 @@ class ImgSimilarImagesCleaner(Filter):
         des_matrix_binary = zlib.compress(des_matrix.tobytes())  # 使用 zlib 进行压缩数组
         timestamp = get_now_time('Asia/Shanghai', '%Y-%m-%d %H:%M:%S', file_name,
                                  "ImgSimilarCleaner")
-        query_task_uuid_sql = str(self.sql_dict.get("query_task_uuid_sql"))
         insert_sql = str(self.sql_dict.get("insert_sql"))
         create_tables_sql = str(self.sql_dict.get("create_tables_sql"))
 
@@ -161,11 +177,12 @@ class ImgSimilarImagesCleaner(Filter):
 
         with self.conn as connection:
             """从数据库中获取文件特征、比较相似度，插入新的文件特征"""
-            connection.execute(text(create_tables_sql))
-            result = connection.execute(text(query_task_uuid_sql), {"task_uuid": self.task_uuid}).fetchall()
-            total_count = len(result)
-            if self.has_similar_images(connection, des_matrix, file_name, p_hash, total_count):
-                    return np.array([])
+            if not self.table_created:
+                connection.execute(text(create_tables_sql))
+                self.table_created = True
+            self.sync_features(connection)
+            if self.has_similar_images(des_matrix, file_name, p_hash):
+                return np.array([])
 
             insert_data = {
                 "task_uuid": self.task_uuid,
@@ -175,55 +192,66 @@ class ImgSimilarImagesCleaner(Filter):
                 "file_name": file_name.encode("utf-8").hex(),
                 "timestamp": timestamp
             }
-            connection.execute(text(insert_sql),insert_data)
+            connection.execute(text(insert_sql), insert_data)
         return img
 
-    def has_similar_images(self, connection, des_matrix, file_name, p_hash, total_count):
-        for i in range(0, total_count, self.page_size):
-            query_sql = self.sql_dict.get("query_sql")
-            rows = connection.execute(text(query_sql), {"task_uuid": self.task_uuid, "ge": self.page_size, "le": i}).fetchall()
-            # 对应任务uuid，最后一页没有数据，跳出循环
-            if not rows:
-                break            # 对两张图片进行相似度比较
-            if self.determine_similar_images(rows, p_hash, des_matrix, file_name):
-                return True
-        return False
-
-    def determine_similar_images(self, file_features: List, p_hash: str, des_matrix: np.ndarray,
-                                 file_name: str) -> bool:
-        """根据文件特征，判断两张图片相似度是否超过指定阈值"""
-        for signature in file_features:
-            pash_feature, orb_feature, matrix_shape, file_name_history = signature[2], signature[3], signature[4], \
-                signature[5]
+    def sync_features(self, connection):
+        """增量加载其他actor新写入的文件特征，ORB描述符只解压一次并缓存在内存索引中"""
+        query_sql = str(self.sql_dict.get("query_incremental_sql"))
+        now = time.time()
+        while self.feature_gaps and now - self.feature_gaps[0][1] > self.feature_gap_timeout:
+            self.feature_gaps.popleft()
+        scan_from = self.feature_gaps[0][0] - 1 if self.feature_gaps else self.last_feature_id
+        # 低于扫描起点的id不会再被查询，无需继续去重
+        self.loaded_feature_ids = {feature_id for feature_id in self.loaded_feature_ids if feature_id > scan_from}
+        query_params = {"task_uuid": self.task_uuid, "last_id": scan_from}
+        rows = connection.execute(text(query_sql), query_params).fetchall()
+        for feature_id, pash_feature, orb_feature, matrix_shape, file_name_history in rows:
+            if feature_id in self.loaded_feature_ids:
+                continue
+            self.loaded_feature_ids.add(feature_id)
+            if feature_id > self.last_feature_id + 1:
+                self.feature_gaps.append((self.last_feature_id + 1, now))
+            self.last_feature_id = max(self.last_feature_id, feature_id)
             if not pash_feature:
                 # 若图片为空，p_hash、des_matrix为空，跳过比对
                 continue
-            # 解压缩数据
-            decompressed_data = zlib.decompress(orb_feature)
-            # 将字节流转换回矩阵
-            des_matrix_history = np.frombuffer(decompressed_data, dtype=np.uint8).reshape(eval(matrix_shape))
-            # 移除转义字符 '\' 并将十六进制字符串转换为字节序列
-            bytes_data = bytes.fromhex(file_name_history)
-            # 解码字节序列为 UTF-8 编码的字符串
-            file_name_decoded = bytes_data.decode('utf-8')
-
-            phash_similarity = self.get_phash_similarity(p_hash, pash_feature)
-            orb_similarity = self.get_orb_similarity(des_matrix, des_matrix_history, file_name, file_name_decoded)
-            max_similarity = max(phash_similarity, orb_similarity)
-            min_similarity = min(phash_similarity, orb_similarity)
-            if max_similarity >= self.mix_similarity:
-                result = max_similarity
-            else:
-                result = min_similarity
-            similarity = round(result, 2)
+            # 解压缩数据并将字节流转换回矩阵
+            des_matrix_history = np.frombuffer(zlib.decompress(orb_feature), dtype=np.uint8).reshape(
+                ast.literal_eval(matrix_shape))
+            # 将十六进制字符串解码为 UTF-8 编码的文件名
+            file_name_decoded = bytes.fromhex(file_name_history).decode('utf-8')
+            self.feature_index.add(int(pash_feature, 2), (pash_feature, des_matrix_history, file_name_decoded))
+
+    def has_similar_images(self, des_matrix: np.ndarray, file_name: str, p_hash: str) -> bool:
+        """先按pHash汉明距离筛选候选图片，再按距离由近到远计算组合相似度"""
+        if not p_hash:
+            return False
+        candidates = self.feature_index.search(int(p_hash, 2), self.max_candidate_distance)
+        for pash_feature, des_matrix_history, file_name_history in candidates:
+            similarity = self.get_similarity(p_hash, des_matrix, pash_feature, des_matrix_history, file_name,
+                                             file_name_history)
             if similarity >= self.similar_threshold:
                 logger.info(
                     "fileName: %s, method: ImgSimilarCleaner, dataset: %s. This picture is similar to %s, "
                     "and the similarity is %.4f. The picture is filtered.", file_name, self.task_uuid,
-                    file_name_decoded, similarity)
+                    file_name_history, similarity)
                 return True
         return False
 
+    def get_similarity(self, p_hash: str, des_matrix: np.ndarray, p_hash_history: str,
+                       des_matrix_history: np.ndarray, file_name: str, file_name_history: str) -> float:
+        """结合pHash和ORB相似度：二者较大值高于mix_similarity时取较大值，否则取较小值"""
+        phash_similarity = self.get_phash_similarity(p_hash, p_hash_history)
+        orb_similarity = self.get_orb_similarity(des_matrix, des_matrix_history, file_name, file_name_history)
+        max_similarity = max(phash_similarity, orb_similarity)
+        min_similarity = min(phash_similarity, orb_similarity)
+        if max_similarity >= self.mix_similarity:
+            result = max_similarity
+        else:
+            result = min_similarity
+        return round(result, 2)
+
     def execute(self, sample: Dict[str, Any]) -> Dict[str, Any]:
         """去除相似图片算子执行入口"""
         start = time.time()
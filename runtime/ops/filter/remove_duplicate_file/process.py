@@ -6,19 +6,16 @@ Description: 文档局部内容去重
 Create: 2025/01/07
 """
 
-import json
 import re
 import time
-from pathlib import Path
-from typing import List, Dict, Any
+from typing import Dict, Any, List, Optional
 
 import numpy as np
+import ray
 from datasketch import MinHash
-from sqlalchemy import text
 from loguru import logger
 
-from datamate.sql_manager.sql_manager import SQLManager
-from datamate.common.utils import get_now_time
+from datamate.common.utils.minhash_lsh import get_shared_lsh_index, optimal_param
 from datamate.core.base_op import Filter
 
 
@@ -26,8 +23,13 @@ class DuplicateFilesFilter(Filter):
     """相似文档去除插件
 
     基于MinHash计算当前文档与数据集中其它文档相似性，相似性高于设定阈值则返回空。
+    MinHash签名存入任务共享的LSH分桶索引，只与同桶候选文档比较相似度。
     """
 
+    use_result_cache = False
+    # 支持全局两阶段去重，此时按MinHash签名的LSH分桶聚类，不再访问共享索引
+    use_global_dedup = True
+
     def __init__(self, *args, **kwargs):
         # 标点符号
         super().__init__(*args, **kwargs)
@@ -36,21 +38,14 @@ class DuplicateFilesFilter(Filter):
         self.duplicate_th = kwargs.get("fileDuplicateThreshold", 0.5)
         # task_uuid为标识该数据集的唯一标志
         self.task_uuid = kwargs.get("uuid", "")
-        # 数据库连接
-        self.conn = None
-        # 数据库事务
-        self.trans = None
-        # 每页数据量
-        self.page_size = 500
-        # 获取数据库sql
-        self.sql_dict = self.load_sql_dict()
-
-    @staticmethod
-    def load_sql_dict():
-        """获取sql语句"""
-        sql_config_path = str(Path(__file__).parent / 'sql' / 'sql_config.json')
-        with open(sql_config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        # 任务实例id，共享LSH索引按其命名，任务结束时由执行器释放
+        self.instance_id = None
+        # minhash排列数
+        self.num_perm = 128
+        # 任务共享的LSH索引
+        self.lsh_index = None
+        # LSH分桶参数(band数, 每个band的行数)
+        self.lsh_params = None
 
     def get_minhash(self, input_text: str) -> MinHash:
         """获取输入文档的minhash
@@ -61,7 +56,7 @@ class DuplicateFilesFilter(Filter):
         Returns:
             text_minhash: 输入文档对应的minhash值
         """
-        text_minhash = MinHash()
+        text_minhash = MinHash(num_perm=self.num_perm)
         for word in re.split(f"[{re.escape(self.punctuation_pattern)}]", input_text.strip()):
             text_minhash.update(word.strip().encode('utf8'))
         return text_minhash
@@ -80,79 +75,52 @@ class DuplicateFilesFilter(Filter):
         if not input_text:
             return input_text
         text_minhash = self.get_minhash(input_text)
-        return self.execute_sql(text_minhash, file_name, input_text)
-
-    def execute_sql(self, text_minhash: MinHash, file_name: str,
-                    input_text: str) -> str:
-        """从数据库中获取文件特征、比较相似度，插入新的文件特征"""
-        timestamp = get_now_time('Asia/Shanghai', '%Y-%m-%d %H:%M:%S', file_name,
-                                 "DuplicateFilesFilter")
-        minhash_values = text_minhash.hashvalues
-        # 将 NumPy 数组转换为字符串
-        minhash_values_string = np.array2string(minhash_values)
-        query_task_uuid_sql = self.sql_dict.get("query_task_uuid_sql")
-        insert_sql = self.sql_dict.get("insert_sql")
-        create_tables_sql = self.sql_dict.get("create_tables_sql")
-        db_manager = SQLManager()
-        try:
-            self.conn = db_manager.create_connect()
-        except Exception as e:
-            logger.error(f"fileName: {file_name}, database connection failed: {str(e)}")
-            raise RuntimeError(82000, str(e)) from None
-        with self.conn as connection:
-            connection.execute(text(create_tables_sql))
-            result = connection.execute(text(query_task_uuid_sql), {"task_uuid": self.task_uuid}).fetchall()
-            total_count = len(result)
-            if self.has_similar_text(connection, file_name, text_minhash, total_count):
-                return ""
-            insert_data = {
-                "task_uuid": self.task_uuid,
-                "file_feature": minhash_values_string,
-                "file_name": file_name.encode("utf-8").hex(),
-                "timestamp": timestamp
-            }
-            connection.execute(text(insert_sql), insert_data)
+        file_id = sample.get(self.fileid_key) or file_name
+        if self.has_similar_text(text_minhash, file_id, file_name):
+            return ""
         return input_text
 
-    def has_similar_text(self, connection, file_name, text_minhash, total_count) -> bool:
-        query_sql = self.sql_dict.get("query_sql")
-        for i in range(0, total_count, self.page_size):
-            rows = connection.execute(
-                text(query_sql), {"task_uuid": self.task_uuid, "file_name": file_name, "ge": self.page_size, "le": i}).fetchall()
-            # 对应任务uuid，最后一页没有数据，跳出循环
-            if not rows:
-                break
-            # 对两个文本进行相似度比较
-            if self.determine_similar_text(rows, text_minhash, file_name):
-                return True
-        return False
-
-    def determine_similar_text(self, file_features: List, text_minhash: MinHash, file_name: str) -> bool:
-        for signature in file_features:
-            # 历史文件特征和历史文件名称
-            file_feature, file_name_history = signature[2], signature[3]
-            if not file_feature:
-                continue
-            minhash_obj = MinHash(num_perm=128)
-            minhash_obj.hashvalues = np.fromstring(file_feature.strip('[]'), dtype=np.uint64, sep=' ')
-            similarity = text_minhash.jaccard(minhash_obj)
-
-            # 移除转义字符 '\' 并将十六进制字符串转换为字节序列
-            bytes_data = bytes.fromhex(file_name_history)
-            # 解码字节序列为 UTF-8 编码的字符串
-            file_name_decoded = bytes_data.decode('utf-8')
-
-            if similarity >= self.duplicate_th:
-                logger.info(f"taskId: {self.task_uuid}, fileName: {file_name} is similar to {file_name_decoded}, "
-                            f"and the similarity is {similarity:4f}")
-                return True
-        return False
+    def get_lsh_index(self):
+        """获取任务共享的LSH索引，同一任务的所有actor查询同一个索引"""
+        if self.lsh_index is None:
+            self.lsh_index = get_shared_lsh_index(self.instance_id or self.task_uuid, self.duplicate_th, self.num_perm)
+        return self.lsh_index
+
+    def has_similar_text(self, text_minhash: MinHash, file_id: str, file_name: str) -> bool:
+        """在LSH索引中查找其它相似文档，不存在时将当前文档加入索引；以文件id为键，重试的文档不会与自身匹配"""
+        similar = ray.get(self.get_lsh_index().query_and_insert.remote(file_id, text_minhash.hashvalues))
+        if similar is None:
+            return False
+        file_id_history, similarity = similar
+        logger.info(f"taskId: {self.task_uuid}, fileName: {file_name} is similar to fileId: {file_id_history}, "
+                    f"and the similarity is {similarity:4f}")
+        return True
+
+    def dedup_signature(self, sample: Dict[str, Any]) -> Optional[bytes]:
+        input_text = sample[self.text_key]
+        if not input_text:
+            return None
+        return self.get_minhash(input_text).hashvalues.astype(np.uint64).tobytes()
+
+    def dedup_buckets(self, signature: bytes) -> List[bytes]:
+        if self.lsh_params is None:
+            self.lsh_params = optimal_param(self.duplicate_th, self.num_perm)
+        bands, rows = self.lsh_params
+        # 每个band的键为band序号加该band的哈希值，8为uint64的字节数
+        return [band.to_bytes(2, "little") + signature[band * rows * 8:(band + 1) * rows * 8]
+                for band in range(bands)]
+
+    def is_duplicate(self, signature: bytes, signature_history: bytes) -> bool:
+        similarity = float((np.frombuffer(signature, dtype=np.uint64)
+                            == np.frombuffer(signature_history, dtype=np.uint64)).mean())
+        return similarity >= self.duplicate_th
 
     def execute(self, sample: Dict[str, Any]) -> Dict[str, Any]:
         start = time.time()
         self.read_file_first(sample)
         file_name = sample[self.filename_key]
-        self.task_uuid = sample.get("instance_id") if not self.task_uuid else self.task_uuid
+        self.instance_id = sample.get("instance_id")
+        self.task_uuid = self.instance_id if not self.task_uuid else self.task_uuid
         sample[self.text_key] = self.deduplicate_files(sample, file_name)
         logger.info(f"taskId: {self.task_uuid} fileName: {file_name}, "
                     f"method: DuplicateFilesFilter costs {(time.time() - start):6f} s")
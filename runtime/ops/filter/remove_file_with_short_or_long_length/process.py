@@ -8,7 +8,7 @@ Create: 2025/01/16
 
 import re
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from loguru import logger
 
@@ -18,6 +18,8 @@ from datamate.core.base_op import Filter
 class FileWithShortOrLongLengthFilter(Filter):
     """检查文档字数目，词数目不在指定范围会被过滤掉（支持自定义阈值）"""
 
+    use_batch = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         file_length_list = kwargs.get("fileLength", [10, 10000000])  # [下限，上限]，默认字数下限为10, 默认字数上限为10000000
@@ -38,6 +40,16 @@ class FileWithShortOrLongLengthFilter(Filter):
                     f"method: FileWithShortOrLongLengthFilter costs {(time.time() - start):6f} s")
         return sample
 
+    def execute_batch(self, samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        start = time.time()
+        for sample in samples:
+            self.read_file_first(sample)
+            sample[self.text_key] = self._file_with_short_or_long_length_filter(sample[self.text_key],
+                                                                                sample[self.filename_key])
+        logger.info(f"batch size: {len(samples)}, "
+                    f"method: FileWithShortOrLongLengthFilter costs {(time.time() - start):6f} s")
+        return samples
+
     def _strip_unicode_whitespace(self, text: str):
         # 常见 Unicode 空格符（涵盖普通空格、全角空格、零宽空格等）
         pattern = r'[\u0020\u00A0\u1680\u2000-\u200F\u202F\u205F\u3000]+'
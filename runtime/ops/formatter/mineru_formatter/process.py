@@ -25,6 +25,9 @@ from pypdf import PdfReader
 class MineruFormatter(Mapper):
     """基于外部API，抽取PDF中的文本"""
 
+    use_result_cache = False
+    parses_file = True
+
     def __init__(self, *args, **kwargs):
         super(MineruFormatter, self).__init__(*args, **kwargs)
         self.server_url = "http://datamate-mineru:8000"
@@ -14,6 +14,8 @@ from datamate.core.base_op import Mapper
 
 
 class SlideFormatter(Mapper):
+    parses_file = True
+
 
     def __init__(self, *args, **kwargs):
         super(SlideFormatter, self).__init__(*args, **kwargs)
@@ -12,11 +12,12 @@ import cv2
 import numpy as np
 from loguru import logger
 
-from datamate.common.utils import bytes_transform
 from datamate.core.base_op import Mapper
 
 
 class ImgDenoise(Mapper):
+    use_image_array = True
+
     def __init__(self, *args, **kwargs):
         super(ImgDenoise, self).__init__(*args, **kwargs)
         self._denoise_threshold = kwargs.get("denoise_threshold", 8)
@@ -30,14 +31,11 @@ class ImgDenoise(Mapper):
         start = time.time()
         self.read_file_first(sample)
 
-        img_bytes = sample[self.data_key]
-
         file_name = sample[self.filename_key]
-        file_type = "." + sample[self.filetype_key]
-        if img_bytes:
-            data = bytes_transform.bytes_to_numpy(img_bytes)
+        if self.has_image(sample):
+            data = self.load_image(sample)
             denoise_images = self._denoise_images_filter(data, file_name)
-            sample[self.data_key] = bytes_transform.numpy_to_bytes(denoise_images, file_type)
+            self.store_image(sample, denoise_images)
         logger.info(f"fileName: {file_name}, method: ImgDenoise costs {time.time() - start:6f} s")
         return sample
 
@@ -12,13 +12,14 @@ import cv2
 import numpy as np
 from loguru import logger
 
-from datamate.common.utils import bytes_transform
 from datamate.core.base_op import Mapper
 
 from .base_model import BaseModel
 
 
 class ImgDirectionCorrect(Mapper):
+    use_image_array = True
+
     def __init__(self, *args, **kwargs):
         super(ImgDirectionCorrect, self).__init__(*args, **kwargs)
         self.img_resize = 1000
@@ -99,12 +100,10 @@ class ImgDirectionCorrect(Mapper):
         start = time.time()
         self.read_file_first(sample)
         file_name = sample[self.filename_key]
-        file_type = "." + sample[self.filetype_key]
-        img_bytes = sample[self.data_key]
-        if img_bytes:
-            data = bytes_transform.bytes_to_numpy(img_bytes)
+        if self.has_image(sample):
+            data = self.load_image(sample)
             correct_data = self._img_direction_correct(data, file_name, self.vertical_model, self.standard_model)
-            sample[self.data_key] = bytes_transform.numpy_to_bytes(correct_data, file_type)
+            self.store_image(sample, correct_data)
             logger.info(f"fileName: ｛file_name｝, method: ImgDirectionCorrect costs {time.time() - start:6f} s")
         return sample
 
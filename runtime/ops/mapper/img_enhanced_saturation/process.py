@@ -14,13 +14,14 @@ import cv2
 import numpy as np
 from loguru import logger
 
-from datamate.common.utils import bytes_transform
 from datamate.core.base_op import Mapper
 
 
 class ImgSaturation(Mapper):
     """图片饱和度自适应增强"""
 
+    use_image_array = True
+
     def __init__(self, *args, **kwargs):
         super(ImgSaturation, self).__init__(*args, **kwargs)
         # 自适应增强参数
@@ -70,13 +71,11 @@ class ImgSaturation(Mapper):
     def execute(self, sample: Dict[str, Any]):
         start = time.time()
         self.read_file_first(sample)
-        img_bytes = sample[self.data_key]
         file_name = sample[self.filename_key]
-        file_type = "." + sample[self.filetype_key]
-        if img_bytes:
+        if self.has_image(sample):
             # 进行图片增强
-            img_data = bytes_transform.bytes_to_numpy(img_bytes)
+            img_data = self.load_image(sample)
             img_data = self.enhance_saturation(img_data, file_name)
-            sample[self.data_key] = bytes_transform.numpy_to_bytes(img_data, file_type)
+            self.store_image(sample, img_data)
         logger.info(f"fileName: ｛file_name｝, method: ImgSaturation costs {time.time() - start:6f} s")
         return sample
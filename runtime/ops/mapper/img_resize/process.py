@@ -10,11 +10,12 @@ from typing import List, Dict, Any
 from loguru import logger
 import cv2
 
-from datamate.common.utils import bytes_transform
 from datamate.core.base_op import Mapper
 
 
 class ImgResize(Mapper):
+    use_image_array = True
+
     def __init__(self, *args, **kwargs):
         super(ImgResize, self).__init__(*args, **kwargs)
         self._target_size = kwargs.get("targetSize", [256, 256])
@@ -31,11 +32,9 @@ class ImgResize(Mapper):
         start = time.time()
         self.read_file_first(sample)
         file_name = sample[self.filename_key]
-        file_type = "." + sample[self.filetype_key]
-        img_bytes = sample[self.data_key]
-        if img_bytes:
-            data = bytes_transform.bytes_to_numpy(img_bytes)
+        if self.has_image(sample):
+            data = self.load_image(sample)
             resized_img = self._img_resize(data, self._target_size)
-            sample[self.data_key] = bytes_transform.numpy_to_bytes(resized_img, file_type)
+            self.store_image(sample, resized_img)
             logger.info(f"fileName: {file_name}, method: ImgResize costs {time.time() - start:6f} s")
         return sample
@@ -6,9 +6,10 @@ __all__ = ['build_llm_prompt', 'get_json_list']
 
 import math
 
-import jieba
 from loguru import logger
 
+from datamate.common.utils.tokenizer import tokenize
+
 from . import graph_sim_func as bm25
 from .knowledge_slice import TextSegmentationOperator
 
@@ -64,7 +65,7 @@ class BM25Model:
         self.corpus = self.load_corpus()
 
     def bm25_similarity(self, query, num_best=1):
-        query = jieba.lcut(query)
+        query = tokenize(query)
         bm = bm25.SimilarityAlgBM25(self.corpus)
         scores = bm.get_sim_scores(query)
         id_score = [(i, score) for i, score in enumerate(scores)]
@@ -73,7 +74,7 @@ class BM25Model:
         return id_score[0: num_best]
 
     def load_corpus(self):
-        corpus = [jieba.lcut(data) for data in self.data_list]
+        corpus = [tokenize(data) for data in self.data_list]
 
         return corpus
 
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from typing import List, Tuple
+
+import presidio_analyzer as analyzer
+import ray
+import spacy
+from loguru import logger
+from ray.util.scheduling_strategies import NodeAffinitySchedulingStrategy
+
+from .custom_entities import id_recognizer, phone_recognizer, zipcode_recognizer, url_recognizer
+
+
+def build_analyzer() -> analyzer.AnalyzerEngine:
+    spacy.load("zh_core_web_sm")
+    provider = analyzer.nlp_engine.NlpEngineProvider(
+        nlp_configuration={
+            "nlp_engine_name": "spacy",
+            "models": [
+                {"lang_code": "zh", "model_name": "zh_core_web_sm"}
+            ]
+        }
+    )
+
+    # 创建NLP Engine
+    nlp_engine = provider.create_engine()
+
+    #  初始化AnalyzerEngine
+    text_analyzer = analyzer.AnalyzerEngine(nlp_engine=nlp_engine, supported_languages=["zh"])
+    text_analyzer.registry.load_predefined_recognizers()
+    for recognizer in [id_recognizer, phone_recognizer, zipcode_recognizer, url_recognizer]:
+        text_analyzer.registry.add_recognizer(recognizer)
+    return text_analyzer
+
+
+def split_chunks(text: str, max_chars: int) -> List[Tuple[int, str]]:
+    """按行将长文本切分为不超过max_chars的片段，返回(片段起始偏移, 片段)，超长的单行按长度切分"""
+    chunks = []
+    start = 0
+    end = 0
+    for line in text.splitlines(keepends=True):
+        if end - start + len(line) > max_chars and end > start:
+            chunks.append((start, text[start:end]))
+            start = end
+        end += len(line)
+        while end - start > max_chars:
+            chunks.append((start, text[start:start + max_chars]))
+            start += max_chars
+    if end > start:
+        chunks.append((start, text[start:end]))
+    return chunks
+
+
+class PiiAnalyzer:
+    """批量识别文本片段中的敏感实体，片段由nlp.pipe按batch_size成批推理，n_process为推理进程数"""
+
+    def __init__(self):
+        self.batch_analyzer = analyzer.BatchAnalyzerEngine(analyzer_engine=build_analyzer())
+
+    def analyze_chunks(self, chunks: List[str], language: str, batch_size: int,
+                       n_process: int) -> List[List[Tuple[str, int, int, float]]]:
+        results = self.batch_analyzer.analyze_iterator(texts=chunks, language=language,
+                                                       batch_size=batch_size, n_process=n_process)
+        return [[(result.entity_type, result.start, result.end, result.score) for result in chunk_results]
+                for chunk_results in results]
+
+
+@ray.remote(num_cpus=0)
+class SharedPiiAnalyzer:
+    """节点共享的识别actor，无进行中的请求且长时间无访问时自动退出，避免任务结束后残留"""
+
+    def __init__(self, idle_timeout: float = 600):
+        self.analyzer = PiiAnalyzer()
+        self.idle_timeout = idle_timeout
+        self.last_access = time.time()
+        self.running = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self._exit_when_idle, daemon=True).start()
+
+    def analyze_chunks(self, *args) -> List[List[Tuple[str, int, int, float]]]:
+        with self.lock:
+            self.running += 1
+        try:
+            return self.analyzer.analyze_chunks(*args)
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.last_access = time.time()
+
+    def _exit_when_idle(self):
+        while True:
+            time.sleep(min(60.0, self.idle_timeout))
+            with self.lock:
+                if not self.running and time.time() - self.last_access >= self.idle_timeout:
+                    break
+        logger.info(f"PII analyzer idle for {self.idle_timeout}s, exit.")
+        ray.kill(ray.get_runtime_context().current_actor)
+
+
+def get_node_analyzer(replica: int = 0):
+    """
+    获取（不存在时创建）当前节点共享的第replica个识别actor，同一节点上的算子actor分摊到各副本，
+    每个副本加载一份模型，副本内请求串行执行。
+    """
+    node_id = ray.get_runtime_context().get_node_id()
+    return SharedPiiAnalyzer.options(
+        name=f"pii_analyzer_{node_id}_{replica}",
+        namespace=os.getenv("PII_ANALYZER_NAMESPACE", "datamate"),
+        get_if_exists=True,
+        lifetime="detached",
+        scheduling_strategy=NodeAffinitySchedulingStrategy(node_id=node_id, soft=False),
+    ).remote(float(os.getenv("PII_ANALYZER_IDLE_TIMEOUT", "600")))
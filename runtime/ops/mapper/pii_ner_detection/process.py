@@ -1,52 +1,75 @@
-import presidio_analyzer as analyzer
+import os
+
 import presidio_anonymizer as anonymizer
-import spacy
+import ray
+from presidio_anonymizer.entities import RecognizerResult
 
 from datamate.core.base_op import Mapper
 
-from .custom_entities import id_recognizer, phone_recognizer, zipcode_recognizer, url_recognizer
+from .analyzer import PiiAnalyzer, get_node_analyzer, split_chunks
 
 
 class PiiDetector(Mapper):
     custom_ops = True
+    # 以批模式执行，整批样本的文本片段一起送入nlp.pipe推理
+    use_batch = True
 
     def __init__(self, *args, **kwargs):
         super(PiiDetector, self).__init__(*args, **kwargs)
         self.support_language = kwargs.get("support_language", "zh")
+        # 长文档按行切分的片段长度、nlp.pipe的批大小和推理进程数
+        self.chunk_size = int(kwargs.get("chunk_size", os.getenv("PII_CHUNK_SIZE", "2000")))
+        self.nlp_batch_size = int(kwargs.get("nlp_batch_size", os.getenv("PII_NLP_BATCH_SIZE", "32")))
+        self.nlp_workers = int(kwargs.get("nlp_workers", os.getenv("PII_NLP_WORKERS", "1")))
+        # 为true时同一节点上的actor共享PII_ANALYZER_REPLICAS份模型，默认每个actor加载自己的模型
+        self.shared_model = os.getenv("PII_SHARED_MODEL", "false").lower() == "true"
+        self.analyzer_replica = os.getpid() % max(int(os.getenv("PII_ANALYZER_REPLICAS", "2")), 1)
 
-        self.nlp_engine = None
         self.text_analyzer = None
         self.anom = None
 
         self.init_model(*args, **kwargs)
 
     def init_model(self, *args, **kwargs):
-        spacy.load("zh_core_web_sm")
-        provider = analyzer.nlp_engine.NlpEngineProvider(
-            nlp_configuration={
-                "nlp_engine_name": "spacy",
-                "models": [
-                    {"lang_code": "zh", "model_name": "zh_core_web_sm"}
-                ]
-            }
-        )
-
-        # 创建NLP Engine
-        self.nlp_engine = provider.create_engine()
-
-        #  初始化AnalyzerEngine
-        self.text_analyzer = analyzer.AnalyzerEngine(nlp_engine=self.nlp_engine, supported_languages=["zh"])
-        self.text_analyzer.registry.load_predefined_recognizers()
-        for recognizer in [id_recognizer, phone_recognizer, zipcode_recognizer, url_recognizer]:
-            self.text_analyzer.registry.add_recognizer(recognizer)
+        self.text_analyzer = get_node_analyzer(self.analyzer_replica) if self.shared_model else PiiAnalyzer()
 
         # 初始化AnonymizerEngine
         self.anom = anonymizer.AnonymizerEngine()
 
+    def analyze_chunks(self, chunks):
+        args = (chunks, self.support_language, self.nlp_batch_size, self.nlp_workers)
+        if self.shared_model:
+            try:
+                return ray.get(self.text_analyzer.analyze_chunks.remote(*args))
+            except ray.exceptions.RayActorError:
+                # 共享actor已因空闲退出，重新获取后重试
+                self.text_analyzer = get_node_analyzer(self.analyzer_replica)
+                return ray.get(self.text_analyzer.analyze_chunks.remote(*args))
+        return self.text_analyzer.analyze_chunks(*args)
+
     def execute(self, sample):
-        self.read_file_first(sample)
-        text = sample.get('text')
-        analyzer_results = self.text_analyzer.analyze(text=text, language=self.support_language)
-        res = self.anom.anonymize(text=text, analyzer_results=analyzer_results)
-        sample['text'] = res.text
-        return sample
+        return self.execute_batch([sample])[0]
+
+    def execute_batch(self, samples):
+        chunks = []
+        owners = []
+        for index, sample in enumerate(samples):
+            self.read_file_first(sample)
+            for offset, chunk in split_chunks(sample.get('text') or "", self.chunk_size):
+                chunks.append(chunk)
+                owners.append((index, offset))
+
+        # 片段内的实体位置换算为文档内的位置
+        analyzer_results = [[] for _ in samples]
+        if chunks:
+            for (index, offset), chunk_results in zip(owners, self.analyze_chunks(chunks)):
+                analyzer_results[index].extend(RecognizerResult(entity_type, start + offset, end + offset, score)
+                                               for entity_type, start, end, score in chunk_results)
+
+        for sample, results in zip(samples, analyzer_results):
+            text = sample.get('text')
+            if not text:
+                continue
+            res = self.anom.anonymize(text=text, analyzer_results=results)
+            sample['text'] = res.text
+        return samples
@@ -25,7 +25,7 @@ class PoliticalWordCleaner(Mapper):
         special_symbols_path = str(root_path / 'special_symbols.txt')
         self.special_symbols = self.load_words_list(special_symbols_path)
         self.political_words = self.load_words_list(political_file_path)
-        self.ac_automaton = AhoCorasic(self.political_words)
+        self.ac_automaton = AhoCorasic.get_automaton(self.political_words)
 
     @staticmethod
     def load_words_list(path):
@@ -61,8 +61,6 @@ class PoliticalWordCleaner(Mapper):
 
     def _political_word_filter(self, text):
         """词语过滤主函数，分行过滤"""
-        filtered_rows = []
-        for row in text.split('\n'):
-            matched_words = self.ac_automaton.search(row, self.special_symbols)
-            filtered_rows.append(self.words_replace(matched_words, row))
-        return '\n'.join(filtered_rows)
+        rows = text.split('\n')
+        matched_words_list = self.ac_automaton.search_batch(rows, self.special_symbols)
+        return '\n'.join(self.words_replace(matched_words, row) for matched_words, row in zip(matched_words_list, rows))
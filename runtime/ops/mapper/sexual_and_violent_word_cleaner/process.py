@@ -28,7 +28,7 @@ class SexualAndViolentWordCleaner(Mapper):
         self.sexual_words = self.load_words_list(self.SEXUAL_FILE_PATH)
         self.special_symbols = self.load_words_list(self.SPECIAL_SYMBOLS_PATH)
         self.words = self.violent_words | self.sexual_words
-        self.ac_automaton = AhoCorasic(self.words)
+        self.ac_automaton = AhoCorasic.get_automaton(self.words)
 
     @staticmethod
     def load_words_list(path):
@@ -64,8 +64,6 @@ class SexualAndViolentWordCleaner(Mapper):
 
     def _sexual_and_violent_word_filter(self, text):
         """词语过滤主函数，分行过滤"""
-        filtered_rows = []
-        for row in text.split('\n'):
-            matched_words = self.ac_automaton.search(row, self.special_symbols)
-            filtered_rows.append(self.words_replace(matched_words, row))
-        return '\n'.join(filtered_rows)
+        rows = text.split('\n')
+        matched_words_list = self.ac_automaton.search_batch(rows, self.special_symbols)
+        return '\n'.join(self.words_replace(matched_words, row) for matched_words, row in zip(matched_words_list, rows))
@@ -7,7 +7,7 @@ Create: 2024/12/26 15:43
 """
 import re
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from loguru import logger
 
@@ -17,6 +17,8 @@ from datamate.core.base_op import Mapper
 class AnonymizedUrlCleaner(Mapper):
     """将文档中的网址匿名化"""
 
+    use_batch = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.url_pattern = r'((?:(?:https?|ftp|file)://|(?<![a-zA-Z\-\.])www\.)' \
@@ -31,6 +33,14 @@ class AnonymizedUrlCleaner(Mapper):
         logger.info(f"fileName: {sample[self.filename_key]}, method: UrlCleaner costs {time.time() - start:6f} s")
         return sample
 
+    def execute_batch(self, samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        start = time.time()
+        for sample in samples:
+            self.read_file_first(sample)
+            sample[self.text_key] = self._url_filter(sample[self.text_key])
+        logger.info(f"batch size: {len(samples)}, method: UrlCleaner costs {time.time() - start:6f} s")
+        return samples
+
     def _url_filter(self, input_data: str):
         input_data = ''.join(['【', input_data, '】'])
         text = self.url_re_compile.sub("<url>", input_data)
@@ -21,6 +21,8 @@ from datamate.common.utils import bytes_transform
 
 
 class AnnotationSlicer(Slicer):
+    parses_file = True
+
 
     def __init__(self, *args, **kwargs):
         super(AnnotationSlicer, self).__init__(*args, **kwargs)
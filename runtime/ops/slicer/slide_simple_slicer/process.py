@@ -20,6 +20,8 @@ from datamate.common.utils import bytes_transform
 
 
 class SimpleSlicer(Slicer):
+    parses_file = True
+
 
     def __init__(self, *args, **kwargs):
         super(SimpleSlicer, self).__init__(*args, **kwargs)
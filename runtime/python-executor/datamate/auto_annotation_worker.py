@@ -7,27 +7,28 @@ inference using the ImageObjectDetectionBoundingBox operator, updating
 progress back to the same table so that the datamate-python backend and
 frontend can display real-time status.
 
-设计目标（最小可用版本）:
-- 单实例 worker，串行处理 `pending` 状态的任务。
-- 对指定数据集下的所有已完成文件逐张执行目标检测。
+设计目标:
+- 每个进程启动 `AUTO_ANNOTATION_WORKERS` 个 worker 线程，多个 runtime pod 可同时运行。
+- worker 通过带条件的 UPDATE 原子地领取任务，并写入 `worker_id`、`heartbeat_at` 租约字段，
+  同一任务不会被重复处理。
+- 处理期间后台线程定期续约；租约超时未续约的 `running` 任务（如容器重启遗留）会被重新领取。
+- 对指定数据集下的所有已完成文件分批执行目标检测。
 - 按已处理图片数更新 `processed_images`、`progress`、`detected_objects`、`status` 等字段。
 - 失败时将任务标记为 `failed` 并记录 `error_message`。
-
-注意:
-- 为了保持简单，目前不处理 "running" 状态的恢复逻辑；容器重启时，
-  已处于 running 的任务不会被重新拉起，需要后续扩展。
 """
 from __future__ import annotations
 
 import json
 import os
+import socket
 import sys
 import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from loguru import logger
 from sqlalchemy import text
@@ -101,23 +102,228 @@ DEFAULT_OUTPUT_ROOT = os.getenv(
     "AUTO_ANNOTATION_OUTPUT_ROOT", "/dataset"
 )
 
+# 每个进程中并发处理任务的 worker 线程数
+WORKER_CONCURRENCY = max(1, int(os.getenv("AUTO_ANNOTATION_WORKERS", "1")))
+
+# 任务租约时长：running 任务超过该时长未续约，视为持有者已失联，可被其他 worker 重新领取
+LEASE_SECONDS = int(os.getenv("AUTO_ANNOTATION_LEASE_SECONDS", "300"))
+HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("AUTO_ANNOTATION_HEARTBEAT_INTERVAL", "30"))
+
+# 每次领取时查询的候选任务数，候选被其他 worker 抢先领取时依次尝试下一个
+CLAIM_CANDIDATES = 5
+
+# 当前进程的标识，worker_id 在其后附加线程序号
+INSTANCE_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# 已加载模型空闲超过该时长后释放
+MODEL_IDLE_SECONDS = float(os.getenv("AUTO_ANNOTATION_MODEL_IDLE_SECONDS", "600"))
+
+# 每次送入模型推理的图片数
+BATCH_SIZE = max(1, int(os.getenv("AUTO_ANNOTATION_BATCH_SIZE", "8")))
+
+# 进度写库节流：距上次写入超过间隔秒数或新增处理图片数达到阈值时才写入
+PROGRESS_INTERVAL_SECONDS = float(os.getenv("AUTO_ANNOTATION_PROGRESS_INTERVAL", "2"))
+PROGRESS_EVERY_IMAGES = max(1, int(os.getenv("AUTO_ANNOTATION_PROGRESS_EVERY", "100")))
+
+# 注册输出文件时每批插入的行数
+REGISTER_BATCH_SIZE = max(1, int(os.getenv("AUTO_ANNOTATION_REGISTER_BATCH_SIZE", "1000")))
+
+
+class _ModelPool:
+    """按模型尺寸缓存已加载的 YOLO 模型，任务间复用，空闲超时后释放。
+
+    模型实例在任务执行期间被借出，同一实例同一时刻只被一个任务使用。
+    """
+
+    def __init__(self, idle_seconds: float):
+        self._idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._idle: Dict[str, List[Tuple[Any, float]]] = {}
+
+    def acquire(self, model_size: str) -> Any:
+        with self._lock:
+            models = self._idle.get(model_size)
+            if models:
+                return models.pop()[0]
+        logger.info("Loading YOLO model into warm pool: model_size={}", model_size)
+        return ImageObjectDetectionBoundingBox.load_model(model_size)
+
+    def release(self, model_size: str, model: Any) -> None:
+        with self._lock:
+            self._idle.setdefault(model_size, []).append((model, time.monotonic()))
+
+    def evict_idle(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for model_size, models in list(self._idle.items()):
+                kept = [(model, used_at) for model, used_at in models if now - used_at < self._idle_seconds]
+                if len(kept) < len(models):
+                    logger.info(
+                        "Evicted {} idle YOLO model(s) from warm pool: model_size={}",
+                        len(models) - len(kept),
+                        model_size,
+                    )
+                if kept:
+                    self._idle[model_size] = kept
+                else:
+                    del self._idle[model_size]
+
+
+_MODEL_POOL = _ModelPool(MODEL_IDLE_SECONDS)
+
+
+class _LeaseKeeper:
+    """为本进程正在处理的任务定期续约。
+
+    续约时发现租约已被其他 worker 接管的任务会被标记为丢失，处理线程据此尽快停止。
+    """
+
+    def __init__(self, interval_seconds: float):
+        self._interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._held: Dict[str, str] = {}
+        self._lost: set = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="auto-annotation-heartbeat", daemon=True)
+            self._thread.start()
+
+    def hold(self, task_id: str, worker_id: str) -> None:
+        with self._lock:
+            self._held[task_id] = worker_id
+            self._lost.discard(task_id)
+
+    def release(self, task_id: str) -> None:
+        with self._lock:
+            self._held.pop(task_id, None)
+            self._lost.discard(task_id)
+
+    def is_lost(self, task_id: str) -> bool:
+        with self._lock:
+            return task_id in self._lost
+
+    def worker_of(self, task_id: str) -> Optional[str]:
+        """返回本进程持有该任务租约的 worker_id，未持有时返回 None。"""
+        with self._lock:
+            return self._held.get(task_id)
+
+    def mark_lost(self, task_id: str) -> None:
+        with self._lock:
+            if task_id in self._held:
+                self._lost.add(task_id)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self._interval_seconds)
+            with self._lock:
+                held = list(self._held.items())
+            for task_id, worker_id in held:
+                try:
+                    if not _renew_lease(task_id, worker_id):
+                        logger.warning("Lost lease of auto-annotation task {}: worker_id={}", task_id, worker_id)
+                        with self._lock:
+                            if task_id in self._held:
+                                self._lost.add(task_id)
+                except Exception as e:  # pragma: no cover - 防御性日志
+                    logger.error("Failed to renew lease of auto-annotation task {}: {}", task_id, e)
+
+
+_LEASE_KEEPER = _LeaseKeeper(HEARTBEAT_INTERVAL_SECONDS)
+
+
+# 可领取的任务：pending，或租约已超时的 running（未写入心跳的旧任务按 updated_at 判断）
+_CLAIMABLE_CONDITION = """
+    deleted_at IS NULL
+    AND (
+        status = 'pending'
+        OR (
+            status = 'running'
+            AND COALESCE(heartbeat_at, updated_at) < DATE_SUB(NOW(), INTERVAL :lease_seconds SECOND)
+        )
+    )
+"""
+
 
-def _fetch_pending_task() -> Optional[Dict[str, Any]]:
-    """从 t_dm_auto_annotation_tasks 中取出一个 pending 任务。"""
+def _claim_task(worker_id: str) -> Optional[Dict[str, Any]]:
+    """原子地领取一个 pending 任务或租约超时的 running 任务。
+
+    先查询候选任务，再以带条件的 UPDATE 写入租约，影响行数为 1 才算领取成功，
+    多个 worker 并发领取同一任务时只有一个会成功。
+    """
+
+    select_sql = text(
+        f"""
+        SELECT id, status
+        FROM t_dm_auto_annotation_tasks
+        WHERE {_CLAIMABLE_CONDITION}
+        ORDER BY created_at ASC
+        LIMIT :limit
+        """
+    )
+    claim_sql = text(
+        f"""
+        UPDATE t_dm_auto_annotation_tasks
+        SET status = 'running', worker_id = :worker_id, heartbeat_at = NOW(), updated_at = NOW()
+        WHERE id = :task_id AND {_CLAIMABLE_CONDITION}
+        """
+    )
+
+    claimed: Optional[Tuple[str, str]] = None
+    with SQLManager.create_connect() as conn:
+        candidates = conn.execute(
+            select_sql, {"lease_seconds": LEASE_SECONDS, "limit": CLAIM_CANDIDATES}
+        ).fetchall()
+        for task_id, previous_status in candidates:
+            result = conn.execute(
+                claim_sql,
+                {"task_id": task_id, "worker_id": worker_id, "lease_seconds": LEASE_SECONDS},
+            )
+            if result.rowcount == 1:
+                claimed = (str(task_id), str(previous_status))
+                break
+    if claimed is None:
+        return None
+
+    task_id, previous_status = claimed
+    if previous_status == "running":
+        logger.warning("Recovered stale auto-annotation task {} by worker {}", task_id, worker_id)
+
+    task = _load_task(task_id)
+    if task is not None:
+        task["recovered"] = previous_status == "running"
+    return task
+
+
+def _renew_lease(task_id: str, worker_id: str) -> bool:
+    """续约任务租约，租约已被其他 worker 接管时返回 False。"""
+
+    sql = text(
+        """
+        UPDATE t_dm_auto_annotation_tasks
+        SET heartbeat_at = NOW()
+        WHERE id = :task_id AND worker_id = :worker_id AND status = 'running'
+        """
+    )
+    with SQLManager.create_connect() as conn:
+        return conn.execute(sql, {"task_id": task_id, "worker_id": worker_id}).rowcount == 1
+
+
+def _load_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """加载任务记录并解析 config、file_ids 字段。"""
 
     sql = text(
         """
         SELECT id, name, dataset_id, dataset_name, config, file_ids, status,
                total_images, processed_images, detected_objects, output_path
         FROM t_dm_auto_annotation_tasks
-        WHERE status = 'pending' AND deleted_at IS NULL
-        ORDER BY created_at ASC
-        LIMIT 1
+        WHERE id = :task_id
         """
     )
 
     with SQLManager.create_connect() as conn:
-        result = conn.execute(sql).fetchone()
+        result = conn.execute(sql, {"task_id": task_id}).fetchone()
         if not result:
             return None
         row = dict(result._mapping)  # type: ignore[attr-defined]
@@ -151,8 +357,12 @@ def _update_task_status(
     output_path: Optional[str] = None,
     error_message: Optional[str] = None,
     completed: bool = False,
-) -> None:
-    """更新任务的状态和统计字段。"""
+) -> bool:
+    """更新任务的状态和统计字段。
+
+    本进程持有该任务租约时只更新 worker_id 仍为自己的行；租约已被接管导致未更新任何行时，
+    将任务标记为租约丢失并返回 False，调用方应停止处理。
+    """
 
     fields: List[str] = ["status = :status", "updated_at = :updated_at"]
     params: Dict[str, Any] = {
@@ -183,16 +393,28 @@ def _update_task_status(
         fields.append("completed_at = :completed_at")
         params["completed_at"] = datetime.now()
 
+    condition = "id = :task_id"
+    worker_id = _LEASE_KEEPER.worker_of(task_id)
+    if worker_id is not None:
+        condition += " AND worker_id = :worker_id"
+        params["worker_id"] = worker_id
+
     sql = text(
         f"""
         UPDATE t_dm_auto_annotation_tasks
         SET {', '.join(fields)}
-        WHERE id = :task_id
+        WHERE {condition}
         """
     )
 
     with SQLManager.create_connect() as conn:
-        conn.execute(sql, params)
+        rowcount = conn.execute(sql, params).rowcount
+
+    if worker_id is not None and rowcount == 0:
+        logger.warning("Lost lease of auto-annotation task {} when updating status: worker_id={}", task_id, worker_id)
+        _LEASE_KEEPER.mark_lost(task_id)
+        return False
+    return True
 
 
 def _load_dataset_files(dataset_id: str) -> List[Tuple[str, str, str]]:
@@ -281,6 +503,43 @@ def _create_output_dataset(
     return new_dataset_id, output_dir
 
 
+def _find_output_dataset(output_path: Optional[str]) -> Optional[Tuple[str, str]]:
+    """根据任务记录的输出路径查找此前已创建的输出数据集，返回 (dataset_id, path)。"""
+
+    if not output_path:
+        return None
+
+    sql = text(
+        """
+        SELECT id, path
+        FROM t_dm_datasets
+        WHERE id = :dataset_id AND path = :path
+        """
+    )
+    with SQLManager.create_connect() as conn:
+        row = conn.execute(
+            sql, {"dataset_id": os.path.basename(output_path.rstrip("/")), "path": output_path}
+        ).fetchone()
+    return (str(row[0]), str(row[1])) if row else None
+
+
+def _scan_files(directory: str) -> Iterator[Tuple[str, str, int]]:
+    """流式遍历目录下的文件，返回 (文件名, 路径, 大小)，复用 os.scandir 缓存的 stat 结果。"""
+
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            try:
+                file_size = entry.stat().st_size
+            except OSError:
+                file_size = 0
+            yield entry.name, entry.path, int(file_size)
+
+
 def _register_output_dataset(
     task_id: str,
     output_dataset_id: str,
@@ -288,7 +547,10 @@ def _register_output_dataset(
     output_dataset_name: str,
     total_images: int,
 ) -> None:
-    """将自动标注结果注册到新建的数据集。"""
+    """将自动标注结果注册到新建的数据集。
+
+    文件记录按 REGISTER_BATCH_SIZE 分批多行插入，所有插入和数据集统计更新在同一事务中提交。
+    """
 
     images_dir = os.path.join(output_dir, "images")
     if not os.path.isdir(images_dir):
@@ -299,41 +561,10 @@ def _register_output_dataset(
         )
         return
 
-    image_files: List[Tuple[str, str, int]] = []
-    annotation_files: List[Tuple[str, str, int]] = []
-    total_size = 0
-
-    for file_name in sorted(os.listdir(images_dir)):
-        file_path = os.path.join(images_dir, file_name)
-        if not os.path.isfile(file_path):
-            continue
-        try:
-            file_size = os.path.getsize(file_path)
-        except OSError:
-            file_size = 0
-        image_files.append((file_name, file_path, int(file_size)))
-        total_size += int(file_size)
-
     annotations_dir = os.path.join(output_dir, "annotations")
+    directories = [images_dir]
     if os.path.isdir(annotations_dir):
-        for file_name in sorted(os.listdir(annotations_dir)):
-            file_path = os.path.join(annotations_dir, file_name)
-            if not os.path.isfile(file_path):
-                continue
-            try:
-                file_size = os.path.getsize(file_path)
-            except OSError:
-                file_size = 0
-            annotation_files.append((file_name, file_path, int(file_size)))
-            total_size += int(file_size)
-
-    if not image_files:
-        logger.warning(
-            "No image files found in auto-annotation output for task {}: {}",
-            task_id,
-            images_dir,
-        )
-        return
+        directories.append(annotations_dir)
 
     insert_file_sql = text(
         """
@@ -353,42 +584,44 @@ def _register_output_dataset(
         """
     )
 
+    added_count = 0
+    total_size = 0
     with SQLManager.create_connect() as conn:
-        added_count = 0
+        # 连接池默认自动提交，切换隔离级别后显式开启事务
+        conn.execution_options(isolation_level="READ COMMITTED")
+        with conn.begin():
+            rows: List[Dict[str, Any]] = []
+            for directory in directories:
+                for file_name, file_path, file_size in _scan_files(directory):
+                    ext = os.path.splitext(file_name)[1].lstrip(".").upper() or None
+                    rows.append(
+                        {
+                            "id": str(uuid.uuid4()),
+                            "dataset_id": output_dataset_id,
+                            "file_name": file_name,
+                            "file_path": file_path,
+                            "file_type": ext,
+                            "file_size": file_size,
+                            "status": "ACTIVE",
+                        }
+                    )
+                    added_count += 1
+                    total_size += file_size
+                    if len(rows) >= REGISTER_BATCH_SIZE:
+                        conn.execute(insert_file_sql, rows)
+                        rows = []
+
+                if directory == images_dir and added_count == 0:
+                    logger.warning(
+                        "No image files found in auto-annotation output for task {}: {}",
+                        task_id,
+                        images_dir,
+                    )
+                    return
+
+            if rows:
+                conn.execute(insert_file_sql, rows)
 
-        for file_name, file_path, file_size in image_files:
-            ext = os.path.splitext(file_name)[1].lstrip(".").upper() or None
-            conn.execute(
-                insert_file_sql,
-                {
-                    "id": str(uuid.uuid4()),
-                    "dataset_id": output_dataset_id,
-                    "file_name": file_name,
-                    "file_path": file_path,
-                    "file_type": ext,
-                    "file_size": int(file_size),
-                    "status": "ACTIVE",
-                },
-            )
-            added_count += 1
-
-        for file_name, file_path, file_size in annotation_files:
-            ext = os.path.splitext(file_name)[1].lstrip(".").upper() or None
-            conn.execute(
-                insert_file_sql,
-                {
-                    "id": str(uuid.uuid4()),
-                    "dataset_id": output_dataset_id,
-                    "file_name": file_name,
-                    "file_path": file_path,
-                    "file_type": ext,
-                    "file_size": int(file_size),
-                    "status": "ACTIVE",
-                },
-            )
-            added_count += 1
-
-        if added_count > 0:
             conn.execute(
                 update_dataset_stat_sql,
                 {
@@ -402,13 +635,96 @@ def _register_output_dataset(
         "Registered auto-annotation output into dataset: dataset_id={}, name={}, added_files={}, added_size_bytes={}, task_id={}, output_dir={}",
         output_dataset_id,
         output_dataset_name,
-        len(image_files) + len(annotation_files),
+        added_count,
         total_size,
         task_id,
         output_dir,
     )
 
 
+def _decode_batch(detector: Any, batch: List[Tuple[str, str]]) -> Tuple[List[Dict[str, Any]], List[Any]]:
+    """读取并解码一批图片。"""
+
+    samples = [{"image": file_path, "filename": file_name} for file_path, file_name in batch]
+    return samples, [detector.read_image(sample) for sample in samples]
+
+
+def _count_detections(samples: List[Dict[str, Any]]) -> int:
+    return sum(len((sample.get("annotations") or {}).get("detections", [])) for sample in samples)
+
+
+def _detect_files(
+    task_id: str,
+    detector: Any,
+    files: List[Tuple[str, str]],
+    output_dir: str,
+) -> Tuple[int, int]:
+    """分批推理任务中的全部图片，返回 (已处理图片数, 检测目标数)。
+
+    后台线程预先解码下一批图片，与当前批次的推理重叠；进度按时间或数量节流后写库。
+    """
+
+    total_images = len(files)
+    processed = 0
+    detected_total = 0
+    reported_processed = 0
+    reported_at = time.monotonic()
+
+    batches = [files[i:i + BATCH_SIZE] for i in range(0, total_images, BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="auto-annotation-prefetch") as prefetcher:
+        pending = prefetcher.submit(_decode_batch, detector, batches[0])
+        for index, batch in enumerate(batches):
+            if _LEASE_KEEPER.is_lost(task_id):
+                break
+            try:
+                samples, images = pending.result()
+            except Exception as e:
+                logger.error("Failed to decode image batch for task {}: error={}", task_id, e)
+                samples, images = [], []
+            if index + 1 < len(batches):
+                pending = prefetcher.submit(_decode_batch, detector, batches[index + 1])
+
+            try:
+                detector.detect_images(samples, images)
+                detected_total += _count_detections(samples)
+                processed += len(samples)
+            except Exception as e:
+                logger.error("Batch inference failed for task {}, fallback to single image: {}", task_id, e)
+                # 整批失败时逐张重试，只跳过真正出错的图片
+                for sample, image in zip(samples, images):
+                    try:
+                        detector.detect_images([sample], [image])
+                        detected_total += _count_detections([sample])
+                        processed += 1
+                    except Exception as single_error:
+                        logger.error(
+                            "Failed to process image for task {}: file_path={}, error={}",
+                            task_id,
+                            sample["image"],
+                            single_error,
+                        )
+
+            now = time.monotonic()
+            if (
+                processed - reported_processed >= PROGRESS_EVERY_IMAGES
+                or now - reported_at >= PROGRESS_INTERVAL_SECONDS
+            ):
+                # 租约丢失时标记为丢失，下一批开始前退出
+                _update_task_status(
+                    task_id,
+                    status="running",
+                    progress=int(processed * 100 / total_images),
+                    processed_images=processed,
+                    detected_objects=detected_total,
+                    total_images=total_images,
+                    output_path=output_dir,
+                )
+                reported_processed = processed
+                reported_at = now
+
+    return processed, detected_total
+
+
 def _process_single_task(task: Dict[str, Any]) -> None:
     """执行单个自动标注任务。"""
 
@@ -450,7 +766,8 @@ def _process_single_task(task: Dict[str, Any]) -> None:
         output_dataset_name,
     )
 
-    _update_task_status(task_id, status="running", progress=0)
+    if not _update_task_status(task_id, status="running", progress=0):
+        return
 
     if selected_file_ids:
         all_files = _load_files_by_ids(selected_file_ids)
@@ -474,21 +791,35 @@ def _process_single_task(task: Dict[str, Any]) -> None:
         )
         return
 
-    output_dataset_id, output_dir = _create_output_dataset(
-        source_dataset_id=dataset_id,
-        source_dataset_name=source_dataset_name,
-        output_dataset_name=output_dataset_name,
-    )
+    # 接管的任务复用此前创建的输出数据集，已生成的结果会被覆盖
+    existing_output = _find_output_dataset(task.get("output_path")) if task.get("recovered") else None
+    if existing_output:
+        output_dataset_id, output_dir = existing_output
+    else:
+        output_dataset_id, output_dir = _create_output_dataset(
+            source_dataset_id=dataset_id,
+            source_dataset_name=source_dataset_name,
+            output_dataset_name=output_dataset_name,
+        )
+        # 立即记录输出路径，任务被接管时可据此找回输出数据集
+        if not _update_task_status(task_id, status="running", output_path=output_dir):
+            return
     output_dir = _ensure_output_dir(output_dir)
 
+    model = None
     try:
+        # 从模型池借出已加载的模型，检测参数仍按任务配置创建
+        model = _MODEL_POOL.acquire(model_size)
         detector = ImageObjectDetectionBoundingBox(
             modelSize=model_size,
             confThreshold=conf_threshold,
             targetClasses=target_classes,
             outputDir=output_dir,
+            model=model,
         )
     except Exception as e:
+        if model is not None:
+            _MODEL_POOL.release(model_size, model)
         logger.error("Failed to init YOLO detector for task {}: {}", task_id, e)
         _update_task_status(
             task_id,
@@ -500,43 +831,16 @@ def _process_single_task(task: Dict[str, Any]) -> None:
         )
         return
 
-    processed = 0
-    detected_total = 0
-
-    for file_path, file_name in files:
-        try:
-            sample = {
-                "image": file_path,
-                "filename": file_name,
-            }
-            result = detector.execute(sample)
-
-            annotations = (result or {}).get("annotations", {})
-            detections = annotations.get("detections", [])
-            detected_total += len(detections)
-            processed += 1
-
-            progress = int(processed * 100 / total_images) if total_images > 0 else 100
+    try:
+        processed, detected_total = _detect_files(task_id, detector, files, output_dir)
+    finally:
+        _MODEL_POOL.release(model_size, model)
 
-            _update_task_status(
-                task_id,
-                status="running",
-                progress=progress,
-                processed_images=processed,
-                detected_objects=detected_total,
-                total_images=total_images,
-                output_path=output_dir,
-            )
-        except Exception as e:
-            logger.error(
-                "Failed to process image for task {}: file_path={}, error={}",
-                task_id,
-                file_path,
-                e,
-            )
-            continue
+    if _LEASE_KEEPER.is_lost(task_id):
+        logger.warning("Abandon auto-annotation task {} because its lease was taken over", task_id)
+        return
 
-    _update_task_status(
+    if not _update_task_status(
         task_id,
         status="completed",
         progress=100,
@@ -545,7 +849,9 @@ def _process_single_task(task: Dict[str, Any]) -> None:
         total_images=total_images,
         output_path=output_dir,
         completed=True,
-    )
+    ):
+        logger.warning("Abandon auto-annotation task {} because its lease was taken over", task_id)
+        return
 
     logger.info(
         "Completed auto-annotation task: id={}, total_images={}, processed={}, detected_objects={}, output_path={}",
@@ -573,31 +879,50 @@ def _process_single_task(task: Dict[str, Any]) -> None:
             )
 
 
-def _worker_loop() -> None:
+def _worker_loop(worker_id: str) -> None:
     """Worker 主循环，在独立线程中运行。"""
 
     logger.info(
-        "Auto-annotation worker started with poll interval {} seconds, output root {}",
+        "Auto-annotation worker {} started with poll interval {} seconds, output root {}",
+        worker_id,
         POLL_INTERVAL_SECONDS,
         DEFAULT_OUTPUT_ROOT,
     )
 
     while True:
         try:
-            task = _fetch_pending_task()
+            _MODEL_POOL.evict_idle()
+            task = _claim_task(worker_id)
             if not task:
                 time.sleep(POLL_INTERVAL_SECONDS)
                 continue
 
-            _process_single_task(task)
+            task_id = str(task["id"])
+            _LEASE_KEEPER.hold(task_id, worker_id)
+            try:
+                _process_single_task(task)
+            except Exception as e:
+                # 直接标记失败，否则任务停留在 running，租约过期后被反复接管、反复失败
+                logger.exception("Auto-annotation task {} failed: {}", task_id, e)
+                _update_task_status(task_id, status="failed", error_message=f"Auto-annotation failed: {e}")
+            finally:
+                _LEASE_KEEPER.release(task_id)
         except Exception as e:  # pragma: no cover - 防御性日志
-            logger.error("Auto-annotation worker loop error: {}", e)
+            logger.error("Auto-annotation worker {} loop error: {}", worker_id, e)
             time.sleep(POLL_INTERVAL_SECONDS)
 
 
 def start_auto_annotation_worker() -> None:
     """在后台线程中启动自动标注 worker。"""
 
-    thread = threading.Thread(target=_worker_loop, name="auto-annotation-worker", daemon=True)
-    thread.start()
-    logger.info("Auto-annotation worker thread started: {}", thread.name)
+    _LEASE_KEEPER.start()
+    for index in range(WORKER_CONCURRENCY):
+        worker_id = f"{INSTANCE_ID}-{index}"
+        thread = threading.Thread(
+            target=_worker_loop,
+            args=(worker_id,),
+            name=f"auto-annotation-worker-{index}",
+            daemon=True,
+        )
+        thread.start()
+        logger.info("Auto-annotation worker thread started: {}, worker_id={}", thread.name, worker_id)
@@ -14,6 +14,16 @@ def check_valid_path(file_path):
     return os.path.exists(full_path)
 
 
+def rows_to_columns(rows, columns=None):
+    """将样本列表转换为按列组织的batch，列顺序保持columns在前、新增字段在后"""
+    columns = list(columns) if columns else []
+    for row in rows:
+        for key in row.keys():
+            if key not in columns:
+                columns.append(key)
+    return {column: [row.get(column) for row in rows] for column in columns}
+
+
 def get_realpath_with_prefix_check(path, prefix):
     realpath = os.path.realpath(path)
 
@@ -1,20 +1,193 @@
 # -- encoding: utf-8 --
+import hashlib
+import os
+import pickle
+import re
+import stat
+import tempfile
+from array import array
 from collections import deque
+from typing import Dict, Iterable, List, Optional
 
+FREE = -1  # 双数组中未占用的位置
+ROOT = 0  # 根节点位置
+MAX_PROBES = 32  # 为节点查找base时的最大尝试次数
+CACHE_VERSION = "1"  # 编译结果格式变化时递增，使磁盘缓存失效
 
-class TrieNode:
-    def __init__(self, value):
-        self.value = value
-        self.child = dict()
-        self.fail = None
-        self.word = None
+# 进程内已编译的自动机，同一词表只构建一次
+_AUTOMATON_CACHE: Dict[str, "AhoCorasic"] = {}
+
+
+def _private_cache_dir() -> Optional[str]:
+    """
+    返回仅当前用户可访问的缓存目录，不满足时返回None，不使用磁盘缓存。
+    缓存文件以pickle加载，目录必须为当前用户所有、非符号链接且组和其他用户无任何权限，防止被替换为恶意文件。
+    """
+    cache_dir = os.getenv("AC_CACHE_DIR", os.path.join(tempfile.gettempdir(), f"datamate_ac_{os.getuid()}"))
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        st = os.lstat(cache_dir)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return cache_dir
 
 
 class AhoCorasic:
-    """AC自动机算法进行目标字符串搜索"""
+    """
+    AC自动机算法进行目标字符串搜索。
+    前缀树以双数组（base/check）存储，失败指针和词尾标记为同长度的整型数组，
+    字符先映射为连续编码，状态转移只需数组下标访问，不再为每个节点创建对象和字典。
+    """
+
+    def __init__(self, words: Iterable[str]):
+        words = sorted({word for word in words if word})
+        self.codes = {ch: code for code, ch in enumerate(sorted({ch for word in words for ch in word}), start=1)}
+        self.base = array('i', [1])
+        self.check = array('i', [-2])
+        self.fail = array('i', [FREE])
+        self.is_word = array('b', [0])
+        self._patterns = {}
+        self._build(words)
+
+    @classmethod
+    def get_automaton(cls, words: Iterable[str]) -> "AhoCorasic":
+        """
+        获取词表对应的自动机：进程内缓存，并以词表哈希为键缓存到当前用户私有的AC_CACHE_DIR，
+        同一节点上的其他actor直接加载编译结果，无需重复构建。
+        """
+        words = sorted(set(words))
+        key = hashlib.sha1(("\n".join(words) + CACHE_VERSION).encode("utf-8")).hexdigest()
+        if key in _AUTOMATON_CACHE:
+            return _AUTOMATON_CACHE[key]
+
+        cache_dir = _private_cache_dir()
+        cache_path = os.path.join(cache_dir, key + ".pkl") if cache_dir else None
+        automaton = None
+        if cache_path:
+            try:
+                with open(cache_path, "rb") as f:
+                    automaton = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+        if not isinstance(automaton, cls):
+            automaton = cls(words)
+            if cache_path:
+                cls._save_cache(automaton, cache_dir, cache_path)
+        _AUTOMATON_CACHE[key] = automaton
+        return automaton
 
-    def __init__(self, words):
-        self._root = add_fail_pointer(build_trie(words))
+    @staticmethod
+    def _save_cache(automaton: "AhoCorasic", cache_dir: str, cache_path: str):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(automaton, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
+    def __getstate__(self):
+        # 正则按调用时的特殊字符集合生成，不随编译结果缓存
+        state = self.__dict__.copy()
+        state["_patterns"] = {}
+        return state
+
+    def _ensure_size(self, size: int):
+        if size > len(self.check):
+            grow = max(size, 2 * len(self.check)) - len(self.check)
+            self.base.extend([0] * grow)
+            self.check.extend([FREE] * grow)
+            self.fail.extend([FREE] * grow)
+            self.is_word.extend([0] * grow)
+
+    def _build(self, words: List[str]):
+        """先构建临时字典前缀树，再按层序为每个节点选择base，使其所有子节点落在空闲位置"""
+        trie = [{}]
+        word_end = [False]
+        for word in words:
+            node = 0
+            for ch in word:
+                code = self.codes[ch]
+                if code not in trie[node]:
+                    trie[node][code] = len(trie)
+                    trie.append({})
+                    word_end.append(False)
+                node = trie[node][code]
+            word_end[node] = True
+
+        position = {0: ROOT}
+        first_free = 1
+        end = 1  # 已占用位置的上界
+        queue = deque([0])
+        while queue:
+            node = queue.popleft()
+            children = sorted(trie[node])
+            if not children:
+                continue
+            while first_free < len(self.check) and self.check[first_free] != FREE:
+                first_free += 1
+            # 从首个空闲位置开始查找，保证base不小于1；多次冲突后直接放到数组末尾，避免构建时间随字符集增长
+            candidate = max(first_free, children[0] + 1)
+            for _ in range(MAX_PROBES):
+                base = candidate - children[0]
+                self._ensure_size(base + children[-1] + 1)
+                if all(self.check[base + code] == FREE for code in children):
+                    break
+                candidate += 1
+            else:
+                base = max(end - children[0], 1)
+                self._ensure_size(base + children[-1] + 1)
+            end = max(end, base + children[-1] + 1)
+            state = position[node]
+            self.base[state] = base
+            for code in children:
+                child = trie[node][code]
+                self.check[base + code] = state
+                self.is_word[base + code] = word_end[child]
+                position[child] = base + code
+                queue.append(child)
+        # 去掉扩容时多分配的尾部
+        for values in (self.base, self.check, self.fail, self.is_word):
+            del values[end:]
+        self._add_fail_pointer(trie, position)
+
+    def _add_fail_pointer(self, trie, position):
+        """按层序计算失败指针：根的子节点指向根，其余节点沿父节点的失败指针查找相同字符的子节点"""
+        queue = deque([0])
+        while queue:
+            node = queue.popleft()
+            state = position[node]
+            for code, child in trie[node].items():
+                child_state = position[child]
+                queue.append(child)
+                if state == ROOT:
+                    self.fail[child_state] = ROOT
+                    continue
+                fail_state = self.fail[state]
+                while fail_state != FREE and self._goto(fail_state, code) == FREE:
+                    fail_state = self.fail[fail_state]
+                self.fail[child_state] = ROOT if fail_state == FREE else self._goto(fail_state, code)
+
+    def _goto(self, state: int, code: int) -> int:
+        target = self.base[state] + code
+        if target < len(self.check) and self.check[target] == state:
+            return target
+        return FREE
+
+    def _segments(self, text: str, special_symbols: set):
+        """
+        词表外的字符会使自动机回到根节点，按此切分文本，只遍历由词表字符和特殊字符组成的片段，
+        片段用正则一次扫描得到，普通文本中大部分字符无需逐个处理。
+        """
+        key = frozenset(special_symbols)
+        pattern = self._patterns.get(key)
+        if pattern is None:
+            chars = "".join(sorted(set(self.codes) | {symbol for symbol in key if len(symbol) == 1}))
+            pattern = re.compile("[" + "".join(re.escape(ch) for ch in chars) + "]+") if chars else None
+            self._patterns[key] = pattern
+        return pattern.finditer(text) if pattern else ()
 
     def search(self, text: str, special_symbols: set):
         """
@@ -26,90 +199,86 @@ class AhoCorasic:
         Returns:
             匹配成功的字符串列表
         """
-        seq_list = []
-        node = self._root
-
-        valid_len = 0  # 当前遍历的有效长度
-        for i, s in enumerate(text):
-            if s in special_symbols:  # 跳过特殊字符
-                if valid_len != 0:
-                    valid_len += 1
-                continue
+        seq_list = set()
+        codes, base, check, fail, is_word = self.codes, self.base, self.check, self.fail, self.is_word
+        size = len(check)
+        for segment in self._segments(text, special_symbols):
+            segment = segment.group()
+            state = ROOT
+            valid_len = 0  # 当前遍历的有效长度
+            for i, s in enumerate(segment):
+                if s in special_symbols:  # 跳过特殊字符
+                    if valid_len != 0:
+                        valid_len += 1
+                    continue
 
-            matched = True
-            while s not in node.child:  # 当node.child没有字符s
-                if node == self._root:  # 当node为root（无node.fail），有效长度归0且跳出
-                    valid_len = 0
-                    matched = False
-                    break
-                elif node.fail == self._root:  # node.fail为root场景，有效长度归0，但可继续
-                    valid_len = 0
-                node = node.fail  # 移动到失败指针节点
-            if not matched:
-                continue
+                code = codes[s]
+                while True:
+                    target = base[state] + code
+                    if target < size and check[target] == state:
+                        break
+                    if state == ROOT:  # 根节点无法转移，有效长度归0且跳出
+                        valid_len = 0
+                        target = FREE
+                        break
+                    if fail[state] == ROOT:  # 失败指针为根节点，有效长度归0，但可继续
+                        valid_len = 0
+                    state = fail[state]  # 移动到失败指针节点
+                if target == FREE:
+                    continue
 
-            node = node.child.get(s)
-            valid_len += 1
-            if node.word:  # node是单词尾字母
-                sensitive_word = text[i - valid_len + 1:i + 1]
-                seq_list.append(sensitive_word)
-        seq_list = list(set(seq_list))
-        return seq_list
+                state = target
+                valid_len += 1
+                if is_word[state]:  # 当前状态是单词尾字母
+                    seq_list.add(segment[i - valid_len + 1:i + 1])
+        return list(seq_list)
 
+    def search_and_count(self, text: str, special_symbols: set) -> int:
+        """
+        匹配敏感词，统计敏感词字数。
 
-def build_trie(words: list):
-    """
-    构建前缀树。
+        Args:
+            text: 文本
+            special_symbols: 特殊字符（需跳过）
+        Returns:
+            统计敏感词字数
+        """
+        target_count = 0
+        codes, base, check, fail, is_word = self.codes, self.base, self.check, self.fail, self.is_word
+        size = len(check)
+        for segment in self._segments(text, special_symbols):
+            state = ROOT
+            valid_len = 0  # 当前遍历的有效长度
+            for s in segment.group():
+                if s in special_symbols:  # 跳过特殊字符
+                    continue
 
-    Args:
-        words: 敏感词列表。
-    Returns:
-        前缀树根节点。
-    """
-    root = TrieNode('root')
-    for word in words:
-        node = root
-        for s in word:
-            if s not in node.child:
-                node.child[s] = TrieNode(s)
-            node = node.child[s]
-        if not node.word:
-            node.word = {word}
-        else:
-            node.word.add(word)
-    return root
-
-
-def add_fail_pointer(root: TrieNode):
-    """
-    为前缀树添加失败指针。
-    步骤：
-    1. 从root开始逐层将node和node.parent以二元组存放队列。root没有fail指针，root.child的失败指针即为root。
-    2. 对于root和root.child以外的node，查询node.parent.fail.child。
-    3. 如果存在node.parent.fail.child.value == node.value，则构建node.fail = node.parent.fail.child.value。
-
-    Args:
-        root: 前缀树根节点。
-    returns:
-        添加失败指针后的前缀树根节点。
-    """
-    queue = deque()
-    queue.appendleft((root, None))
-    while len(queue) > 0:
-        node_parent = queue.pop()
-        curr, parent = node_parent[0], node_parent[1]
-        for sub in curr.child.values():
-            queue.appendleft((sub, curr))
-        if parent is None:
-            continue
-        elif parent is root:
-            curr.fail = root
-        else:
-            parent_fail = parent.fail
-            while parent_fail and curr.value not in parent_fail.child:
-                parent_fail = parent_fail.fail
-            if parent_fail:
-                curr.fail = parent_fail.child[curr.value]
-            else:
-                curr.fail = root
-    return root
+                code = codes[s]
+                while True:
+                    target = base[state] + code
+                    if target < size and check[target] == state:
+                        break
+                    if state == ROOT:
+                        valid_len = 0
+                        target = FREE
+                        break
+                    if fail[state] == ROOT:
+                        valid_len = 0
+                    state = fail[state]
+                if target == FREE:
+                    continue
+
+                state = target
+                valid_len += 1
+                if is_word[state]:
+                    target_count += valid_len
+                    valid_len = 0
+        return target_count
+
+    def search_batch(self, texts: Iterable[str], special_symbols: set) -> List[List[str]]:
+        """批量匹配多个文本，返回每个文本的匹配结果"""
+        return [self.search(text, special_symbols) for text in texts]
+
+    def count_batch(self, texts: Iterable[str], special_symbols: set) -> List[int]:
+        """批量统计多个文本的敏感词字数"""
+        return [self.search_and_count(text, special_symbols) for text in texts]
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import codecs
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+from loguru import logger
+
+# 需要经过unstructured解析的文档格式
+PARTITION_FILE_TYPES = ["ppt", "pptx", "docx", "doc", "xlsx", "pdf"]
+# 直接按utf-8解码的纯文本格式
+PLAIN_FILE_TYPES = ["txt", "md", "markdown", "csv", "xml", "html", "json", "jsonl"]
+IMAGE_FILE_TYPES = ["jpg", "jpeg", "png", "bmp"]
+
+
+def read_plain_text(filepath, chunk_size=1024 * 1024) -> str:
+    """分块流式解码纯文本文件，统一换行符为\\n"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    parts = []
+    pending_cr = ""
+    with open(filepath, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            final = not chunk
+            text = pending_cr + decoder.decode(chunk, final=final)
+            # \r\n可能被分块截断，末尾的\r留到下一块处理
+            pending_cr = ""
+            if not final and text.endswith("\r"):
+                text, pending_cr = text[:-1], "\r"
+            parts.append(text.replace("\r\n", "\n"))
+            if final:
+                break
+    return "".join(parts)
+
+
+def partition_text(filepath) -> str:
+    """使用unstructured解析文档并拼接为文本"""
+    from unstructured.partition.auto import partition
+
+    elements = partition(filename=filepath)
+    return "\n\n".join([str(el) for el in elements])
+
+
+class ExtractCache:
+    """
+    文档解析结果缓存，以(文件路径, 修改时间, 文件大小)为键，文件未变化时直接复用上次的解析结果。
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _cache_path(self, filepath) -> str:
+        stat = os.stat(filepath)
+        key = f"{os.path.abspath(filepath)}:{stat.st_mtime_ns}:{stat.st_size}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".txt")
+
+    def get(self, filepath) -> Optional[str]:
+        cache_path = self._cache_path(filepath)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError as e:
+            logger.warning(f"read extract cache {cache_path} failed: {e}")
+            return None
+
+    def put(self, filepath, text: str):
+        cache_path = self._cache_path(filepath)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # 先写临时文件再原子替换，避免并发写入时读到不完整的结果
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"write extract cache {cache_path} failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def get_extract_cache() -> Optional[ExtractCache]:
+    """EXTRACT_CACHE_DIR为空时不启用缓存"""
+    cache_dir = os.getenv("EXTRACT_CACHE_DIR", "/flow/.extract_cache")
+    if not cache_dir:
+        return None
+    try:
+        return ExtractCache(cache_dir)
+    except OSError as e:
+        logger.warning(f"init extract cache in {cache_dir} failed: {e}")
+        return None
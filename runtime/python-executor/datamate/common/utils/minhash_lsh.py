@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import ray
+from loguru import logger
+
+
+def _integrate(ys, xs):
+    return float(((ys[1:] + ys[:-1]) * np.diff(xs)).sum() / 2)
+
+
+def _false_positive_probability(threshold, bands, rows):
+    xs = np.linspace(0.0, threshold, 101)
+    return _integrate(1 - (1 - xs ** rows) ** bands, xs)
+
+
+def _false_negative_probability(threshold, bands, rows):
+    xs = np.linspace(threshold, 1.0, 101)
+    return _integrate(1 - (1 - (1 - xs ** rows) ** bands), xs)
+
+
+def optimal_param(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """选取使假阳性与假阴性概率之和最小的(band数, 每个band的行数)"""
+    min_error = float("inf")
+    best = (num_perm, 1)
+    for bands in range(1, num_perm + 1):
+        max_rows = num_perm // bands
+        for rows in range(1, max_rows + 1):
+            error = (_false_positive_probability(threshold, bands, rows)
+                     + _false_negative_probability(threshold, bands, rows))
+            if error < min_error:
+                min_error = error
+                best = (bands, rows)
+    return best
+
+
+class MinHashLSHIndex:
+    """
+    MinHash LSH分桶索引。签名以uint64数组连续存储，查询时只对同桶候选计算Jaccard相似度，
+    复杂度与候选数相关而非与已索引的文档总数相关。
+    """
+
+    def __init__(self, threshold: float, num_perm: int = 128):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = optimal_param(threshold, num_perm) if threshold > 0 else (num_perm, 1)
+        self.tables: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self.signatures = np.empty((1024, num_perm), dtype=np.uint64)
+        self.keys: List[str] = []
+        self.positions: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _band_keys(self, hashvalues: np.ndarray):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, hashvalues[start:start + self.rows].tobytes()
+
+    def insert(self, key: str, hashvalues: np.ndarray):
+        index = len(self.keys)
+        if index >= len(self.signatures):
+            self.signatures = np.concatenate([self.signatures, np.empty_like(self.signatures)])
+        self.signatures[index] = hashvalues
+        self.keys.append(key)
+        self.positions[key] = index
+        for band, band_key in self._band_keys(hashvalues):
+            self.tables[band].setdefault(band_key, []).append(index)
+
+    def candidates(self, hashvalues: np.ndarray) -> np.ndarray:
+        result = set()
+        for band, band_key in self._band_keys(hashvalues):
+            result.update(self.tables[band].get(band_key, ()))
+        return np.fromiter(result, dtype=np.int64, count=len(result))
+
+    def query(self, hashvalues: np.ndarray, key: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """
+        返回相似度不低于阈值且最相似的已索引文档(key, 相似度)，不存在时返回None。
+        传入key时排除该文档自身，重试或重复提交同一文档时不会与自己匹配。
+        """
+        hashvalues = np.asarray(hashvalues, dtype=np.uint64)
+        if not self.keys:
+            return None
+        candidates = np.arange(len(self.keys)) if self.threshold <= 0 else self.candidates(hashvalues)
+        if key in self.positions:
+            candidates = candidates[candidates != self.positions[key]]
+        if not len(candidates):
+            return None
+        similarity = (self.signatures[candidates] == hashvalues).mean(axis=1)
+        best = int(np.argmax(similarity))
+        if similarity[best] >= self.threshold:
+            return self.keys[candidates[best]], float(similarity[best])
+        return None
+
+    def query_and_insert(self, key: str, hashvalues) -> Optional[Tuple[str, float]]:
+        """存在其它相似文档时返回该文档，否则将当前文档加入索引，已索引的文档不重复加入"""
+        hashvalues = np.asarray(hashvalues, dtype=np.uint64)
+        similar = self.query(hashvalues, key)
+        if similar is None and key not in self.positions:
+            self.insert(key, hashvalues)
+        return similar
+
+
+@ray.remote(num_cpus=0)
+class SharedMinHashLSHIndex:
+    """
+    供同一任务的多个actor共享的LSH索引，actor内的调用串行执行，先到达的文档作为保留文档。
+    任务结束时由执行器调用release_shared_lsh_index释放，长时间无访问时也会自动退出作为兜底。
+    """
+
+    def __init__(self, threshold: float, num_perm: int = 128, idle_timeout: float = 600):
+        self.index = MinHashLSHIndex(threshold, num_perm)
+        self.idle_timeout = idle_timeout
+        self.last_access = time.time()
+        threading.Thread(target=self._exit_when_idle, daemon=True).start()
+
+    def query_and_insert(self, key: str, hashvalues) -> Optional[Tuple[str, float]]:
+        self.last_access = time.time()
+        return self.index.query_and_insert(key, hashvalues)
+
+    def size(self) -> int:
+        return len(self.index)
+
+    def _exit_when_idle(self):
+        while time.time() - self.last_access < self.idle_timeout:
+            time.sleep(min(60.0, self.idle_timeout))
+        logger.info(f"LSH index idle for {self.idle_timeout}s with {len(self.index)} documents, exit.")
+        ray.kill(ray.get_runtime_context().current_actor)
+
+
+def lsh_index_name(instance_id: str) -> str:
+    return f"minhash_lsh_{instance_id}"
+
+
+def get_shared_lsh_index(instance_id: str, threshold: float, num_perm: int = 128):
+    """获取（不存在时创建）任务共享的LSH索引actor"""
+    return SharedMinHashLSHIndex.options(name=lsh_index_name(instance_id), get_if_exists=True,
+                                         lifetime="detached").remote(threshold, num_perm)
+
+
+def release_shared_lsh_index(instance_id: str):
+    """任务结束时释放共享的LSH索引actor，任务未使用该索引时不做处理"""
+    try:
+        actor = ray.get_actor(lsh_index_name(instance_id))
+    except ValueError:
+        return
+    ray.kill(actor)
+    logger.info(f"LSH index of task {instance_id} released.")
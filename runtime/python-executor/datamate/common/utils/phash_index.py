@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, List
+
+import numpy as np
+
+# 0~255每个字节中1的个数，用于按字节查表计算popcount
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def hamming_distances(hashes: np.ndarray, value: int) -> np.ndarray:
+    """计算uint64哈希数组与value的汉明距离"""
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    return _POPCOUNT_TABLE[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class PHashIndex:
+    """
+    64位pHash的内存索引。哈希以uint64数组连续存储，查询时一次向量化计算与全部哈希的汉明距离，
+    每条哈希可附带任意数据（如ORB描述符），供候选图片的精细比较使用。
+    """
+
+    def __init__(self):
+        self.hashes = np.empty(1024, dtype=np.uint64)
+        self.items: List[Any] = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, p_hash: int, item: Any):
+        index = len(self.items)
+        if index >= len(self.hashes):
+            self.hashes = np.concatenate([self.hashes, np.empty_like(self.hashes)])
+        self.hashes[index] = p_hash
+        self.items.append(item)
+
+    def search(self, p_hash: int, max_distance: int) -> List[Any]:
+        """返回汉明距离不超过max_distance的条目，按距离升序排列"""
+        if not self.items:
+            return []
+        distances = hamming_distances(self.hashes[:len(self.items)], p_hash)
+        candidates = np.nonzero(distances <= max_distance)[0]
+        candidates = candidates[np.argsort(distances[candidates], kind="stable")]
+        return [self.items[index] for index in candidates]
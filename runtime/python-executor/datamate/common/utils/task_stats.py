@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from typing import Any, Dict
+
+from loguru import logger
+
+
+def get_task_stats_path(task_id) -> str:
+    return f"/flow/{task_id}/task_stats.json"
+
+
+def load_task_stats(task_id) -> Dict[str, Any]:
+    """读取执行器写入的任务统计信息，不存在时返回空字典"""
+    stats_path = get_task_stats_path(task_id)
+    if not os.path.exists(stats_path):
+        return {}
+    try:
+        with open(stats_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"load task stats from {stats_path} failed: {e}")
+        return {}
+
+
+def save_task_stats(task_id, key: str, value: Any):
+    """以key为分类合并写入任务统计信息"""
+    stats = load_task_stats(task_id)
+    stats[key] = value
+    stats_path = get_task_stats_path(task_id)
+    os.makedirs(os.path.dirname(stats_path), exist_ok=True)
+    tmp_path = stats_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False)
+    os.replace(tmp_path, stats_path)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import atexit
+import hashlib
+import multiprocessing
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+import jieba
+
+_initialized = False
+_pool = None
+# 进程内按文本摘要缓存的分词结果，同一actor中的多个算子处理未变化的文本时直接复用
+_token_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+
+
+def preload_jieba():
+    """在actor构造时加载jieba词典，避免首个样本承担加载耗时"""
+    global _initialized
+    if not _initialized:
+        jieba.initialize()
+        _initialized = True
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # Ray worker内含多个线程，使用spawn避免fork带来的死锁；子进程启动时加载词典
+        _pool = multiprocessing.get_context("spawn").Pool(int(os.getenv("JIEBA_WORKERS", "4")),
+                                                           initializer=jieba.initialize)
+        atexit.register(_close_pool)
+    return _pool
+
+
+def _close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+        _pool = None
+
+
+def _split_lines(text: str, chunk_size: int) -> List[str]:
+    """按行切分文本，jieba不会跨换行切词，切分后分词结果不变"""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start + chunk_size)
+        end = len(text) if end < 0 else end + 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def tokenize(text: str) -> List[str]:
+    """jieba精确模式分词，超过JIEBA_PARALLEL_THRESHOLD个字符的文本按行切分后由进程池并行分词"""
+    preload_jieba()
+    threshold = int(os.getenv("JIEBA_PARALLEL_THRESHOLD", str(1024 * 1024)))
+    if len(text) <= threshold:
+        return jieba.lcut(text)
+    tokens = []
+    for chunk_tokens in _get_pool().map(jieba.lcut, _split_lines(text, threshold // 4)):
+        tokens.extend(chunk_tokens)
+    return tokens
+
+
+def _text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get_sample_tokens(sample: Dict[str, Any], text_key: str = "text") -> List[str]:
+    """
+    获取样本文本的分词结果：按文本摘要在进程内缓存最近JIEBA_TOKEN_CACHE_SIZE个结果，
+    分词结果不写入样本，不随样本经object store传递。
+    """
+    text = sample.get(text_key) or ""
+    digest = _text_digest(text)
+    tokens = _token_cache.get(digest)
+    if tokens is not None:
+        _token_cache.move_to_end(digest)
+        return list(tokens)
+    tokens = tokenize(text)
+    _token_cache[digest] = tokens
+    while len(_token_cache) > int(os.getenv("JIEBA_TOKEN_CACHE_SIZE", "64")):
+        _token_cache.popitem(last=False)
+    return list(tokens)
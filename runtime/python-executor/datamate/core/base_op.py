@@ -1,23 +1,30 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
 import json
 import os
 import time
 import traceback
 import uuid
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 
 import cv2
 import numpy as np
+import ray
 from loguru import logger
-from unstructured.partition.auto import partition
 
 from datamate.common.error_code import ERROR_CODE_TABLE, UNKNOWN_ERROR_CODE
 from datamate.common.utils.llm_request import LlmReq
 from datamate.common.utils.registry import Registry
-from datamate.common.utils import check_valid_path
+from datamate.common.utils import bytes_transform, check_valid_path
+from datamate.common.utils.file_reader import (PARTITION_FILE_TYPES, PLAIN_FILE_TYPES, IMAGE_FILE_TYPES,
+                                               get_extract_cache, partition_text, read_plain_text)
 from datamate.core.constant import Fields
+from datamate.core.dedup import is_duplicated, sample_dedup_key
+from datamate.core.op_metrics import OpMetrics
+from datamate.core.result_cache import (chain_key, get_result_cache, hash_content, hash_file, op_params_signature,
+                                        op_version_signature)
 from datamate.sql_manager.persistence_atction import TaskInfoPersistence
 
 OPERATORS = Registry('Operators')
@@ -54,13 +61,32 @@ class BaseOp:
 
     use_model = False
     custom_ops = False
+    # 是否以批模式（map_batches）调度执行，实现了execute_batch的算子可置为True
+    use_batch = False
+    # 是否允许缓存算子结果，结果依赖其他文件或有外部副作用的算子需置为False
+    use_result_cache = True
+    # 执行时是否向磁盘写出文件，为True的算子不缓存结果，避免命中缓存时跳过落盘
+    writes_files = False
+    # 是否按文件路径自行解析源文件，为True的算子作为首个算子时跳过文档抽取阶段
+    parses_file = False
+    # 是否直接处理解码后的图片数组（load_image/store_image），为False时执行前先将图片数组编码为data
+    use_image_array = False
 
     def __init__(self, *args, **kwargs):
         self.accelerator = kwargs.get('accelerator', "cpu")
         self.is_last_op = kwargs.get('is_last_op', False)
         self.is_first_op = kwargs.get('is_first_op', False)
+        # 引用模式：样本在阶段之间只携带文件路径，内容在需要的actor中按需加载
+        self.lazy_content = kwargs.get('lazy_content', False)
+        self.is_stage_end = kwargs.get('is_stage_end', False)
         self._name = kwargs.get('op_name', None)
         self.infer_model = None
+        self._extract_cache = None
+        self._init_kwargs = kwargs
+        self._result_cache = None
+        self._cache_params = None
+        self._cache_version = None
+        self._metrics = None
         self.text_key = kwargs.get('text_key', "text")
         self.data_key = kwargs.get('data_key', "data")
         self.image_key = kwargs.get('image_key', "image")
@@ -130,15 +156,55 @@ class BaseOp:
         raise NotImplementedError("This is in BaseOp, plese re-define this method in Sub-classes")
 
     def fill_sample_params(self, sample: Dict[str, Any], **kwargs):
+        # 引用模式下内容已在上一阶段释放，统一在执行前重新加载，算子无需各自调用read_file_first
+        if sample.get(Fields.content_ref):
+            self.read_file(sample)
+
+        if not self.use_image_array:
+            self.encode_image(sample)
+
         if not sample.get(self.text_key, None):
             sample[self.text_key] = ""
 
         if not sample.get(self.data_key, None):
             sample[self.data_key] = b""
 
-        if not sample[self.data_key] and not sample[self.text_key]:
+        if (not sample[self.data_key] and not sample[self.text_key] and not sample.get(Fields.content_ref)
+                and not self.has_image_array(sample)):
             sample.update(kwargs)
 
+    @staticmethod
+    def has_image_array(sample: Dict[str, Any]) -> bool:
+        image = sample.get(Fields.image_array)
+        return isinstance(image, np.ndarray) and image.size > 0
+
+    def has_image(self, sample: Dict[str, Any]) -> bool:
+        """样本是否有图片：图片数组或未编码的data"""
+        return self.has_image_array(sample) or bool(sample.get(self.data_key))
+
+    def load_image(self, sample: Dict[str, Any]) -> np.ndarray:
+        """获取样本图片：优先使用上游算子传递的图片数组，否则解码data"""
+        if self.has_image_array(sample):
+            image = sample[Fields.image_array]
+            # 经object store传递的数组为只读的零拷贝视图，原地修改前需复制
+            return image if image.flags.writeable else image.copy()
+        return bytes_transform.bytes_to_numpy(sample[self.data_key])
+
+    def store_image(self, sample: Dict[str, Any], image: np.ndarray):
+        """
+        保存处理后的图片数组，不立即编码，同时释放原始data，样本只携带一份图片。
+        图片为空时数组和data均清空，样本被过滤。
+        """
+        sample[self.data_key] = b""
+        sample[Fields.image_array] = image if image is not None and image.size else None
+
+    def encode_image(self, sample: Dict[str, Any]):
+        """将图片数组编码为data，在落盘或交给不支持图片数组的算子前调用"""
+        if self.has_image_array(sample):
+            sample[self.data_key] = bytes_transform.numpy_to_bytes(sample[Fields.image_array],
+                                                                   "." + sample[self.filetype_key])
+        sample[Fields.image_array] = None
+
     def create_failure_sample(self, sample: Dict[str, Any], op_name, excp: BaseException):
         sample["execute_result"] = False
         error_code, exc_info = self._get_error_info(excp)
@@ -148,30 +214,167 @@ class BaseOp:
     def read_file(self, sample):
         filepath = sample[self.filepath_key]
         filetype = sample[self.filetype_key]
-        if filetype in ["ppt", "pptx", "docx", "doc", "xlsx", "csv", "md", "pdf"]:
-            elements = partition(filename=filepath)
-            sample[self.text_key] = "\n\n".join([str(el) for el in elements])
+        if filetype in PARTITION_FILE_TYPES:
+            sample[self.text_key] = self.extract_document(filepath)
+            sample[self.data_key] = b""
+        elif filetype in PLAIN_FILE_TYPES:
+            sample[self.text_key] = read_plain_text(filepath)
             sample[self.data_key] = b""
-        elif filetype in ["txt", "md", "markdown", "xml", "html", "json", "jsonl"]:
-            with open(filepath, 'rb') as f:
-                content = f.read()
-                sample[self.text_key] = content.decode("utf-8-sig").replace("\r\n", "\n")
-                sample[self.data_key] = b""
-        elif filetype in ['jpg', 'jpeg', 'png', 'bmp']:
-            image_np = cv2.imdecode(np.fromfile(filepath, dtype=np.uint8), -1)
+        elif filetype in IMAGE_FILE_TYPES:
+            image_np = cv2.imdecode(self._map_file(filepath), -1)
             if image_np.size:
                 data = cv2.imencode(f".{filetype}", image_np)[1]
                 image_bytes = data.tobytes()
                 sample[self.data_key] = image_bytes
                 sample[self.text_key] = ""
+        sample[Fields.content_ref] = False
+        if self.lazy_content:
+            sample[Fields.content_digest] = self._content_digest(sample)
         return sample
 
+    def extract_document(self, filepath):
+        """解析文档，文件未变化时复用缓存的解析结果"""
+        cache = self._get_extract_cache()
+        if cache:
+            text = cache.get(filepath)
+            if text is not None:
+                return text
+        text = partition_text(filepath)
+        if cache:
+            cache.put(filepath, text)
+        return text
+
+    def _get_extract_cache(self):
+        if self._extract_cache is None:
+            self._extract_cache = get_extract_cache() or False
+        return self._extract_cache
+
+    @staticmethod
+    def _map_file(filepath):
+        """以内存映射方式读取二进制文件，避免额外的整文件拷贝"""
+        if os.path.getsize(filepath) == 0:
+            return np.empty(0, dtype=np.uint8)
+        return np.memmap(filepath, dtype=np.uint8, mode='r')
+
     def read_file_first(self, sample):
-        if self.is_first_op:
+        if self.is_first_op or sample.get(Fields.content_ref):
             self.read_file(sample)
 
+    def _content_digest(self, sample):
+        if self.has_image_array(sample):
+            content = sample[Fields.image_array].tobytes()
+        elif sample[self.text_key]:
+            content = sample[self.text_key].encode('utf-8')
+        else:
+            content = bytes(sample[self.data_key])
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def release_content(self, sample):
+        """
+        引用模式下，在阶段的最后一个算子执行完成后调用：
+        内容与源文件加载结果一致时只保留文件引用，避免文件内容经过object store传递到下一阶段。
+        """
+        if not (self.lazy_content and self.is_stage_end) or self.is_last_op:
+            return
+        if sample.get(Fields.content_ref) or not sample.get(Fields.content_digest):
+            return
+        if self._content_digest(sample) == sample[Fields.content_digest]:
+            sample[self.text_key] = ""
+            sample[self.data_key] = b""
+            sample[Fields.content_ref] = True
+        else:
+            # 内容已被修改，后续阶段需要携带内容
+            sample[Fields.content_digest] = None
+
+    def _get_result_cache(self):
+        if self._result_cache is None:
+            cacheable = self.use_result_cache and not self.writes_files
+            self._result_cache = (get_result_cache() if cacheable else None) or False
+            if self._result_cache:
+                self._cache_params = op_params_signature(self._init_kwargs)
+                self._cache_version = op_version_signature(type(self))
+        return self._result_cache
+
+    def _result_cache_key(self, sample: Dict[str, Any]) -> str:
+        prev_key = sample.get(Fields.cache_key)
+        if not prev_key:
+            # 链的起点：内容已加载时取内容哈希，否则取源文件哈希
+            if sample.get(Fields.content_ref):
+                content = None
+            elif self.has_image_array(sample):
+                content = sample[Fields.image_array].tobytes()
+            else:
+                content = sample.get(self.text_key) or sample.get(self.data_key)
+            prev_key = hash_content(content) if content else hash_file(sample[self.filepath_key])
+        return chain_key(prev_key, self.name, self._cache_params, self._cache_version)
+
+    def _result_fields(self) -> Tuple[str, ...]:
+        """算子产出的字段，只有这些字段参与结果缓存"""
+        return (self.text_key, self.data_key, Fields.image_array, Fields.result, "failed_reason",
+                self.ext_params_key, self.target_type_key)
+
+    def sample_identity(self, sample: Dict[str, Any]) -> Tuple:
+        """样本对应的文件标识。内容相同的不同文件共享缓存条目，标识字段不能来自缓存"""
+        return tuple(sample.get(key) for key in (self.fileid_key, "sourceFileId", self.filename_key,
+                                                 self.filepath_key, self.filetype_key, self.filesize_key))
+
+    def load_cached_result(self, sample: Dict[str, Any]) -> bool:
+        """命中结果缓存时用缓存结果更新样本并返回True，此时无需执行算子"""
+        cache = self._get_result_cache()
+        if not cache:
+            return False
+        key = self._result_cache_key(sample)
+        sample[Fields.cache_key] = key
+        cached = cache.get(key)
+        if cached is None:
+            sample[Fields.cache_misses] = (sample.get(Fields.cache_misses) or 0) + 1
+            return False
+        sample.update({k: v for k, v in cached.items() if k in self._result_fields()})
+        sample[Fields.content_ref] = False
+        sample[Fields.content_digest] = None
+        sample[Fields.cache_hits] = (sample.get(Fields.cache_hits) or 0) + 1
+        return True
+
+    def store_cached_result(self, sample: Dict[str, Any], identity: Optional[Tuple] = None):
+        """
+        缓存算子产出的字段；identity为执行前的sample_identity，算子修改了文件标识时结果不可复用，不缓存。
+        不参与缓存的算子会中断缓存键链，后续算子以内容哈希重新起链。
+        """
+        cache = self._get_result_cache()
+        if not cache or not sample.get(Fields.cache_key) or identity != self.sample_identity(sample):
+            sample[Fields.cache_key] = None
+            return
+        cache.put(sample[Fields.cache_key], {k: sample.get(k) for k in self._result_fields() if k in sample})
+
+    def _sample_bytes(self, sample: Dict[str, Any]) -> int:
+        text = sample.get(self.text_key)
+        if text:
+            return len(text.encode('utf-8'))
+        if self.has_image_array(sample):
+            return sample[Fields.image_array].nbytes
+        data = sample.get(self.data_key)
+        return len(data) if data else 0
+
+    def record_metrics(self, sample: Dict[str, Any], start: float, bytes_in: int, samples_out=1, bytes_out=0,
+                       samples_in=1, failures=0):
+        """记录算子执行指标，任务id取自样本，ENABLE_OP_METRICS为false时不记录"""
+        if self._metrics is None:
+            task_id = sample.get(Fields.instance_id)
+            enabled = task_id and os.getenv("ENABLE_OP_METRICS", "true").lower() == "true"
+            self._metrics = OpMetrics(self.name, task_id) if enabled else False
+        if self._metrics:
+            self._metrics.record(time.time() - start, samples_in=samples_in, samples_out=samples_out,
+                                 bytes_in=bytes_in, bytes_out=bytes_out, failures=failures)
+
+    def flush_metrics(self):
+        """将本actor累计的执行指标写入任务目录，由调度方在每次调用结束时执行"""
+        if self._metrics:
+            self._metrics.flush()
+
     @staticmethod
     def save_file_and_db(sample):
+        if sample.get(Fields.content_ref):
+            FileExporter().read_file(sample)
         if FileExporter().execute(sample):
             TaskInfoPersistence().persistence_task_info(sample)
         return sample
@@ -186,10 +389,15 @@ class Mapper(BaseOp):
         if sample.get(Fields.result) is False:
             return sample
 
+        start = time.time()
+        bytes_in = self._sample_bytes(sample)
         self.fill_sample_params(sample, **kwargs)
         execute_status = FAILED_STATUS
         try:
-            sample = self.execute(sample)
+            if not self.load_cached_result(sample):
+                identity = self.sample_identity(sample)
+                sample = self.execute(sample)
+                self.store_cached_result(sample, identity)
             execute_status = SUCCESS_STATUS
         except Exception as e:
             # 算子执行失败，记录文件执行信息到数据库，并更该文件执行结果状态
@@ -200,18 +408,71 @@ class Mapper(BaseOp):
             sample[self.filesize_key] = "0"
             sample[self.filetype_key] = ""
             TaskInfoPersistence().update_task_result(sample)
+            self.record_metrics(sample, start, bytes_in, samples_out=0, failures=1)
             raise e
 
         sample["execute_status"] = execute_status
+        self.record_metrics(sample, start, bytes_in, bytes_out=self._sample_bytes(sample))
         # 加载文件成功执行信息到数据库
         if self.is_last_op:
             self.save_file_and_db(sample)
+        self.release_content(sample)
         return sample
 
+    def call_batch(self, samples: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+        """
+        批模式执行入口。未重写execute_batch的算子逐条调用__call__；
+        重写了execute_batch的算子整批执行，整批失败时回退为逐条执行以定位失败文件。
+        """
+        if type(self).execute_batch is Mapper.execute_batch:
+            return [self(sample, **kwargs) for sample in samples]
+
+        start = time.time()
+        done_index = []
+        todo_index = []
+        for i, sample in enumerate(samples):
+            if sample.get(Fields.result) is False:
+                continue
+            self.fill_sample_params(sample, **kwargs)
+            if self.load_cached_result(sample):
+                done_index.append(i)
+            else:
+                todo_index.append(i)
+        bytes_in = {i: self._sample_bytes(samples[i]) for i in done_index + todo_index}
+        identities = [self.sample_identity(samples[i]) for i in todo_index]
+        try:
+            # execute_batch作用于样本的浅拷贝，整批失败时原样本未被修改，可直接逐条重新执行
+            results = self.execute_batch([dict(samples[i]) for i in todo_index])
+        except Exception as e:
+            logger.warning(f"Ops named {self.name} batch map failed, fall back to single sample mode: {e}")
+            # 命中缓存的样本已得到结果，只逐条重新执行未命中的样本
+            for i in todo_index:
+                samples[i] = self(samples[i], **kwargs)
+            todo_index, results = [], []
+
+        run_index = done_index + todo_index
+        for i, sample, identity in zip(todo_index, results, identities):
+            self.store_cached_result(sample, identity)
+            samples[i] = sample
+        if run_index:
+            self.record_metrics(samples[run_index[0]], start, sum(bytes_in[i] for i in run_index),
+                                samples_in=len(run_index), samples_out=len(run_index),
+                                bytes_out=sum(self._sample_bytes(samples[i]) for i in run_index))
+        for i in run_index:
+            samples[i]["execute_status"] = SUCCESS_STATUS
+            if self.is_last_op:
+                self.save_file_and_db(samples[i])
+            self.release_content(samples[i])
+        return samples
+
     def execute(self, sample: Dict[str, Any]) -> Dict[str, Any]:
         """执行函数（子类实现）"""
         raise NotImplementedError("This is in Mapper Class, plese re-define this method in Sub-classes")
 
+    def execute_batch(self, samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量执行函数，默认逐条调用execute，可向量化的算子可重写"""
+        return [self.execute(sample) for sample in samples]
+
 
 class Slicer(BaseOp):
     def __init__(self, *args, **kwargs):
@@ -223,11 +484,14 @@ class Slicer(BaseOp):
         if sample.get(Fields.result) is False:
             return sample
 
+        start = time.time()
+        bytes_in = self._sample_bytes(sample)
         self.fill_sample_params(sample, **kwargs)
         sample_list = []
         execute_status = FAILED_STATUS
         try:
             sample_list = self.execute(sample)
+            sample[Fields.cache_key] = None
             execute_status = SUCCESS_STATUS
         except Exception as e:
             # 算子执行失败，记录文件执行信息到数据库，并更该文件执行结果状态
@@ -239,17 +503,30 @@ class Slicer(BaseOp):
             sample[self.filesize_key] = "0"
             sample[self.filetype_key] = ""
             TaskInfoPersistence().update_task_result(sample)
+            self.record_metrics(sample, start, bytes_in, failures=1)
             return [sample]
 
         self.load_sample_to_sample(sample, sample_list)
         sample["execute_status"] = execute_status
+        self.record_metrics(sample, start, bytes_in, bytes_out=self._sample_bytes(sample))
 
         # 加载文件成功执行信息到数据库
         if self.is_last_op:
             self.save_file_and_db(sample)
+        self.release_content(sample)
 
         return [sample]
 
+    def call_batch(self, samples: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+        """批模式执行入口，逐条调用__call__并展开输出，前序算子已失败的样本原样保留"""
+        outputs = []
+        for sample in samples:
+            if sample.get(Fields.result) is False:
+                outputs.append(sample)
+            else:
+                outputs.extend(self(sample, **kwargs))
+        return outputs
+
     @staticmethod
     def load_sample_to_sample(sample: Dict, sample_list: List[Dict]):
         """使用sample中的k-v更新sample"""
@@ -306,18 +583,30 @@ class Slicer(BaseOp):
 
 
 class Filter(BaseOp):
+    # 是否支持全局两阶段去重，置为True的算子需实现dedup_signature、dedup_buckets和is_duplicate
+    use_global_dedup = False
+
     def __init__(self, *args, **kwargs):
         super(Filter, self).__init__(*args, **kwargs)
+        # 全局去重得到的重复样本键哈希，不为空时按该结果过滤，不再逐条执行去重
+        self.dedup_duplicates = kwargs.get("dedup_duplicates", None)
 
     def __call__(self, sample: Dict[str, Any], **kwargs):
         # 该算子前已有算子执行该文件失败
         if sample.get(Fields.result) is False:
             return sample
 
+        start = time.time()
+        bytes_in = self._sample_bytes(sample)
         self.fill_sample_params(sample, **kwargs)
         execute_status = FAILED_STATUS
         try:
-            sample = self.execute(sample)
+            if self.dedup_duplicates is not None:
+                sample = self.execute_global_dedup(sample)
+            elif not self.load_cached_result(sample):
+                identity = self.sample_identity(sample)
+                sample = self.execute(sample)
+                self.store_cached_result(sample, identity)
             execute_status = SUCCESS_STATUS
         except Exception as e:
             # 如果filter算子过滤失败, 不保留文件， 并记录文件执行信息到数据库
@@ -328,11 +617,19 @@ class Filter(BaseOp):
             sample[self.filesize_key] = "0"
             sample[self.filetype_key] = ""
             TaskInfoPersistence().update_task_result(sample)
+            self.record_metrics(sample, start, bytes_in, samples_out=0, failures=1)
             raise e
 
         sample["execute_status"] = execute_status
-        # 文件无内容会被过滤
-        if sample[self.text_key] == "" and sample[self.data_key] == b"":
+        bytes_out = self._sample_bytes(sample)
+        keep = self._keep_sample(sample)
+        self.record_metrics(sample, start, bytes_in, samples_out=int(keep), bytes_out=bytes_out if keep else 0)
+        return keep
+
+    def _keep_sample(self, sample: Dict[str, Any]) -> bool:
+        # 文件无内容会被过滤，引用模式下未加载内容的样本不做判断
+        if (not sample.get(Fields.content_ref) and sample[self.text_key] == "" and sample[self.data_key] == b""
+                and not self.has_image_array(sample)):
             task_info = TaskInfoPersistence()
             sample[self.filesize_key] = "0"
             sample[self.filetype_key] = ""
@@ -342,14 +639,102 @@ class Filter(BaseOp):
         # 加载文件成功执行信息到数据库
         if self.is_last_op:
             self.save_file_and_db(sample)
+        self.release_content(sample)
         return True
 
+    def call_batch(self, samples: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+        """
+        批模式执行入口，返回保留的样本。未重写execute_batch的算子逐条调用__call__；
+        重写了execute_batch的算子整批执行，整批失败时回退为逐条执行以定位失败文件。
+        """
+        if type(self).execute_batch is Filter.execute_batch:
+            return [sample for sample in samples if self(sample, **kwargs)]
+
+        start = time.time()
+        skipped = set()
+        todo_index = []
+        for i, sample in enumerate(samples):
+            if sample.get(Fields.result) is False:
+                skipped.add(i)
+                continue
+            self.fill_sample_params(sample, **kwargs)
+            if not self.load_cached_result(sample):
+                todo_index.append(i)
+        bytes_in = {i: self._sample_bytes(sample) for i, sample in enumerate(samples) if i not in skipped}
+        identities = [self.sample_identity(samples[i]) for i in todo_index]
+        # 回退为逐条执行的样本及其是否保留，由__call__自行记录执行结果和指标
+        fallback_keep = {}
+        try:
+            # execute_batch作用于样本的浅拷贝，整批失败时原样本未被修改，可直接逐条重新执行
+            results = self.execute_batch([dict(samples[i]) for i in todo_index])
+        except Exception as e:
+            logger.warning(f"Ops named {self.name} batch filter failed, fall back to single sample mode: {e}")
+            # 命中缓存的样本已得到结果，只逐条重新执行未命中的样本
+            fallback_keep = {i: self(samples[i], **kwargs) for i in todo_index}
+            todo_index, results = [], []
+
+        for i, sample, identity in zip(todo_index, results, identities):
+            self.store_cached_result(sample, identity)
+            samples[i] = sample
+        # 按输入顺序输出保留的样本，前序算子已失败的样本原样保留
+        kept = []
+        run_index = []
+        bytes_out = 0
+        for i, sample in enumerate(samples):
+            if i in skipped or fallback_keep.get(i):
+                kept.append(sample)
+                continue
+            if i in fallback_keep:
+                continue
+            run_index.append(i)
+            sample["execute_status"] = SUCCESS_STATUS
+            sample_bytes = self._sample_bytes(sample)
+            if self._keep_sample(sample):
+                kept.append(sample)
+                bytes_out += sample_bytes
+        if run_index:
+            kept_count = len(kept) - len(skipped) - sum(1 for keep in fallback_keep.values() if keep)
+            self.record_metrics(samples[run_index[0]], start, sum(bytes_in[i] for i in run_index),
+                                samples_in=len(run_index), samples_out=kept_count, bytes_out=bytes_out)
+        return kept
+
     def execute(self, sample: Dict[str, Any]) -> Dict[str, Any]:
         """执行函数（子类实现）"""
         raise NotImplementedError("This is in Filter Class, plese re-define this method in Sub-classes")
 
+    def execute_global_dedup(self, sample: Dict[str, Any]) -> Dict[str, Any]:
+        """全局去重的第二阶段：非保留样本清空内容，由_keep_sample过滤"""
+        if isinstance(self.dedup_duplicates, ray.ObjectRef):
+            self.dedup_duplicates = ray.get(self.dedup_duplicates)
+        if is_duplicated(self.dedup_duplicates, sample_dedup_key(self, sample)):
+            logger.info(f"fileName: {sample[self.filename_key]}, method: {self.name}. "
+                        f"The file is duplicated and filtered.")
+            sample[self.text_key] = ""
+            sample[self.data_key] = b""
+            sample[Fields.image_array] = None
+            sample[Fields.content_ref] = False
+        return sample
+
+    def dedup_signature(self, sample: Dict[str, Any]) -> Optional[bytes]:
+        """计算样本签名，无需参与去重时返回None（全局去重算子实现）"""
+        raise NotImplementedError("This is in Filter Class, plese re-define this method in Sub-classes")
+
+    def dedup_buckets(self, signature: bytes) -> List[bytes]:
+        """返回签名的分桶键，只有同桶样本才会被比较（全局去重算子实现）"""
+        raise NotImplementedError("This is in Filter Class, plese re-define this method in Sub-classes")
+
+    def is_duplicate(self, signature: bytes, signature_history: bytes) -> bool:
+        """判断两个签名对应的样本是否重复（全局去重算子实现）"""
+        raise NotImplementedError("This is in Filter Class, plese re-define this method in Sub-classes")
+
+    def execute_batch(self, samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量执行函数，默认逐条调用execute，可向量化的算子可重写"""
+        return [self.execute(sample) for sample in samples]
+
 
 class LLM(Mapper):
+    use_result_cache = False
+
     def __init__(self, *args, **kwargs):
         super(LLM, self).__init__(*args, **kwargs)
         self.llm = self.get_llm(*args, **kwargs)
@@ -434,6 +819,8 @@ class FileExporter(BaseOp):
         self.medical_support_ext = kwargs.get("medical_support_ext", ['svs', 'tif', 'tiff'])
 
     def execute(self, sample: Dict[str, Any]):
+        # 图片只在落盘时编码一次
+        self.encode_image(sample)
         file_name = sample[self.filename_key]
         file_type = sample[self.filetype_key]
 
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pyarrow as pa
+import ray
+from loguru import logger
+from ray import data as rd
+from sqlalchemy import text
+
+from datamate.core.hashing import hash_ids
+from datamate.sql_manager.persistence_atction import TaskInfoPersistence
+from datamate.sql_manager.sql_manager import SQLManager
+
+
+class CompletedFileSkipper:
+    """在每个actor中只加载一次已完成文件的哈希集合，按批过滤已处理过的文件"""
+
+    def __init__(self, completed_ref, id_column):
+        self.completed = ray.get(completed_ref)
+        self.id_column = id_column
+
+    def __call__(self, batch: pa.Table) -> pa.Table:
+        if self.id_column not in batch.column_names or not len(batch):
+            return batch
+        hashes = hash_ids(batch.column(self.id_column).to_pylist())
+        index = np.searchsorted(self.completed, hashes)
+        index[index >= len(self.completed)] = 0
+        done = self.completed[index] == hashes
+        return batch.filter(pa.array(~done))
+
+
+class Checkpointer:
+    """
+    断点续跑：t_clean_result中已记录结果的源文件视为已完成，重新提交同一任务时跳过这些文件。
+    """
+
+    def __init__(self, instance_id, id_column="sourceFileId"):
+        self.instance_id = instance_id
+        self.id_column = id_column
+        self.sql_dict = TaskInfoPersistence.load_sql_dict()
+
+    def load_completed(self) -> np.ndarray:
+        query_sql = str(self.sql_dict.get("query_completed_file_sql"))
+        with SQLManager.create_connect() as conn:
+            rows = conn.execute(text(query_sql), {"instance_id": self.instance_id}).fetchall()
+        return np.unique(hash_ids(row[0] for row in rows))
+
+    def skip_completed(self, dataset: rd.Dataset) -> rd.Dataset:
+        completed = self.load_completed()
+        if not len(completed):
+            return dataset
+        logger.info(f"instance_id: {self.instance_id}, resume from checkpoint, "
+                    f"skip {len(completed)} completed files.")
+        return dataset.map_batches(CompletedFileSkipper,
+                                   fn_constructor_kwargs={"completed_ref": ray.put(completed),
+                                                          "id_column": self.id_column},
+                                   batch_format="pyarrow",
+                                   num_cpus=0.05,
+                                   compute=rd.ActorPoolStrategy(min_size=1, max_size=4))
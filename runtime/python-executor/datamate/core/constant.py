@@ -4,5 +4,12 @@ class Fields(object):
     result = 'execute_result'
     instance_id = 'instance_id'
     export_path = 'export_path'
-
-
+    # 为True时样本不携带文件内容，由需要内容的算子按filePath重新加载
+    content_ref = 'content_ref'
+    content_digest = 'content_digest'
+    # 算子结果缓存的链式键及命中统计
+    cache_key = 'cache_key'
+    cache_hits = 'cache_hits'
+    cache_misses = 'cache_misses'
+    # 图片算子之间传递的解码后图片数组，存在时data为空，落盘或交给不支持数组的算子前再编码
+    image_array = 'image_array'
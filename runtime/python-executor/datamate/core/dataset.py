@@ -13,8 +13,12 @@ from enum import Enum
 from loguru import logger
 from ray import data as rd
 
+from datamate.common.utils import rows_to_columns
 from datamate.core.base_op import Filter, Mapper, Slicer
 from datamate.core.constant import Fields
+from datamate.core.dedup import global_dedup, supports_global_dedup
+from datamate.core.extractor import DocumentExtractor
+from datamate.sql_manager.persistence_atction import TaskInfoPersistence
 from datamate.core.base_op import OPERATORS, BaseOp
 
 from core.base_op import Filter as RELATIVE_Filter, Mapper as RELATIVE_Mapper, Slicer as RELATIVE_Slicer
@@ -83,6 +87,33 @@ def preprocess_dataset(dataset: rd.Dataset, cfg) -> rd.Dataset:
     return dataset
 
 
+class FusedOp:
+    """
+    融合算子：在同一个actor内按顺序执行一组算子（单个算子，或若干CPU Mapper及其后紧跟的Filter），
+    通过map_batches整批调度，样本在算子间无需经过object store。
+    每个算子调用call_batch处理一批样本，未实现execute_batch的算子由call_batch逐条适配。
+    """
+
+    def __init__(self, operators_cls_list, init_kwargs_list):
+        self.ops = [operators_cls(**init_kwargs)
+                    for operators_cls, init_kwargs in zip(operators_cls_list, init_kwargs_list)]
+
+    def __call__(self, batch: pa.Table, **kwargs):
+        samples = batch.to_pylist()
+        # 整批样本的执行结果在本批返回前批量落库
+        try:
+            with TaskInfoPersistence.write_batch():
+                for op in self.ops:
+                    if not samples:
+                        break
+                    samples = op.call_batch(samples, **kwargs)
+        finally:
+            # actor池回收时直接结束进程，指标在每次调用结束时写出
+            for op in self.ops:
+                op.flush_metrics()
+        return rows_to_columns(samples, batch.column_names)
+
+
 class RayDataset(BasicDataset):
 
     def __init__(self,
@@ -99,6 +130,10 @@ class RayDataset(BasicDataset):
                 checkpointer=None,
                 **kwargs) -> BasicDataset:
 
+        # 断点续跑，跳过已完成的文件
+        if checkpointer is not None:
+            self.data = checkpointer.skip_completed(self.data)
+
         # 从注册器加载类
         operators_cls_list = []
         init_kwargs_list = []
@@ -119,10 +154,102 @@ class RayDataset(BasicDataset):
             init_kwargs["instance_id"] = kwargs.get("instance_id", str(uuid.uuid4()))
             init_kwargs_list.append(init_kwargs)
 
-        for cls_id, operators_cls in enumerate(operators_cls_list):
-            self._run_single_op(operators_cls, init_kwargs_list[cls_id], **kwargs)
+        lazy_content = os.getenv("LAZY_FILE_LOADING", "false").lower() == "true"
+        if (init_kwargs_list and os.getenv("ENABLE_EXTRACT_STAGE", "true").lower() == "true"
+                and not getattr(operators_cls_list[0], "parses_file", False)):
+            self._run_extract_stage(lazy_content, **kwargs)
+            # 文件内容已在抽取阶段加载，首个算子无需再次读取
+            init_kwargs_list[0]["is_first_op"] = False
+
+        if os.getenv("ENABLE_OP_FUSION", "true").lower() == "true":
+            groups = self._fuse_ops(operators_cls_list, init_kwargs_list)
+        else:
+            groups = [[index] for index in range(len(operators_cls_list))]
+
+        for group in groups:
+            group_cls_list = [operators_cls_list[index] for index in group]
+            group_kwargs_list = [init_kwargs_list[index] for index in group]
+            if lazy_content:
+                # 引用模式：每个阶段的最后一个算子负责释放未修改的文件内容
+                for init_kwargs in group_kwargs_list:
+                    init_kwargs["lazy_content"] = True
+                group_kwargs_list[-1]["is_stage_end"] = True
+            if len(group) == 1 and supports_global_dedup(group_cls_list[0]):
+                self._run_global_dedup(group_cls_list[0], group_kwargs_list[0], lazy_content,
+                                       operators_cls_list[:group[0]], **kwargs)
+            else:
+                batch_mode = any(self._use_batch(operators_cls, init_kwargs)
+                                 for operators_cls, init_kwargs in zip(group_cls_list, group_kwargs_list))
+                self._run_fused_ops(group_cls_list, group_kwargs_list, batch_mode=batch_mode, **kwargs)
         return self
 
+    @staticmethod
+    def _use_batch(operators_cls, init_kwargs):
+        """算子声明use_batch或配置中指定use_batch时以批模式执行，仅Mapper和Filter支持"""
+        if not issubclass(operators_cls, (Mapper, RELATIVE_Mapper, Filter, RELATIVE_Filter)):
+            return False
+        return bool(init_kwargs.get("use_batch", getattr(operators_cls, "use_batch", False)))
+
+    @staticmethod
+    def _get_resources(init_kwargs):
+        resources = {}
+
+        if init_kwargs.get("npu", 0) > 0:
+            resources["npu"] = init_kwargs.get("npu")
+
+        if init_kwargs.get("arch", "arm").startswith("x86"):
+            resources["arch"] = "x86"
+        return resources
+
+    def _fusion_key(self, operators_cls, init_kwargs):
+        """
+        返回算子的融合键，仅CPU算子可以融合，资源需求相同的算子才能融合在一起。
+        不可融合时返回None。
+        """
+        if not issubclass(operators_cls, (Mapper, RELATIVE_Mapper, Filter, RELATIVE_Filter)):
+            return None
+        if operators_cls.__name__ in self.onnx_ops_name + self.npu_ops_name:
+            return None
+        if supports_global_dedup(operators_cls):
+            return None
+        if init_kwargs.get("accelerator", "cpu") != "cpu":
+            return None
+        resources = self._get_resources(init_kwargs)
+        if "npu" in resources:
+            return None
+        return (tuple(sorted(resources.items())), init_kwargs.get("cpu", 0.05), init_kwargs.get("memory", None))
+
+    def _fuse_ops(self, operators_cls_list, init_kwargs_list):
+        """
+        将连续的、资源需求相同的CPU Mapper及其后紧跟的Filter划分为一组。
+        :return: 算子下标分组列表
+        """
+        groups = []
+        current_group = []
+        current_key = None
+        for index, (operators_cls, init_kwargs) in enumerate(zip(operators_cls_list, init_kwargs_list)):
+            key = self._fusion_key(operators_cls, init_kwargs)
+            is_filter = issubclass(operators_cls, (Filter, RELATIVE_Filter))
+            can_append = (
+                key is not None
+                and current_group
+                and key == current_key
+                # Filter之后不再追加Mapper
+                and (is_filter or not issubclass(operators_cls_list[current_group[-1]], (Filter, RELATIVE_Filter)))
+            )
+            if can_append:
+                current_group.append(index)
+                continue
+
+            if current_group:
+                groups.append(current_group)
+            current_group = [index]
+            # Filter不能作为融合组的开头
+            current_key = key if key is not None and not is_filter else None
+        if current_group:
+            groups.append(current_group)
+        return groups
+
     def load_ops_module(self, op_name):
         '''
         加载算子模块
@@ -151,55 +278,75 @@ class RayDataset(BasicDataset):
             res = None
         return res
 
-    def _run_single_op(self, operators_cls, init_kwargs, **kwargs):
-        max_actor_nums = os.getenv("MAX_ACTOR_NUMS", "20")
-
-        resources = {}
-
-        if init_kwargs.get("npu", 0) > 0:
-            resources["npu"] = init_kwargs.get("npu")
+    def _run_extract_stage(self, lazy_content=False, **kwargs):
+        """在独立的actor池中抽取文件内容，actor数、进程数、超时时间可通过环境变量配置"""
+        kwargs = dict(kwargs, ext_params={}, failed_reason={}, target_type=None)
+        self.data = self.data.map_batches(DocumentExtractor,
+                                          fn_constructor_kwargs={"lazy_content": lazy_content},
+                                          fn_kwargs=kwargs,
+                                          batch_size=int(os.getenv("EXTRACT_BATCH_SIZE", "16")),
+                                          batch_format="pyarrow",
+                                          num_cpus=float(os.getenv("EXTRACT_CPUS", "1")),
+                                          compute=rd.ActorPoolStrategy(
+                                              min_size=1,
+                                              max_size=int(os.getenv("EXTRACT_ACTOR_NUMS", "4"))))
+
+    def _run_global_dedup(self, operators_cls, init_kwargs, lazy_content=False, upstream_cls_list=(), **kwargs):
+        """
+        全局去重：第一遍计算签名并聚类，第二遍由算子按聚类结果过滤非保留样本。
+        默认物化上游结果，保证两遍看到的样本一致。仅当GLOBAL_DEDUP_MATERIALIZE=false、启用了结果缓存、
+        且上游算子均可缓存（结果确定、无写文件等副作用）时不物化，第二遍由结果缓存命中上游算子，
+        避免整个数据集的文件内容常驻对象存储。
+        """
+        logger.info(f"Global dedup Op: {init_kwargs['op_name']}")
+        recompute = (not lazy_content
+                     and os.getenv("GLOBAL_DEDUP_MATERIALIZE", "true").lower() == "false"
+                     and os.getenv("ENABLE_RESULT_CACHE", "false").lower() == "true"
+                     and all(getattr(cls, "use_result_cache", False) and not getattr(cls, "writes_files", False)
+                             for cls in upstream_cls_list))
+        if not recompute:
+            self.data = self.data.materialize()
+        duplicates = global_dedup(self.data, operators_cls, init_kwargs)
+        self._run_fused_ops([operators_cls], [dict(init_kwargs, dedup_duplicates=duplicates)], **kwargs)
+
+    def _run_fused_ops(self, operators_cls_list, init_kwargs_list, batch_mode=False, **kwargs):
+        """
+        以map_batches执行一个算子组，同一批样本的执行结果合并落库。
+        批模式算子按OP_BATCH_SIZE整批执行；逐条执行的算子批大小取OP_SAMPLE_BATCH_SIZE，避免单批耗时过长。
+        """
+        for operators_cls in operators_cls_list:
+            if not issubclass(operators_cls, (Mapper, RELATIVE_Mapper, Slicer, RELATIVE_Slicer,
+                                              Filter, RELATIVE_Filter)):
+                logger.error('Ray executor only support Filter, Mapper and Slicer OPs for now')
+                raise NotImplementedError
 
-        if init_kwargs.get("arch", "arm").startswith("x86"):
-            resources["arch"] = "x86"
+        max_actor_nums = os.getenv("MAX_ACTOR_NUMS", "20")
 
-        cpu = init_kwargs.get("cpu", 0.05)
-        memory = init_kwargs.get("memory", None)
+        # 同一融合组内资源需求一致，取首个算子的配置
+        resources = self._get_resources(init_kwargs_list[0])
+        cpu = init_kwargs_list[0].get("cpu", 0.05)
+        memory = init_kwargs_list[0].get("memory", None)
+        fn_constructor_kwargs = {"operators_cls_list": operators_cls_list, "init_kwargs_list": init_kwargs_list}
+        if batch_mode:
+            default_batch_size = os.getenv("OP_BATCH_SIZE", "256")
+        else:
+            default_batch_size = os.getenv("OP_SAMPLE_BATCH_SIZE", "16")
+        batch_size = min(int(init_kwargs.get("batch_size", default_batch_size)) for init_kwargs in init_kwargs_list)
 
+        logger.info(f"Run Ops: {[init_kwargs['op_name'] for init_kwargs in init_kwargs_list]}, "
+                    f"batch mode: {batch_mode}, batch size: {batch_size}")
         kwargs.update({"ext_params": {}, "failed_reason": {}, "target_type": None})
         try:
-            if issubclass(operators_cls, (Mapper, RELATIVE_Mapper)):
-                self.data = self.data.map(operators_cls,
-                                          fn_constructor_kwargs=init_kwargs,
-                                          fn_kwargs=kwargs,
-                                          resources=resources,
-                                          num_cpus=cpu,
-                                          memory=memory,
-                                          compute=rd.ActorPoolStrategy(min_size=1,
-                                                                       max_size=int(max_actor_nums)))
-
-            elif issubclass(operators_cls, (Slicer, RELATIVE_Slicer)):
-                self.data = self.data.flat_map(operators_cls,
-                                               fn_constructor_kwargs=init_kwargs,
-                                               fn_kwargs=kwargs,
-                                               resources=resources,
-                                               num_cpus=cpu,
-                                               memory=memory,
-                                               compute=rd.ActorPoolStrategy(min_size=1,
-                                                                            max_size=int(max_actor_nums)))
-
-            elif issubclass(operators_cls, (Filter, RELATIVE_Filter)):
-                self.data = self.data.filter(operators_cls,
-                                             fn_constructor_kwargs=init_kwargs,
-                                             fn_kwargs=kwargs,
-                                             resources=resources,
-                                             num_cpus=cpu,
-                                             memory=memory,
-                                             compute=rd.ActorPoolStrategy(min_size=1,
-                                                                          max_size=int(max_actor_nums)))
-            else:
-                logger.error(
-                    'Ray executor only support Filter, Mapper and Slicer OPs for now')
-                raise NotImplementedError
+            self.data = self.data.map_batches(FusedOp,
+                                              fn_constructor_kwargs=fn_constructor_kwargs,
+                                              fn_kwargs=kwargs,
+                                              batch_size=batch_size,
+                                              batch_format="pyarrow",
+                                              resources=resources,
+                                              num_cpus=cpu,
+                                              memory=memory,
+                                              compute=rd.ActorPoolStrategy(min_size=1,
+                                                                           max_size=int(max_actor_nums)))
         except Exception as e:
             logger.error(e)
             raise Exception("Error! Ops Details:") from e
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+import pyarrow as pa
+import ray
+from loguru import logger
+from ray import data as rd
+
+from datamate.core.constant import Fields
+from datamate.core.hashing import hash_ids
+
+# 每个worker进程内复用的算子实例，用于聚类阶段比较签名
+_DEDUP_OPS: Dict[str, Any] = {}
+
+
+def supports_global_dedup(operators_cls) -> bool:
+    """算子声明use_global_dedup且ENABLE_GLOBAL_DEDUP不为false时，以全局两阶段方式去重"""
+    return (getattr(operators_cls, "use_global_dedup", False)
+            and os.getenv("ENABLE_GLOBAL_DEDUP", "true").lower() == "true")
+
+
+def sample_dedup_key(op, sample: Dict[str, Any]) -> str:
+    """样本的唯一标识，同时作为排序键：同一簇内排序最小的样本作为保留样本，结果与执行顺序无关"""
+    return "\x00".join(str(sample.get(key) or "") for key in (op.filepath_key, op.filename_key, op.fileid_key))
+
+
+def _get_op(operators_cls, init_kwargs):
+    op_name = init_kwargs["op_name"]
+    if op_name not in _DEDUP_OPS:
+        _DEDUP_OPS[op_name] = operators_cls(**init_kwargs)
+    return _DEDUP_OPS[op_name]
+
+
+class DedupSignature:
+    """第一阶段：并行计算样本签名，每个分桶键输出一行(bucket, key, signature)"""
+
+    def __init__(self, operators_cls, init_kwargs):
+        self.op = operators_cls(**init_kwargs)
+
+    def __call__(self, batch: pa.Table) -> pa.Table:
+        buckets, keys, signatures = [], [], []
+        for sample in batch.to_pylist():
+            if sample.get(Fields.result) is False:
+                continue
+            try:
+                self.op.fill_sample_params(sample)
+                self.op.read_file_first(sample)
+                signature = self.op.dedup_signature(sample)
+            except Exception as e:
+                # 计算失败的样本不参与聚类，第二阶段不会被判为重复而保留
+                logger.warning(f"fileName: {sample.get(self.op.filename_key)}, "
+                               f"compute dedup signature failed: {e}")
+                continue
+            if signature is None:
+                continue
+            key = sample_dedup_key(self.op, sample)
+            for bucket in self.op.dedup_buckets(signature):
+                buckets.append(bucket)
+                keys.append(key)
+                signatures.append(signature)
+        return pa.table({"bucket": pa.array(buckets, pa.binary()),
+                         "key": pa.array(keys, pa.string()),
+                         "signature": pa.array(signatures, pa.binary())})
+
+
+def cluster_bucket(group: pa.Table, operators_cls, init_kwargs) -> pa.Table:
+    """
+    按键排序后，将每个样本与排在它之前且相似的首个簇代表连边，不相似的样本成为新的簇代表。
+    只与簇代表比较，比较次数为样本数乘以桶内簇数；同桶样本多为重复样本，簇数远小于样本数。
+    """
+    op = _get_op(operators_cls, init_kwargs)
+    group = group.sort_by("key")
+    keys = group.column("key").to_pylist()
+    signatures = group.column("signature").to_pylist()
+    representatives = []
+    rep_keys, dup_keys = [], []
+    for key, signature in zip(keys, signatures):
+        for rep_key, rep_signature in representatives:
+            if rep_key != key and op.is_duplicate(signature, rep_signature):
+                rep_keys.append(rep_key)
+                dup_keys.append(key)
+                break
+        else:
+            representatives.append((key, signature))
+    return pa.table({"rep_key": pa.array(rep_keys, pa.string()), "dup_key": pa.array(dup_keys, pa.string())})
+
+
+def find_duplicates(edges: List[tuple]) -> List[str]:
+    """并查集求连通分量，每个分量保留键最小的样本，返回其余样本的键"""
+    parent = {}
+
+    def find(key):
+        root = key
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while key != root:
+            parent[key], key = root, parent.get(key, key)
+        return root
+
+    for rep_key, dup_key in edges:
+        rep_root, dup_root = find(rep_key), find(dup_key)
+        if rep_root != dup_root:
+            # 以较小的键为根，根即为分量内保留的样本
+            rep_root, dup_root = min(rep_root, dup_root), max(rep_root, dup_root)
+            parent[dup_root] = rep_root
+    return [key for key in parent if find(key) != key]
+
+
+def global_dedup(dataset: rd.Dataset, operators_cls, init_kwargs):
+    """
+    全局两阶段去重：
+    1. map_batches并行计算签名并按分桶键展开；
+    2. groupby分桶键，桶内比较签名得到重复边，驱动端用并查集合并为簇。
+    返回重复样本键哈希（有序uint64数组）的ObjectRef，由算子在第二遍执行时据此过滤非保留样本。
+    """
+    signatures = dataset.map_batches(DedupSignature,
+                                     fn_constructor_kwargs={"operators_cls": operators_cls,
+                                                            "init_kwargs": init_kwargs},
+                                     batch_format="pyarrow",
+                                     num_cpus=init_kwargs.get("cpu", 0.05),
+                                     compute=rd.ActorPoolStrategy(
+                                         min_size=1, max_size=int(os.getenv("MAX_ACTOR_NUMS", "20"))))
+    edges = signatures.groupby("bucket").map_groups(cluster_bucket,
+                                                    fn_kwargs={"operators_cls": operators_cls,
+                                                               "init_kwargs": init_kwargs},
+                                                    batch_format="pyarrow")
+    edge_list = []
+    for batch in edges.iter_batches(batch_format="pyarrow"):
+        edge_list.extend(zip(batch.column("rep_key").to_pylist(), batch.column("dup_key").to_pylist()))
+    duplicates = find_duplicates(edge_list)
+    logger.info(f"Global dedup of {init_kwargs['op_name']}: {len(duplicates)} duplicated samples.")
+    return ray.put(np.unique(hash_ids(duplicates)))
+
+
+def is_duplicated(duplicates: np.ndarray, key: str) -> bool:
+    if not len(duplicates):
+        return False
+    hashed = hash_ids([key])
+    index = int(np.searchsorted(duplicates, hashed)[0])
+    return index < len(duplicates) and duplicates[index] == hashed[0]
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from typing import Any, Dict
+
+import pyarrow as pa
+from loguru import logger
+
+from datamate.common.utils import rows_to_columns
+from datamate.common.utils.file_reader import PARTITION_FILE_TYPES, partition_text
+from datamate.core.base_op import BaseOp, FAILED_STATUS
+from datamate.core.constant import Fields
+from datamate.sql_manager.persistence_atction import TaskInfoPersistence
+
+
+class DocumentExtractor(BaseOp):
+    """
+    文档抽取阶段：在独立的actor池中读取文件内容，供后续算子直接使用。
+    pdf/docx/pptx/xlsx等文档交给进程池并行解析，并设置单文件超时；纯文本和图片直接读取。
+    首个算子自行解析源文件（parses_file为True）时不启用该阶段。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(DocumentExtractor, self).__init__(*args, **kwargs)
+        self._name = "DocumentExtractor"
+        self.workers = int(kwargs.get("workers", os.getenv("EXTRACT_WORKERS", "2")))
+        self.timeout = float(kwargs.get("timeout", os.getenv("EXTRACT_TIMEOUT", "300")))
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # Ray worker内含多个线程，使用spawn避免fork带来的死锁
+            self._pool = multiprocessing.get_context("spawn").Pool(self.workers)
+        return self._pool
+
+    def _reset_pool(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __del__(self):
+        self._reset_pool()
+
+    def __call__(self, batch: pa.Table, **kwargs):
+        with TaskInfoPersistence.write_batch():
+            return self._extract_batch(batch, **kwargs)
+
+    def _extract_batch(self, batch: pa.Table, **kwargs):
+        samples = batch.to_pylist()
+        pending = []
+        for sample in samples:
+            self.fill_sample_params(sample, **kwargs)
+            filepath = sample[self.filepath_key]
+            try:
+                if sample[self.filetype_key] in PARTITION_FILE_TYPES:
+                    cache = self._get_extract_cache()
+                    text = cache.get(filepath) if cache else None
+                    if text is None:
+                        pending.append(sample)
+                        continue
+                    self._set_text(sample, text)
+                else:
+                    self.read_file(sample)
+            except Exception as e:
+                self._mark_failed(sample, e)
+
+        self._partition_pending(pending)
+        return rows_to_columns(samples, batch.column_names)
+
+    def _partition_pending(self, pending):
+        """
+        在进程池中解析文档：同时提交的文件数不超过进程数，每个文件从开始解析时计时，
+        排队等待的时间不计入超时。
+        """
+        waiting = deque(pending)
+        running = []
+        while waiting or running:
+            while waiting and len(running) < self.workers:
+                sample = waiting.popleft()
+                result = self._get_pool().apply_async(partition_text, (sample[self.filepath_key],))
+                running.append((sample, time.time(), result))
+            running[0][2].wait(0.1)
+
+            still_running = []
+            timeout_occurred = False
+            for sample, start, result in running:
+                if result.ready():
+                    try:
+                        text = result.get()
+                        cache = self._get_extract_cache()
+                        if cache:
+                            cache.put(sample[self.filepath_key], text)
+                        self._set_text(sample, text)
+                    except Exception as e:
+                        self._mark_failed(sample, e)
+                elif time.time() - start >= self.timeout:
+                    timeout_occurred = True
+                    self._mark_failed(sample, TimeoutError(f"extract {sample[self.filename_key]} "
+                                                           f"timeout after {self.timeout}s"))
+                else:
+                    still_running.append((sample, start, result))
+
+            if timeout_occurred:
+                # 超时的解析进程无法单独终止，重建进程池，未完成的文件重新提交并重新计时
+                self._reset_pool()
+                waiting.extendleft(reversed([sample for sample, _, _ in still_running]))
+                still_running = []
+            running = still_running
+
+    def _set_text(self, sample: Dict[str, Any], text: str):
+        sample[self.text_key] = text
+        sample[self.data_key] = b""
+        sample[Fields.content_ref] = False
+        if self.lazy_content:
+            sample[Fields.content_digest] = self._content_digest(sample)
+
+    def _mark_failed(self, sample: Dict[str, Any], e: BaseException):
+        logger.error(f"fileName: {sample[self.filename_key]}, method: DocumentExtractor failed: {e}")
+        self.create_failure_sample(sample, self.name, e)
+        sample["execute_status"] = FAILED_STATUS
+        sample[self.filesize_key] = "0"
+        sample[self.filetype_key] = ""
+        TaskInfoPersistence().update_task_result(sample)
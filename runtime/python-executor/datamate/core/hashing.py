@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+
+import numpy as np
+
+
+def hash_ids(ids) -> np.ndarray:
+    """将文件id映射为64位哈希，排序后的哈希数组内存占用小且可用二分查找批量判断"""
+    return np.array([int.from_bytes(hashlib.blake2b(str(file_id).encode("utf-8"), digest_size=8).digest(), "little")
+                     for file_id in ids], dtype=np.uint64)
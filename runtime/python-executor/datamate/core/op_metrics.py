@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import json
+import os
+import uuid
+from typing import Any, Dict, List
+
+from loguru import logger
+
+# 延迟直方图的桶上界（秒），从10us起按sqrt(2)倍递增到约1000s，不同actor的直方图可直接逐桶相加
+LATENCY_BOUNDS = [1e-5 * 2 ** (i / 2) for i in range(54)]
+PERCENTILES = (50, 95, 99)
+
+
+def get_metrics_dir(task_id) -> str:
+    return f"/flow/{task_id}/op_metrics"
+
+
+class OpMetrics:
+    """
+    单个算子实例（actor）的执行指标：输入/输出样本数、输入/输出字节数、失败数和延迟直方图。
+    指标由调度方在每次Ray调用结束时flush写入任务目录（actor由Ray直接结束，不能依赖进程退出钩子），
+    由查询方合并各actor的结果。
+    """
+
+    def __init__(self, op_name: str, task_id: str):
+        self.op_name = op_name
+        self.samples_in = 0
+        self.samples_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.failures = 0
+        self.latency_sum = 0.0
+        self.latency_hist = [0] * (len(LATENCY_BOUNDS) + 1)
+        self._path = os.path.join(get_metrics_dir(task_id), f"{op_name}_{os.getpid()}_{uuid.uuid4().hex[:8]}.json")
+        self._dirty = False
+
+    def record(self, latency: float, samples_in=1, samples_out=1, bytes_in=0, bytes_out=0, failures=0):
+        """记录一次调用，批模式下latency为整批耗时，按样本数均摊到直方图"""
+        self.samples_in += samples_in
+        self.samples_out += samples_out
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.failures += failures
+        self.latency_sum += latency
+        if samples_in:
+            self.latency_hist[bisect.bisect_left(LATENCY_BOUNDS, latency / samples_in)] += samples_in
+        self._dirty = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "op_name": self.op_name,
+            "samples_in": self.samples_in,
+            "samples_out": self.samples_out,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "failures": self.failures,
+            "latency_sum": self.latency_sum,
+            "latency_hist": self.latency_hist,
+        }
+
+    def flush(self):
+        """将累计指标写入文件，自上次flush以来没有新记录时不写"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            tmp_path = self._path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning(f"flush metrics of {self.op_name} failed: {e}")
+
+
+def _percentile(hist: List[int], percentile: float) -> float:
+    total = sum(hist)
+    if not total:
+        return 0.0
+    threshold = total * percentile / 100
+    count = 0
+    for index, num in enumerate(hist):
+        count += num
+        if count >= threshold:
+            return LATENCY_BOUNDS[min(index, len(LATENCY_BOUNDS) - 1)]
+    return LATENCY_BOUNDS[-1]
+
+
+def merge_op_metrics(metrics_list: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """按算子合并各actor的指标，并由合并后的直方图计算延迟分位数（取桶上界，单位秒）"""
+    merged = {}
+    for metrics in metrics_list:
+        op_metrics = merged.setdefault(metrics["op_name"], {
+            "samples_in": 0, "samples_out": 0, "bytes_in": 0, "bytes_out": 0, "failures": 0,
+            "latency_sum": 0.0, "latency_hist": [0] * (len(LATENCY_BOUNDS) + 1), "actors": 0
+        })
+        op_metrics["actors"] += 1
+        for key in ("samples_in", "samples_out", "bytes_in", "bytes_out", "failures", "latency_sum"):
+            op_metrics[key] += metrics.get(key, 0)
+        for index, num in enumerate(metrics.get("latency_hist", [])):
+            op_metrics["latency_hist"][index] += num
+
+    result = {}
+    for op_name, op_metrics in merged.items():
+        hist = op_metrics.pop("latency_hist")
+        for percentile in PERCENTILES:
+            op_metrics[f"latency_p{percentile}"] = _percentile(hist, percentile)
+        result[op_name] = op_metrics
+    return result
+
+
+def load_op_metrics(task_id) -> Dict[str, Dict[str, Any]]:
+    """读取并合并任务下所有actor写入的算子指标，任务运行中也可查询"""
+    metrics_dir = get_metrics_dir(task_id)
+    if not os.path.isdir(metrics_dir):
+        return {}
+    metrics_list = []
+    for name in os.listdir(metrics_dir):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(metrics_dir, name), "r", encoding="utf-8") as f:
+                metrics_list.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"load metrics file {name} failed: {e}")
+    return merge_op_metrics(metrics_list)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, Optional
+
+import yaml
+from loguru import logger
+
+# 算子初始化参数中与结果无关的运行时参数
+RUNTIME_PARAMS = ("op_name", "instance_id", "is_first_op", "is_last_op", "lazy_content", "is_stage_end",
+                  "use_batch", "batch_size", "cpu", "memory", "npu", "arch", "dedup_duplicates")
+
+
+def hash_file(filepath, chunk_size=1024 * 1024) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_content(content) -> str:
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.blake2b(bytes(content), digest_size=16).hexdigest()
+
+
+def chain_key(prev_key: str, op_name: str, op_params: str, op_version: str) -> str:
+    """由上一步的键与当前算子(名称, 参数, 版本)计算当前结果的键，链式的键使相同的算子前缀得到相同的结果"""
+    raw = "\x00".join([prev_key, op_name, op_params, op_version])
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def op_params_signature(init_kwargs: Dict[str, Any]) -> str:
+    params = {k: v for k, v in init_kwargs.items() if k not in RUNTIME_PARAMS}
+    return json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def op_version_signature(op_cls) -> str:
+    """算子版本：metadata.yml中的version加上算子源码的哈希，算子代码变化时缓存自动失效"""
+    version = ""
+    try:
+        source_file = inspect.getfile(op_cls)
+        metadata_path = os.path.join(os.path.dirname(source_file), "metadata.yml")
+        if os.path.exists(metadata_path):
+            with open(metadata_path, "r", encoding="utf-8") as f:
+                version = str((yaml.safe_load(f) or {}).get("version", ""))
+        with open(source_file, "rb") as f:
+            version += ":" + hashlib.sha1(f.read()).hexdigest()[:12]
+    except (OSError, TypeError, yaml.YAMLError) as e:
+        logger.warning(f"get version of {op_cls.__name__} failed: {e}")
+    return version
+
+
+class ResultCache:
+    """
+    基于内容寻址的算子结果磁盘缓存。
+    键由(输入内容哈希, 算子名称, 算子参数, 算子版本)链式计算，重复提交相同的算子前缀时直接复用结果。
+    命中时更新文件修改时间，淘汰时按修改时间做LRU，直到缓存总大小不超过max_bytes。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".pkl")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"read result cache {path} failed: {e}")
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"write result cache {path} failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self):
+        """按最近访问时间淘汰缓存，返回淘汰的条目数"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except FileNotFoundError:
+                continue
+        if evicted:
+            logger.info(f"result cache evicted {evicted} entries, current size: {total} bytes")
+        return evicted
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """ENABLE_RESULT_CACHE为true时启用，缓存目录和容量可通过环境变量配置"""
+    if os.getenv("ENABLE_RESULT_CACHE", "false").lower() != "true":
+        return None
+    cache_dir = os.getenv("RESULT_CACHE_DIR", "/flow/.result_cache")
+    max_bytes = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))
+    try:
+        return ResultCache(cache_dir, max_bytes)
+    except OSError as e:
+        logger.warning(f"init result cache in {cache_dir} failed: {e}")
+        return None
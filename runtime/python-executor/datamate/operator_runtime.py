@@ -10,6 +10,7 @@ from loguru import logger
 from pydantic import BaseModel
 
 from datamate.common.error_code import ErrorCode
+from datamate.core.op_metrics import load_op_metrics
 from datamate.scheduler import cmd_scheduler
 from datamate.scheduler import func_scheduler
 from datamate.wrappers import WRAPPERS
@@ -80,8 +81,18 @@ async def query_task_info(request: QueryTaskRequest):
         raise APIException(ErrorCode.UNKNOWN_ERROR)
 
 
+@app.post("/api/task/metrics")
+async def query_task_metrics(request: QueryTaskRequest):
+    """查询任务各算子的吞吐、延迟分位数、字节数和失败数，任务运行中也可查询"""
+    try:
+        return [{task_id: load_op_metrics(task_id)} for task_id in request.task_ids]
+    except Exception as e:
+        logger.exception(f"Error happens during querying task metrics. Error Info following: {e}")
+        raise APIException(ErrorCode.UNKNOWN_ERROR)
+
+
 @app.post("/api/task/{task_id}/submit")
-async def submit_task(task_id):
+async def submit_task(task_id, resume: bool = False):
     config_path = f"/flow/{task_id}/process.yaml"
     logger.info("Start submitting job...")
 
@@ -92,7 +103,8 @@ async def submit_task(task_id):
 
     try:
         executor_type = get_from_cfg(task_id, "executor_type")
-        await WRAPPERS.get(executor_type).submit(task_id, config_path)
+        # resume=true时跳过上次运行中已成功处理的文件
+        await WRAPPERS.get(executor_type).submit(task_id, config_path, resume)
 
     except Exception as e:
         logger.error(f"Error happens during submitting task. Error Info following: {e}")
@@ -4,6 +4,7 @@ from typing import Optional, List
 
 from loguru import logger
 
+from datamate.common.utils.task_stats import load_task_stats
 from .scheduler import Task, TaskStatus, TaskResult, TaskScheduler
 
 
@@ -125,6 +126,7 @@ class CommandTask(Task):
         self.result = {
             "command": self.command,
             "return_code": self.return_code,
+            "stats": load_task_stats(self.task_id),
         }
         return super().to_result()
 
@@ -5,6 +5,7 @@ import time
 import os
 import uuid
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any
 
@@ -12,6 +13,7 @@ from loguru import logger
 from sqlalchemy import text
 
 from datamate.sql_manager.sql_manager import SQLManager
+from datamate.sql_manager.write_buffer import get_write_buffer
 
 
 class TaskInfoPersistence:
@@ -19,6 +21,7 @@ class TaskInfoPersistence:
         self.sql_dict = self.load_sql_dict()
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def load_sql_dict():
         """获取sql语句"""
         sql_config_path = str(Path(__file__).parent / 'sql' / 'sql_config.json')
@@ -53,7 +56,7 @@ class TaskInfoPersistence:
             "status": status,
             "result": failed_reason
         }
-        self.insert_result(result_data, str(self.sql_dict.get("insert_clean_result_sql")))
+        self.buffer_result(result_data, str(self.sql_dict.get("insert_clean_result_sql")))
 
     def update_file_result(self, sample, file_id):
         file_size = str(sample.get("fileSize"))
@@ -76,13 +79,22 @@ class TaskInfoPersistence:
             "created_at": create_time,
             "updated_at": create_time
         }
-        self.insert_result(file_data, str(self.sql_dict.get("insert_dataset_file_sql")))
+        self.buffer_result(file_data, str(self.sql_dict.get("insert_dataset_file_sql")))
 
     def persistence_task_info(self, sample: Dict[str, Any]):
         file_id = str(uuid.uuid4())
         self.update_task_result(sample, file_id)
         self.update_file_result(sample, file_id)
 
+    def buffer_result(self, data, sql):
+        """写入当前进程的写缓冲，write_batch作用域外立即落库"""
+        get_write_buffer(self.insert_result).add(sql, data)
+
+    @staticmethod
+    def write_batch():
+        """批量写入作用域：作用域内的结果缓存后批量落库，作用域结束（Ray调用返回）前全部刷新"""
+        return get_write_buffer(TaskInfoPersistence.insert_result).batch()
+
     @staticmethod
     def insert_result(data, sql):
         retries = 0
@@ -1,25 +1,24 @@
 # -- encoding: utf-8 --
 import os
+import threading
 import time
 from random import uniform
 
 from loguru import logger
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.engine import URL
 
 
 class SQLManager:
+    # 进程级共享的engine，同一进程（Ray actor）内所有调用复用同一个连接池
+    _engine = None
+    _engine_pid = None
+    _engine_lock = threading.Lock()
+    _pool_stats = {"hit": 0, "miss": 0}
 
     @staticmethod
-    def create_connect(max_retries=5, base_delay=1):
-        """
-        连接到 MySQL 数据库，使用 SQLAlchemy 和 PyMySQL。
-        :param max_retries: 最大重试次数
-        :param base_delay: 基础时延
-        :return: 返回 SQLAlchemy 连接对象
-        """
-
-        connection_url = URL.create(
+    def _get_connection_url():
+        return URL.create(
             drivername="mysql+pymysql",
             username=os.getenv("MYSQL_USER", "root"),
             password=os.getenv("MYSQL_PASSWORD", "password"),
@@ -29,12 +28,78 @@ class SQLManager:
             query={"charset": "utf8mb4"},
         )
 
+    @classmethod
+    def get_engine(cls):
+        """
+        获取当前进程共享的engine，首次调用或fork后重新创建。
+        连接池大小可通过环境变量 MYSQL_POOL_SIZE、MYSQL_MAX_OVERFLOW、MYSQL_POOL_RECYCLE 配置。
+        :return: SQLAlchemy engine 对象
+        """
+        pid = os.getpid()
+        if cls._engine is not None and cls._engine_pid == pid:
+            return cls._engine
+
+        with cls._engine_lock:
+            if cls._engine is not None and cls._engine_pid == pid:
+                return cls._engine
+
+            engine = create_engine(
+                cls._get_connection_url(),
+                pool_pre_ping=True,
+                isolation_level="AUTOCOMMIT",
+                pool_size=int(os.getenv("MYSQL_POOL_SIZE", "2")),
+                max_overflow=int(os.getenv("MYSQL_MAX_OVERFLOW", "3")),
+                pool_recycle=int(os.getenv("MYSQL_POOL_RECYCLE", "3600")),
+                pool_timeout=int(os.getenv("MYSQL_POOL_TIMEOUT", "30")),
+            )
+            cls._register_pool_events(engine)
+            cls._engine = engine
+            cls._engine_pid = pid
+            cls._pool_stats = {"hit": 0, "miss": 0}
+            return engine
+
+    @classmethod
+    def _register_pool_events(cls, engine):
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            # 新建物理连接记为未命中
+            connection_record.info["new_connection"] = True
+            cls._pool_stats["miss"] += 1
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            # 复用池中已有连接记为命中
+            if connection_record.info.pop("new_connection", False):
+                return
+            cls._pool_stats["hit"] += 1
+
+    @classmethod
+    def get_pool_stats(cls):
+        """返回当前进程连接池命中/未命中次数"""
+        return dict(cls._pool_stats)
+
+    @classmethod
+    def dispose_engine(cls):
+        """释放当前进程的连接池"""
+        with cls._engine_lock:
+            if cls._engine is not None:
+                cls._engine.dispose()
+            cls._engine = None
+            cls._engine_pid = None
+
+    @staticmethod
+    def create_connect(max_retries=5, base_delay=1):
+        """
+        从进程共享的连接池中获取 MySQL 连接，使用 SQLAlchemy 和 PyMySQL。
+        :param max_retries: 最大重试次数
+        :param base_delay: 基础时延
+        :return: 返回 SQLAlchemy 连接对象
+        """
         attempt = 0
 
         while True:
             try:
-                engine = create_engine(connection_url, pool_pre_ping=True, isolation_level="AUTOCOMMIT")
-                return engine.connect()
+                return SQLManager.get_engine().connect()
             except Exception as e:
                 logger.error(f"Attempt {attempt + 1} failed with error: {str(e)}")
                 if attempt >= max_retries - 1:
@@ -49,4 +114,4 @@ if __name__ == "__main__":
     with SQLManager.create_connect() as connection:
       inspector = inspect(connection)
       print(inspector.get_table_names())
-
+    print(SQLManager.get_pool_stats())
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from loguru import logger
+
+
+class WriteBehindBuffer:
+    """
+    进程级写缓冲：按sql语句聚合待写入的行，批量写入数据库。
+
+    1. 在batch()作用域内写入的行先缓存，行数达到batch_size或作用域结束时批量写入；
+    2. 作用域外写入的行立即落库；
+    3. 作用域结束时一定刷新，数据在Ray调用返回前即已落库，不依赖actor退出时的清理。
+       Ray以ray.kill结束actor池，atexit和后台线程均无法保证最后一批数据落库。
+    """
+
+    def __init__(self, writer: Callable[[List[Dict], str], None], batch_size=500, max_retries=3):
+        self._writer = writer
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self._rows: Dict[str, List[Dict]] = {}
+        self._row_count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def batch(self):
+        """批量写入作用域，可嵌套，最外层作用域结束时刷新"""
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        try:
+            yield self
+        finally:
+            self._local.depth = depth
+            # 作用域内抛出异常时同样刷新，保证失败记录落库
+            if depth == 0:
+                self.flush()
+
+    def add(self, sql: str, row: Dict):
+        with self._lock:
+            self._rows.setdefault(sql, []).append(row)
+            self._row_count += 1
+            need_flush = self._row_count >= self.batch_size or not getattr(self._local, "depth", 0)
+        if need_flush:
+            self.flush()
+
+    def flush(self):
+        """
+        写入缓存的行，写入失败时按指数退避重试max_retries次，仍失败则抛出异常，
+        由调用方将任务标记为失败，不静默丢弃数据。
+        """
+        # 串行化写入，保证同一进程内的批次按顺序落库
+        with self._flush_lock:
+            with self._lock:
+                pending = self._rows
+                self._rows = {}
+                self._row_count = 0
+            for sql, rows in pending.items():
+                self._write_with_retry(sql, rows)
+
+    def _write_with_retry(self, sql: str, rows: List[Dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._writer(rows, sql)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"write-behind flush of {len(rows)} rows failed after {attempt + 1} attempts: {e}")
+                    raise
+                logger.warning(f"write-behind flush of {len(rows)} rows failed, retry {attempt + 1}: {e}")
+                time.sleep(2 ** attempt)
+
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+
+
+def get_write_buffer(writer: Callable[[List[Dict], str], None]) -> WriteBehindBuffer:
+    """获取当前进程的写缓冲，fork后的子进程会重新创建"""
+    global _buffer, _buffer_pid
+    pid = os.getpid()
+    if _buffer is not None and _buffer_pid == pid:
+        return _buffer
+
+    with _buffer_lock:
+        if _buffer is None or _buffer_pid != pid:
+            _buffer = WriteBehindBuffer(writer,
+                                        batch_size=int(os.getenv("PERSISTENCE_BATCH_SIZE", "500")),
+                                        max_retries=int(os.getenv("PERSISTENCE_FLUSH_RETRIES", "3")))
+            _buffer_pid = pid
+    return _buffer
@@ -5,7 +5,6 @@ from json import loads as jloads
 from typing import Dict, Optional
 from urllib.parse import urljoin
 
-import ray
 import requests
 import yaml
 from jsonargparse import ArgumentParser
@@ -93,12 +92,7 @@ class DataJuicerExecutor(RayExecutor):
         # 1. 加载数据集
         logger.info('Loading dataset with Ray...')
 
-        if self.meta:
-            file_content = base64.b64decode(self.meta)
-            lines = file_content.splitlines()
-            dataset = ray.data.from_items([jloads(line) for line in lines])
-        else:
-            dataset = self.load_dataset()
+        dataset = self.load_input_dataset()
 
         logger.info('Read data...')
         dataset = dataset.map(FileExporter().read_file, num_cpus=0.05)
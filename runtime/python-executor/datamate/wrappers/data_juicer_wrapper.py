@@ -4,7 +4,7 @@ import os
 from datamate.scheduler import cmd_scheduler
 
 
-async def submit(task_id, config_path):
+async def submit(task_id, config_path, resume=False):
     current_dir = os.path.dirname(__file__)
 
     await cmd_scheduler.submit(task_id, f"python {os.path.join(current_dir, 'data_juicer_executor.py')} "
@@ -1,15 +1,19 @@
 # -*- coding: utf-8 -*-
 
 import base64
-import json
 import time
 
-import ray
 import yaml
 from jsonargparse import ArgumentParser
 from loguru import logger
 
+from datamate.common.utils.minhash_lsh import release_shared_lsh_index
+from datamate.common.utils.task_stats import save_task_stats
+from datamate.core.checkpoint import Checkpointer
+from datamate.core.constant import Fields
 from datamate.core.dataset import RayDataset
+from datamate.core.op_metrics import load_op_metrics
+from datamate.core.result_cache import get_result_cache
 from datamate.wrappers.executor import RayExecutor
 
 import datamate.ops
@@ -29,23 +33,49 @@ class DataMateExecutor(RayExecutor):
         # 1. 加载数据集
         logger.info('Loading dataset with Ray...')
 
-        if self.meta:
-            file_content = base64.b64decode(self.meta)
-            lines = file_content.splitlines()
-            dataset = ray.data.from_items([json.loads(line) for line in lines])
-        else:
-            dataset = self.load_dataset()
-        dataset = RayDataset(dataset, self.cfg)
+        dataset = RayDataset(self.load_input_dataset(), self.cfg)
 
         # 3. 处理数据
         logger.info('Processing data...')
         tstart = time.time()
-        dataset.process(self.cfg.process, **getattr(self.cfg, 'kwargs', {}))
+        checkpointer = Checkpointer(self.cfg.instance_id) if getattr(self.cfg, 'resume', False) else None
+        dataset.process(self.cfg.process, checkpointer=checkpointer, **getattr(self.cfg, 'kwargs', {}))
         tend = time.time()
         logger.info(f'All Ops are done in {tend - tstart:.3f}s.')
 
-        for _ in dataset.data.iter_batches():
-            pass
+        cache_hits = 0
+        cache_misses = 0
+        try:
+            for batch in dataset.data.iter_batches():
+                cache_hits += sum(int(value or 0) for value in batch.get(Fields.cache_hits, []))
+                cache_misses += sum(int(value or 0) for value in batch.get(Fields.cache_misses, []))
+        finally:
+            # 数据集执行完毕（含失败）后释放任务共享的去重索引，不等待其空闲超时退出
+            release_shared_lsh_index(self.cfg.instance_id)
+        self.report_result_cache(cache_hits, cache_misses)
+        self.report_op_metrics()
+
+    def report_op_metrics(self):
+        """汇总各actor的算子指标，写入任务结果并打印每个算子的耗时分布"""
+        op_metrics = load_op_metrics(self.cfg.instance_id)
+        for op_name, metrics in op_metrics.items():
+            logger.info(f"Op {op_name}: samples in/out {metrics['samples_in']}/{metrics['samples_out']}, "
+                        f"failures {metrics['failures']}, bytes in/out {metrics['bytes_in']}/{metrics['bytes_out']}, "
+                        f"latency p50/p95/p99 {metrics['latency_p50']:.6f}/{metrics['latency_p95']:.6f}/"
+                        f"{metrics['latency_p99']:.6f}s")
+        save_task_stats(self.cfg.instance_id, "op_metrics", op_metrics)
+
+    def report_result_cache(self, cache_hits, cache_misses):
+        """记录结果缓存命中率到任务结果，并按容量上限淘汰缓存"""
+        result_cache = get_result_cache()
+        if result_cache is None:
+            return
+        total = cache_hits + cache_misses
+        hit_rate = cache_hits / total if total else 0.0
+        logger.info(f"Result cache hits: {cache_hits}, misses: {cache_misses}, hit rate: {hit_rate:.2%}")
+        save_task_stats(self.cfg.instance_id, "result_cache",
+                        {"hits": cache_hits, "misses": cache_misses, "hit_rate": hit_rate})
+        result_cache.evict()
 
 
 if __name__ == '__main__':
@@ -54,6 +84,7 @@ if __name__ == '__main__':
 
     parser.add_argument("--config_path", type=str, required=False, default="../configs/demo.yaml")
     parser.add_argument("--flow_config", type=str, required=False, default=None)
+    parser.add_argument("--resume", type=bool, required=False, default=False)
 
     args = parser.parse_args()
 
@@ -65,6 +96,8 @@ if __name__ == '__main__':
     else:
         with open(config_path, "r", encoding='utf-8') as f:
             m_cfg = yaml.safe_load(f)
+    if args.resume:
+        m_cfg["resume"] = True
 
     executor = DataMateExecutor(m_cfg)
     try:
@@ -4,11 +4,13 @@ import os
 from datamate.scheduler import cmd_scheduler
 
 
-async def submit(task_id, config_path):
+async def submit(task_id, config_path, resume=False):
     current_dir = os.path.dirname(__file__)
 
-    await cmd_scheduler.submit(task_id, f"python {os.path.join(current_dir, 'datamate_executor.py')} "
-                                        f"--config_path={config_path}")
+    cmd = f"python {os.path.join(current_dir, 'datamate_executor.py')} --config_path={config_path}"
+    if resume:
+        cmd += " --resume=true"
+    await cmd_scheduler.submit(task_id, cmd)
 
 
 def cancel(task_id):
@@ -1,4 +1,6 @@
+import base64
 import json
+import os
 import time
 from typing import Dict
 
@@ -6,7 +8,7 @@ import ray
 from jsonargparse import dict_to_namespace
 from loguru import logger
 
-from datamate.common.utils import check_valid_path
+from datamate.common.utils import check_valid_path, rows_to_columns
 from datamate.sql_manager.persistence_atction import TaskInfoPersistence
 
 
@@ -33,6 +35,10 @@ class RayExecutor:
         ray.init()
 
     def load_meta(self, line):
+        return self.parse_meta(line, self.cfg.dataset_id)
+
+    @staticmethod
+    def parse_meta(line, dataset_id):
         meta = json.loads(line)
         if meta.get("fileId"):
             meta["sourceFileId"] = meta.get("fileId")
@@ -48,9 +54,18 @@ class RayExecutor:
             meta["extraFilePath"] = None
         if not meta.get("extraFileType"):
             meta["extraFileType"] = None
-        meta["dataset_id"] = self.cfg.dataset_id
+        meta["dataset_id"] = dataset_id
         return meta
 
+    @staticmethod
+    def parse_meta_batch(batch, dataset_id=None, with_meta=True):
+        """按批解析jsonl行，with_meta为True时补齐源文件相关字段"""
+        if with_meta:
+            rows = [RayExecutor.parse_meta(line, dataset_id) for line in batch["text"]]
+        else:
+            rows = [json.loads(line) for line in batch["text"]]
+        return rows_to_columns(rows)
+
     def run(self):
         pass
 
@@ -61,10 +76,8 @@ class RayExecutor:
             jsonl_file_path = self.cfg.dataset_path
         while True:
             if check_valid_path(jsonl_file_path):
-                with open(jsonl_file_path, "r", encoding='utf-8') as meta:
-                    lines = meta.readlines()
-                    dataset = ray.data.from_items([self.load_meta(line) for line in lines])
-                    break
+                dataset = self.read_jsonl(jsonl_file_path)
+                break
             if retry < 5:
                 retry += 1
                 time.sleep(retry)
@@ -75,6 +88,38 @@ class RayExecutor:
 
         return dataset
 
+    def load_input_dataset(self):
+        """加载待处理数据集，优先使用提交时传入的meta"""
+        if self.meta:
+            return self.read_jsonl(self.dump_meta(), with_meta=False)
+        return self.load_dataset()
+
+    def read_jsonl(self, jsonl_file_path, with_meta=True):
+        """
+        流式读取jsonl清单，由Ray按块并行读取并按批解析，避免在driver上加载整个清单。
+        """
+        dataset = ray.data.read_text(jsonl_file_path, encoding="utf-8", drop_empty_lines=True)
+        return dataset.map_batches(self.parse_meta_batch,
+                                   fn_kwargs={"dataset_id": getattr(self.cfg, "dataset_id", None),
+                                              "with_meta": with_meta},
+                                   batch_size=int(os.getenv("META_BATCH_SIZE", "4096")),
+                                   batch_format="numpy",
+                                   num_cpus=0.05)
+
+    def dump_meta(self, chunk_size=4 * 1024 * 1024):
+        """将base64编码的meta分块解码写入文件，供流式读取"""
+        meta_path = f"/flow/{self.cfg.instance_id}/meta.jsonl"
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        meta = self.meta if isinstance(self.meta, bytes) else self.meta.encode("ascii")
+        # 去掉换行等空白字符（如MIME格式按行折断的base64），保证分块边界落在4字符分组上
+        meta = meta.translate(None, b" \t\r\n\v\f")
+        # base64每4个字符解码为3个字节，分块大小需为4的整数倍
+        chunk_size -= chunk_size % 4
+        with open(meta_path, "wb") as f:
+            for start in range(0, len(meta), chunk_size):
+                f.write(base64.b64decode(meta[start:start + chunk_size]))
+        return meta_path
+
     def update_db(self, status):
         task_info = TaskInfoPersistence()
         task_info.update_result(self.cfg.dataset_id, self.cfg.instance_id, status)
\ No newline at end of file
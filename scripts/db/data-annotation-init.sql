@@ -28,6 +28,7 @@ CREATE TABLE t_dm_labeling_projects (
     template_id VARCHAR(36) NULL COMMENT '使用的模板ID',
     configuration JSON COMMENT '项目配置（可能包含对模板的自定义修改）',
     progress JSON COMMENT '项目进度信息',
+    sync_watermarks JSON COMMENT '增量同步水位线（各同步方向上次同步到的时间点）',
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
     deleted_at TIMESTAMP NULL COMMENT '删除时间（软删除）',
@@ -52,12 +53,15 @@ CREATE TABLE t_dm_auto_annotation_tasks (
     detected_objects INT DEFAULT 0 COMMENT '检测到的对象总数',
     output_path VARCHAR(500) COMMENT '输出路径',
     error_message TEXT COMMENT '错误信息',
+    worker_id VARCHAR(128) COMMENT '持有任务租约的 worker 标识',
+    heartbeat_at TIMESTAMP NULL COMMENT '租约心跳时间，超时未续约的 running 任务可被其他 worker 接管',
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
     completed_at TIMESTAMP NULL COMMENT '完成时间',
     deleted_at TIMESTAMP NULL COMMENT '删除时间（软删除）',
     INDEX idx_dataset_id (dataset_id),
     INDEX idx_status (status),
+    INDEX idx_status_heartbeat (status, heartbeat_at),
     INDEX idx_created_at (created_at)
 ) COMMENT='自动标注任务表';
 
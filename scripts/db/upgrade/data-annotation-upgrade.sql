@@ -0,0 +1,52 @@
+-- 标注模块已有数据库的升级脚本，新部署由 data-annotation-init.sql 建表，无需执行
+-- 补充增量同步水位线字段和自动标注任务租约字段，可重复执行：
+--   mysql -h <host> -u <user> -p < scripts/db/upgrade/data-annotation-upgrade.sql
+USE datamate;
+
+DROP PROCEDURE IF EXISTS dm_add_column_if_absent;
+DROP PROCEDURE IF EXISTS dm_add_index_if_absent;
+
+DELIMITER $$
+
+CREATE PROCEDURE dm_add_column_if_absent(IN table_name_in VARCHAR(64), IN column_name_in VARCHAR(64), IN column_ddl TEXT)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = table_name_in AND COLUMN_NAME = column_name_in
+    ) THEN
+        SET @ddl = CONCAT('ALTER TABLE ', table_name_in, ' ADD COLUMN ', column_ddl);
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END$$
+
+CREATE PROCEDURE dm_add_index_if_absent(IN table_name_in VARCHAR(64), IN index_name_in VARCHAR(64), IN index_ddl TEXT)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = table_name_in AND INDEX_NAME = index_name_in
+    ) THEN
+        SET @ddl = CONCAT('ALTER TABLE ', table_name_in, ' ADD INDEX ', index_ddl);
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END$$
+
+DELIMITER ;
+
+-- 标注项目：增量同步水位线
+CALL dm_add_column_if_absent('t_dm_labeling_projects', 'sync_watermarks',
+    'sync_watermarks JSON COMMENT ''增量同步水位线（各同步方向上次同步到的时间点）'' AFTER progress');
+
+-- 自动标注任务：worker 租约
+CALL dm_add_column_if_absent('t_dm_auto_annotation_tasks', 'worker_id',
+    'worker_id VARCHAR(128) COMMENT ''持有任务租约的 worker 标识'' AFTER error_message');
+CALL dm_add_column_if_absent('t_dm_auto_annotation_tasks', 'heartbeat_at',
+    'heartbeat_at TIMESTAMP NULL COMMENT ''租约心跳时间，超时未续约的 running 任务可被其他 worker 接管'' AFTER worker_id');
+CALL dm_add_index_if_absent('t_dm_auto_annotation_tasks', 'idx_status_heartbeat',
+    'idx_status_heartbeat (status, heartbeat_at)');
+
+DROP PROCEDURE IF EXISTS dm_add_column_if_absent;
+DROP PROCEDURE IF EXISTS dm_add_index_if_absent;